@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the part2 domain models.
+
+Builds N entities of each type and reports the bytes allocated per entity
+(tracemalloc), including the id string, timestamps and the relationship
+containers each object owns. Shared objects (a place's owner, the amenity
+pool, the places being reviewed) are created before measuring.
+
+Each entity is measured twice: as the slotted model, and as a baseline
+__dict__ instance shaped like the models before __slots__ (same attribute
+values set in the same order, Place's review and amenity dicts allocated
+up front), so the two columns compare like with like.
+
+Run with: python benchmark_memory.py [N]
+"""
+
+import sys
+import tracemalloc
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from hbnb.app.models.amenity import Amenity
+from hbnb.app.models.place import Place
+from hbnb.app.models.review import Review
+from hbnb.app.models.user import User
+
+
+def measure(n, build):
+    """Return the bytes allocated per object by build(i), kept alive."""
+    objs = [None] * n
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(n):
+        objs[i] = build(i)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / n
+
+
+def dict_twin(obj):
+    """obj as a baseline __dict__ instance (see the module docstring)."""
+    cls = _TWINS.get(type(obj))
+    if cls is None:
+        cls = _TWINS[type(obj)] = type(type(obj).__name__, (), {})
+    twin = cls()
+    for klass in reversed(type(obj).__mro__):
+        for name in klass.__dict__.get('__slots__', ()):
+            value = getattr(obj, name, None)
+            if name in _EAGER_DICTS and value is None:
+                value = {}
+            setattr(twin, name, value)
+    return twin
+
+
+# Baseline classes per model, and the Place dicts the old model always
+# allocated
+_TWINS = {}
+_EAGER_DICTS = ('_reviews', '_amenities')
+
+
+def run(n, wrap):
+    """Bytes per entity of each model, each built object passed to wrap."""
+    owner = User(first_name='Owner', last_name='User',
+                 email='owner@example.com')
+    pool = [Amenity(name=f'Amenity {i}') for i in range(10)]
+    places = [Place(title=f'Place {i}', price=100, latitude=0,
+                    longitude=0, owner=owner) for i in range(n)]
+    # Give every place its review dict up front, so that a measured review
+    # only pays for itself and its entry in that dict
+    for place in places:
+        Review(text='Seed', rating=4, user=owner, place=place)
+
+    def place(i):
+        obj = Place(title=f'Place {i}', description='A nice place',
+                    price=100, latitude=45.5, longitude=-73.5, owner=owner)
+        obj.add_amenity(pool[i % 10])
+        obj.add_amenity(pool[(i + 1) % 10])
+        return wrap(obj)
+
+    def review(i):
+        obj = Review(text='Great stay', rating=5, user=owner,
+                     place=places[i])
+        kept = wrap(obj)
+        places[i]._reviews[obj.id] = kept
+        return kept
+
+    return {
+        'User': measure(n, lambda i: wrap(User(
+            first_name='First', last_name='Last',
+            email=f'user{i}@example.com'))),
+        'Amenity': measure(n, lambda i: wrap(Amenity(name=f'Amenity {i}'))),
+        'Place': measure(n, place),
+        # includes the entry added to the place's reviews
+        'Review': measure(n, review),
+    }
+
+
+def main(n=20000):
+    baseline = run(n, dict_twin)
+    slotted = run(n, lambda obj: obj)
+
+    print(f'{"entity":<10}{"__dict__":>10}{"slotted":>10}{"saved":>8}'
+          f'   (bytes/entity, N={n})')
+    for name, size in slotted.items():
+        before = baseline[name]
+        print(f'{name:<10}{before:>10.0f}{size:>10.0f}'
+              f'{1 - size / before:>8.0%}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -3,6 +3,11 @@ import os
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
     DEBUG = False
+    # Directory for the in-memory repositories' journal and snapshot;
+    # unset keeps all data in memory only
+    HBNB_DATA_DIR = os.getenv('HBNB_DATA_DIR')
+    JOURNAL_COMPACT_EVERY = int(os.getenv('JOURNAL_COMPACT_EVERY', '10000'))
+    JOURNAL_FSYNC = os.getenv('JOURNAL_FSYNC', '').lower() in ('1', 'true')
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -1,9 +1,12 @@
-from flask import Flask
+from flask import Flask, g
 from flask_restx import Api
 
+from hbnb.app.persistence.repository import SnapshotScope
 
-def create_app():
+
+def create_app(config_class="config.DevelopmentConfig"):
     app = Flask(__name__)
+    app.config.from_object(config_class)
     api = Api(
         app,
         version="1.0",
@@ -23,4 +26,24 @@ def create_app():
     api.add_namespace(places_ns, path='/api/v1/places')
     api.add_namespace(reviews_ns, path='/api/v1/reviews')
 
+    # Optional durability: restore the saved data and journal new writes
+    if app.config.get('HBNB_DATA_DIR'):
+        from hbnb.app.services import facade
+        facade.open_journal(
+            app.config['HBNB_DATA_DIR'],
+            compact_every=app.config['JOURNAL_COMPACT_EVERY'],
+            fsync=app.config['JOURNAL_FSYNC'],
+        )
+
+    # Every request reads one consistent version of each repository
+    @app.before_request
+    def open_snapshot_scope():
+        g.snapshot_scope = SnapshotScope().__enter__()
+
+    @app.teardown_request
+    def close_snapshot_scope(exc):
+        scope = g.pop('snapshot_scope', None)
+        if scope is not None:
+            scope.__exit__(None, None, None)
+
     return app
@@ -1,11 +1,9 @@
 """Amenity API endpoints for HBnB application"""
 from flask_restx import Namespace, Resource, fields
-from hbnb.app.services.facade import HBnBFacade
+from hbnb.app.services import facade
 
 api = Namespace('amenities', description='Amenity operations')
 
-facade = HBnBFacade()
-
 # Define the amenity model for input validation
 amenity_model = api.model('Amenity', {
     'name': fields.String(required=True, description='Amenity name', min_length=1, max_length=50)
@@ -1,11 +1,9 @@
 """Place API endpoints for HBnB application"""
 from flask_restx import Namespace, Resource, fields
-from hbnb.app.services.facade import HBnBFacade
+from hbnb.app.services import facade
 
 api = Namespace('places', description='Place operations')
 
-facade = HBnBFacade()
-
 # Define the place model for input validation
 place_model = api.model('Place', {
     'title': fields.String(required=True, description='Place title', min_length=1, max_length=100),
@@ -1,11 +1,9 @@
 """Review API endpoints for HBnB application"""
 from flask_restx import Namespace, Resource, fields
-from hbnb.app.services.facade import HBnBFacade
+from hbnb.app.services import facade
 
 api = Namespace('reviews', description='Review operations')
 
-facade = HBnBFacade()
-
 # Define the review model for input validation
 review_model = api.model('Review', {
     'text': fields.String(required=True, description='Review text', min_length=1),
@@ -2,13 +2,10 @@
 User API endpoints for HBnB application
 """
 from flask_restx import Namespace, Resource, fields
-from hbnb.app.services.facade import HBnBFacade
+from hbnb.app.services import facade
 
 api = Namespace('users', description='User operations')
 
-# Create a facade instance
-facade = HBnBFacade()
-
 # Define the user model for input validation and documentation
 user_model = api.model('User', {
     'first_name': fields.String(required=True, description='First name of the user', min_length=1, max_length=50),
@@ -11,6 +11,8 @@ class Amenity(BaseModel):
     - name (required, max 50)
     """
 
+    __slots__ = ("name",)
+
     def __init__(self, name: str, **kwargs: Any):
         super().__init__(**kwargs)
         self.name = name
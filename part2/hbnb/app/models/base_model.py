@@ -16,8 +16,14 @@ class BaseModel:
     - updated_at (UTC datetime)
     - save(): updates updated_at
     - update(data): set attributes then validate
+
+    Models declare their attributes in __slots__ instead of carrying a
+    per-instance __dict__, which keeps each entity compact when millions
+    are held in memory (see benchmark_memory.py).
     """
 
+    __slots__ = ("id", "created_at", "updated_at")
+
     def __init__(self, **kwargs: Any):
         now = datetime.now(timezone.utc)
 
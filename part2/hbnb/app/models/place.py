@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, List
+from typing import Any, Dict, Iterable, List, Optional
 
 from hbnb.app.models.base_model import BaseModel
 from hbnb.app.models.user import User
@@ -19,8 +19,14 @@ class Place(BaseModel):
     Relationships:
     - reviews: list of Review
     - amenities: list of Amenity
+    Both are kept in dicts keyed by id (insertion ordered), so membership
+    checks and removals are O(1); the list properties return copies. The
+    dicts are only allocated once the first review/amenity is added.
     """
 
+    __slots__ = ("title", "description", "price", "latitude", "longitude",
+                 "owner", "_reviews", "_amenities")
+
     def __init__(
         self,
         title: str,
@@ -40,21 +46,51 @@ class Place(BaseModel):
         self.longitude = longitude
         self.owner = owner
 
-        self.reviews: List[Any] = []      # will contain Review objects
-        self.amenities: List[Amenity] = []
+        # review id -> Review, amenity id -> Amenity
+        self._reviews: Optional[Dict[str, Any]] = None
+        self._amenities: Optional[Dict[str, Amenity]] = None
 
         self.validate()
 
+    @property
+    def reviews(self) -> List[Any]:
+        return list(self._reviews.values()) if self._reviews else []
+
+    @property
+    def amenities(self) -> List[Amenity]:
+        return list(self._amenities.values()) if self._amenities else []
+
+    @amenities.setter
+    def amenities(self, amenities: Iterable[Amenity]) -> None:
+        self._amenities = {amenity.id: amenity for amenity in amenities} \
+            or None
+
+    @property
+    def amenity_ids(self) -> List[str]:
+        return list(self._amenities) if self._amenities else []
+
     def add_review(self, review: Any) -> None:
-        # avoid duplicates
-        if review not in self.reviews:
-            self.reviews.append(review)
+        if self._reviews is None:
+            self._reviews = {}
+        # avoid duplicates; a newer copy of a linked review replaces it
+        if review.id not in self._reviews:
+            self._reviews[review.id] = review
+            self.save()
+        else:
+            self._reviews[review.id] = review
+
+    def remove_review(self, review: Any) -> None:
+        if self._reviews and self._reviews.pop(review.id, None) is not None:
             self.save()
 
     def add_amenity(self, amenity: Amenity) -> None:
-        if amenity not in self.amenities:
-            self.amenities.append(amenity)
+        if self._amenities is None:
+            self._amenities = {}
+        if amenity.id not in self._amenities:
+            self._amenities[amenity.id] = amenity
             self.save()
+        else:
+            self._amenities[amenity.id] = amenity
 
     def validate(self) -> None:
         if not isinstance(self.title, str) or not self.title.strip():
@@ -16,6 +16,8 @@ class Review(BaseModel):
     - place  (Place instance)
     """
 
+    __slots__ = ("text", "rating", "user", "place")
+
     def __init__(
         self,
         text: str,
@@ -18,6 +18,8 @@ class User(BaseModel):
     - is_admin   (bool, default False)
     """
 
+    __slots__ = ("first_name", "last_name", "email", "is_admin")
+
     def __init__(
         self,
         first_name: str,
@@ -0,0 +1,243 @@
+import json
+import marshal
+import mmap
+import os
+import struct
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from hbnb.app.persistence.repository import SnapshotScope, _extract
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Snapshot layout: MAGIC, marshal format version (u8), then one frame per
+# collection: name length (u16), name, payload length (u64), payload.
+# A payload is marshal.dumps((fields, columns)), one list per field.
+_MAGIC = b"HBNBSNP1"
+_HEADER = struct.Struct("<B")
+_NAME_LEN = struct.Struct("<H")
+_PAYLOAD_LEN = struct.Struct("<Q")
+
+
+class Journal:
+    """
+    Optional durability for InMemoryRepository.
+
+    Every published write is appended to an operation log (one JSON line
+    per add/update/delete, references stored as ids). After compact_every
+    operations the log is compacted into a columnar binary snapshot, which
+    load() memory-maps on startup before replaying the log written since.
+
+    attach() each repository with the attribute paths to persist, load()
+    the saved records to rebuild the objects, then start() journaling.
+
+    Compaction first rotates the log under the journal lock, then
+    snapshots the repositories; since records are full states and deletes
+    are idempotent, replaying snapshot, rotated log and live log in that
+    order always reaches the latest state, even after a crash
+    mid-compaction.
+    """
+
+    def __init__(self, directory, compact_every=10000, fsync=False):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.snapshot_path = self.directory / "snapshot.bin"
+        self.log_path = self.directory / "journal.log"
+        self.rotated_path = self.directory / "journal.log.1"
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        # name -> (repo, fields, timestamp fields)
+        self._collections = {}
+        self._names = {}
+        self._log = None
+        self._pending_ops = 0
+
+    def attach(self, name, repo, fields,
+               timestamps=("created_at", "updated_at")):
+        """Journal repo's writes as collection name, persisting fields."""
+        if "id" not in fields:
+            raise ValueError("fields must include 'id'")
+        self._collections[name] = (repo, tuple(fields), tuple(timestamps))
+        self._names[repo] = name
+
+    def start(self):
+        """
+        Journal writes of the attached repositories from now on.
+
+        Call after restoring load()'s records; if a log was replayed it is
+        compacted right away, so the next start reads the snapshot only.
+        """
+        for repo in self._names:
+            repo._journal = self
+        if self.log_path.exists() or self.rotated_path.exists():
+            self.compact()
+
+    def load(self):
+        """
+        Return {collection: {id: record}} folded from snapshot and logs.
+
+        Records map each persisted field to its value; timestamps come back
+        as aware datetimes and references as the ids they were saved with.
+        Torn lines (crash mid-append) are skipped.
+        """
+        records = {name: {} for name in self._collections}
+        self._read_snapshot(records)
+        for path in (self.rotated_path, self.log_path):
+            self._replay(path, records)
+        for name, collection in records.items():
+            timestamps = self._collections[name][2]
+            for record in collection.values():
+                for field in timestamps:
+                    if record.get(field) is not None:
+                        record[field] = _EPOCH + record[field] * _MICROSECOND
+        return records
+
+    def write(self, repo, ops):
+        """Append (op, obj or id) pairs; called with self.lock held."""
+        name = self._names[repo]
+        fields = self._collections[name][1]
+        lines = []
+        for op, target in ops:
+            if op == "delete":
+                record = target
+            else:
+                record = {field: _plain(_extract(target, field))
+                          for field in fields}
+            lines.append(json.dumps([name, op, record]) + "\n")
+        log = self._open_log()
+        log.write("".join(lines))
+        log.flush()
+        if self.fsync:
+            os.fsync(log.fileno())
+        self._pending_ops += len(ops)
+
+    def maybe_compact(self):
+        if self._pending_ops >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """Fold the log into a fresh snapshot and truncate it."""
+        with self._compact_lock:
+            with self.lock:
+                self._rotate()
+                self._pending_ops = 0
+            with SnapshotScope():
+                frames = [
+                    (name, _columns(repo.get_all(), fields))
+                    for name, (repo, fields, _) in self._collections.items()
+                ]
+            tmp_path = self.snapshot_path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(_MAGIC + _HEADER.pack(marshal.version))
+                for name, payload in frames:
+                    encoded = name.encode()
+                    f.write(_NAME_LEN.pack(len(encoded)) + encoded)
+                    f.write(_PAYLOAD_LEN.pack(len(payload)) + payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            self.rotated_path.unlink(missing_ok=True)
+
+    def close(self):
+        with self.lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def _open_log(self):
+        if self._log is None:
+            self._log = open(self.log_path, "a", encoding="utf-8")
+        return self._log
+
+    def _rotate(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        if not self.log_path.exists():
+            return
+        if self.rotated_path.exists():
+            # A previous compaction did not finish: keep both logs in order,
+            # on a fresh line in case the rotated one ends with a torn write
+            with open(self.rotated_path, "ab") as rotated, \
+                    open(self.log_path, "rb") as log:
+                rotated.write(b"\n" + log.read())
+            self.log_path.unlink()
+        else:
+            os.replace(self.log_path, self.rotated_path)
+
+    def _read_snapshot(self, records):
+        if not self.snapshot_path.exists():
+            return
+        with open(self.snapshot_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    self._parse_snapshot(view, records)
+                finally:
+                    view.release()
+
+    def _parse_snapshot(self, view, records):
+        if bytes(view[:len(_MAGIC)]) != _MAGIC:
+            raise ValueError(f"{self.snapshot_path} is not an HBnB snapshot")
+        pos = len(_MAGIC)
+        (version,) = _HEADER.unpack_from(view, pos)
+        if version != marshal.version:
+            raise ValueError(
+                f"{self.snapshot_path} was written with marshal version "
+                f"{version}, this interpreter uses {marshal.version}")
+        pos += _HEADER.size
+        while pos < len(view):
+            (name_len,) = _NAME_LEN.unpack_from(view, pos)
+            pos += _NAME_LEN.size
+            name = bytes(view[pos:pos + name_len]).decode()
+            pos += name_len
+            (size,) = _PAYLOAD_LEN.unpack_from(view, pos)
+            pos += _PAYLOAD_LEN.size
+            fields, columns = marshal.loads(view[pos:pos + size])
+            pos += size
+            if name not in records:
+                continue
+            id_pos = fields.index("id")
+            records[name].update(
+                (row[id_pos], dict(zip(fields, row)))
+                for row in zip(*columns)
+            )
+
+    def _replay(self, path, records):
+        if not path.exists():
+            return
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    name, op, record = json.loads(line)
+                except ValueError:
+                    continue
+                if name not in records:
+                    continue
+                if op == "delete":
+                    records[name].pop(record, None)
+                else:
+                    records[name][record["id"]] = record
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return (value - _EPOCH) // _MICROSECOND
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return value
+
+
+def _columns(objs, fields):
+    columns = tuple([] for _ in fields)
+    for obj in objs:
+        for column, field in zip(columns, fields):
+            column.append(_plain(_extract(obj, field)))
+    return marshal.dumps((fields, columns))
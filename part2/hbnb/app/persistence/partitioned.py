@@ -0,0 +1,293 @@
+import heapq
+import multiprocessing
+import os
+import threading
+import zlib
+
+from hbnb.app.persistence.repository import (
+    InMemoryRepository, Repository, _extract,
+)
+
+
+class PartitionedRepository(Repository):
+    """
+    InMemoryRepository hash-sharded across worker processes.
+
+    Each of the `shards` workers (default: one per usable CPU) owns an
+    InMemoryRepository holding the objects whose id hashes to it
+    (indexes, multi_indexes and range_indexes are kept per shard).
+    add/get/update/delete go straight to the owning shard; add_many()
+    sends one batch per shard. get_all, attribute and range lookups,
+    scan(), count() and aggregate() are sent to every shard at once and
+    run in parallel, then merged here.
+
+    Objects cross process boundaries by pickling, so get() and scans
+    return copies: change stored objects through update(), and pass
+    scan()/aggregate() picklable (module-level) functions. unique_indexes
+    are enforced here, in the coordinating process, since a value may
+    live on any shard.
+
+    Meant for analytic workloads over a large catalog; call close() (or
+    use it as a context manager) to stop the workers.
+    """
+
+    def __init__(self, shards=None, unique_indexes=(), indexes=(),
+                 multi_indexes=(), range_indexes=()):
+        shards = shards or _usable_cpus()
+        repo_kwargs = {
+            "indexes": indexes,
+            "multi_indexes": multi_indexes,
+            "range_indexes": range_indexes,
+        }
+        self._shards = [_Shard(repo_kwargs) for _ in range(shards)]
+        self._unique = {attr: {} for attr in unique_indexes}
+        # obj_id -> {attr: value} for the unique attributes
+        self._unique_values = {}
+        self._lock = threading.RLock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for shard in self._shards:
+            shard.close()
+
+    def add(self, obj):
+        with self._lock:
+            values = {attr: _extract(obj, attr) for attr in self._unique}
+            self._check_unique(obj.id, values)
+            self._shard(obj.id).call("add", obj)
+            self._reindex_unique(obj.id, values)
+
+    def add_many(self, objs):
+        """Add objs with one message per shard instead of one per object."""
+        with self._lock:
+            batches = [[] for _ in self._shards]
+            pending = {}
+            for obj in objs:
+                values = {attr: _extract(obj, attr) for attr in self._unique}
+                self._check_unique(obj.id, values)
+                for attr, value in values.items():
+                    if pending.setdefault((attr, value), obj.id) != obj.id:
+                        raise ValueError(f"{attr} must be unique")
+                batches[self._shard_index(obj.id)].append((obj, values))
+            self._fan_out_each(
+                "add_many",
+                [([obj for obj, _ in batch],) for batch in batches])
+            for batch in batches:
+                for obj, values in batch:
+                    self._reindex_unique(obj.id, values)
+
+    def get(self, obj_id):
+        return self._shard(obj_id).call("get", obj_id)
+
+    def get_all(self):
+        return _concat(self._fan_out("get_all"))
+
+    def update(self, obj_id, data):
+        with self._lock:
+            values = None
+            if obj_id in self._unique_values:
+                values = dict(self._unique_values[obj_id])
+                values.update(
+                    (attr, data[attr]) for attr in self._unique
+                    if attr in data)
+                self._check_unique(obj_id, values)
+            self._shard(obj_id).call("update", obj_id, data)
+            if values is not None:
+                self._reindex_unique(obj_id, values)
+
+    def delete(self, obj_id):
+        with self._lock:
+            self._shard(obj_id).call("delete", obj_id)
+            self._reindex_unique(obj_id, None)
+
+    def get_by_attribute(self, attr_name, attr_value):
+        if attr_name in self._unique:
+            obj_id = self._unique[attr_name].get(attr_value)
+            return self.get(obj_id) if obj_id is not None else None
+        return next(
+            (obj for obj in self._fan_out(
+                "get_by_attribute", attr_name, attr_value)
+             if obj is not None),
+            None,
+        )
+
+    def get_all_by_attribute(self, attr_name, attr_value):
+        return _concat(self._fan_out(
+            "get_all_by_attribute", attr_name, attr_value))
+
+    def get_by_range(self, attr_name, low=None, high=None):
+        """Objects with attr_name in [low, high], ordered by the value."""
+        return list(heapq.merge(
+            *self._fan_out("get_by_range", attr_name, low, high),
+            key=lambda obj: _extract(obj, attr_name)))
+
+    def get_by_ranges(self, ranges):
+        return _concat(self._fan_out("get_by_ranges", ranges))
+
+    def scan(self, predicate):
+        """Objects for which predicate(obj) is true, filtered per shard."""
+        return _concat(self._fan_out("scan", predicate))
+
+    def count(self, predicate=None):
+        return sum(self._fan_out("count", predicate))
+
+    def aggregate(self, func, combine):
+        """
+        Return combine([func(objs) for each shard's objects]).
+
+        func runs inside the workers, so only its (small) partial results
+        travel back; e.g. func returns (count, total) and combine sums
+        them.
+        """
+        return combine(self._fan_out("aggregate", func))
+
+    def _shard_index(self, obj_id):
+        return zlib.crc32(str(obj_id).encode()) % len(self._shards)
+
+    def _shard(self, obj_id):
+        return self._shards[self._shard_index(obj_id)]
+
+    def _fan_out(self, method, *args):
+        return self._fan_out_each(method, [args] * len(self._shards))
+
+    def _fan_out_each(self, method, args_per_shard):
+        # Send to every shard before reading any reply, so they all work at
+        # once; shard locks are taken in a fixed order
+        for shard in self._shards:
+            shard.lock.acquire()
+        try:
+            for shard, args in zip(self._shards, args_per_shard):
+                shard.send(method, args)
+            # Read every reply before raising, so that no pipe is left
+            # holding an answer the next call would take for its own
+            results, error = [], None
+            for shard in self._shards:
+                try:
+                    results.append(shard.receive())
+                except Exception as e:
+                    error = error or e
+            if error is not None:
+                raise error
+            return results
+        finally:
+            for shard in self._shards:
+                shard.lock.release()
+
+    def _check_unique(self, obj_id, values):
+        for attr, value in values.items():
+            owner_id = self._unique[attr].get(value)
+            if owner_id is not None and owner_id != obj_id:
+                raise ValueError(f"{attr} must be unique")
+
+    def _reindex_unique(self, obj_id, values):
+        for attr, value in self._unique_values.pop(obj_id, {}).items():
+            if self._unique[attr].get(value) == obj_id:
+                del self._unique[attr][value]
+        if values:
+            for attr, value in values.items():
+                self._unique[attr][value] = obj_id
+            self._unique_values[obj_id] = values
+
+
+class _Shard:
+    """One worker process and the pipe used to talk to it."""
+
+    def __init__(self, repo_kwargs):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_serve, args=(child_conn, repo_kwargs), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.lock = threading.Lock()
+
+    def call(self, method, *args):
+        with self.lock:
+            self.send(method, args)
+            return self.receive()
+
+    def send(self, method, args):
+        self.conn.send((method, args))
+
+    def receive(self):
+        ok, result = self.conn.recv()
+        if not ok:
+            raise result
+        return result
+
+    def close(self):
+        if self.process.is_alive():
+            with self.lock:
+                self.conn.send((None, ()))
+            self.process.join()
+        self.conn.close()
+
+
+def _add_many(repo, objs):
+    with repo.batch():
+        for obj in objs:
+            repo.add(obj)
+
+
+def _scan(repo, predicate):
+    return [obj for obj in repo.get_all() if predicate(obj)]
+
+
+def _count(repo, predicate):
+    if predicate is None:
+        return len(repo.get_all())
+    return sum(1 for obj in repo.get_all() if predicate(obj))
+
+
+def _aggregate(repo, func):
+    return func(repo.get_all())
+
+
+_SHARD_OPS = {
+    "add": InMemoryRepository.add,
+    "add_many": _add_many,
+    "get": InMemoryRepository.get,
+    "get_all": InMemoryRepository.get_all,
+    "update": InMemoryRepository.update,
+    "delete": InMemoryRepository.delete,
+    "get_by_attribute": InMemoryRepository.get_by_attribute,
+    "get_all_by_attribute": InMemoryRepository.get_all_by_attribute,
+    "get_by_range": InMemoryRepository.get_by_range,
+    "get_by_ranges": InMemoryRepository.get_by_ranges,
+    "scan": _scan,
+    "count": _count,
+    "aggregate": _aggregate,
+}
+
+
+def _serve(conn, repo_kwargs):
+    """Worker loop: apply (method, args) requests to this shard's objects."""
+    repo = InMemoryRepository(**repo_kwargs)
+    while True:
+        try:
+            method, args = conn.recv()
+        except EOFError:
+            break
+        if method is None:
+            break
+        try:
+            reply = (True, _SHARD_OPS[method](repo, *args))
+        except Exception as exc:
+            reply = (False, exc)
+        conn.send(reply)
+    conn.close()
+
+
+def _usable_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _concat(parts):
+    return [obj for part in parts for obj in part]
@@ -1,4 +1,12 @@
+import copy
+import threading
 from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from contextvars import ContextVar
+from operator import attrgetter
+
+# InMemoryRepository -> version pinned by the current SnapshotScope
+_pinned_versions = ContextVar("pinned_versions", default=None)
 
 
 class Repository(ABC):
@@ -27,34 +35,427 @@ class Repository(ABC):
         pass
 
 
-class InMemoryRepository(Repository):
+class SnapshotScope:
+    """
+    Pin a consistent view of every InMemoryRepository for a block (or a
+    request).
+
+    Each repository is pinned to its current version the first time it is
+    read inside the scope; writes made by other threads meanwhile stay
+    invisible until the scope ends. Writes made inside the scope re-pin the
+    repository so they are read back.
+    """
+
     def __init__(self):
-        self._storage = {}
+        self._token = None
+
+    def __enter__(self):
+        self._token = _pinned_versions.set({})
+        return self
+
+    def __exit__(self, *exc_info):
+        _pinned_versions.reset(self._token)
+        self._token = None
+
+
+class _Version:
+    """
+    One published state of an InMemoryRepository.
+
+    A published version is never mutated. Writers branch() it, which only
+    copies the top-level state; nested containers are copied the first time
+    the writer touches them (writable()), so a write costs the size of the
+    containers it changes rather than a deep copy.
+    """
+
+    __slots__ = ("state", "_owned", "_values", "__weakref__")
+
+    def __init__(self, state, owned=()):
+        self.state = state
+        self._owned = set(owned)
+        self._values = None
+
+    def branch(self):
+        state = dict(self.state)
+        return _Version(state, owned=(id(state),))
+
+    def writable(self, *path):
+        """Return the container at path, copying each level not owned yet."""
+        node = self.state
+        for key in path:
+            child = node.get(key)
+            if child is None:
+                child = node[key] = {}
+                self._owned.add(id(child))
+            elif id(child) not in self._owned:
+                child = node[key] = child.copy()
+                self._owned.add(id(child))
+            node = child
+        return node
+
+    def seal(self):
+        self._owned = None
+
+    def values(self):
+        # Built once per published version and shared by every reader; a
+        # pending version may still change, so it is never cached
+        if self._owned is not None:
+            return tuple(self.state["storage"].values())
+        if self._values is None:
+            self._values = tuple(self.state["storage"].values())
+        return self._values
+
+
+class InMemoryRepository(Repository):
+    """
+    Dict-backed repository.
+
+    unique_indexes / indexes name attributes to keep hash indexes on
+    (value -> id, and value -> ids in insertion order). Names may be dotted
+    paths such as 'owner.id', which gives foreign-key reverse indexes.
+    multi_indexes name collection attributes (e.g. 'amenity_ids') indexed
+    once per element. get_by_attribute() and get_all_by_attribute() use the
+    indexes for O(1) lookups and fall back to a scan for other attributes.
+
+    range_indexes name orderable attributes (e.g. 'price') kept in
+    bisect-maintained sorted arrays; get_by_range() and get_by_ranges()
+    answer range queries in O(log n + matches).
+
+    Storage and indexes are multi-versioned: writers serialize on a lock,
+    build a copy-on-write version and publish it with a single reference
+    swap, so readers never lock and never see a half-applied write. Inside
+    a SnapshotScope reads stay on one version; old versions are freed as
+    soon as no scope holds them. get_all() returns a tuple shared by every
+    reader of a version. update() stores a shallow copy of the object, so
+    the attributes it sets are versioned; the copy still shares containers
+    and references (e.g. a place's reviews) with the previous object, and
+    objects linking to the updated one keep the previous object until the
+    caller points them at the copy. Attribute changes made directly on a
+    stored object are seen by every version.
+
+    Indexes are refreshed by add/update/delete, so callers that mutate an
+    object directly must call update() after.
+
+    A repository attached to a Journal appends each batch's operations to
+    it while publishing the version, so the log order matches the order in
+    which versions become visible.
+    """
+
+    def __init__(self, unique_indexes=(), indexes=(), multi_indexes=(),
+                 range_indexes=()):
+        self._multi = frozenset(multi_indexes)
+        self._current = _Version({
+            "storage": {},
+            "unique": {attr: {} for attr in unique_indexes},
+            "indexes": {attr: {}
+                        for attr in tuple(indexes) + tuple(multi_indexes)},
+            # attr -> {"keys": sorted values, "ids": ids in the same order}
+            "ranges": {attr: {"keys": [], "ids": []}
+                       for attr in range_indexes},
+            # obj_id -> ({attr: value}, {attr: range value}) as last indexed,
+            # to unindex stale values
+            "indexed": {},
+        })
+        self._write_lock = threading.RLock()
+        self._pending = None
+        self._pending_thread = None
+        self._pending_ops = []
+        self._journal = None
 
     def add(self, obj):
-        self._storage[obj.id] = obj
+        with self.batch():
+            version = self._pending
+            if obj.id in version.state["storage"]:
+                self._unindex(version, obj.id)
+            self._check_unique(version.state, obj)
+            version.writable("storage")[obj.id] = obj
+            self._index(version, obj)
+            self._record("add", obj)
 
     def get(self, obj_id):
-        return self._storage.get(obj_id)
+        return self._read().state["storage"].get(obj_id)
 
     def get_all(self):
-        return list(self._storage.values())
+        return self._read().values()
 
     def update(self, obj_id, data):
-        obj = self.get(obj_id)
-        if obj:
-            obj.update(data)
+        """
+        Apply data to a copy of the object and store the copy.
+
+        Versions published before keep the previous object, so readers
+        pinned to them never see the change. Returns the stored copy, or
+        None if obj_id is unknown. A rejected update (validation or
+        uniqueness error) leaves the repository unchanged.
+        """
+        with self.batch():
+            version = self._pending
+            obj = version.state["storage"].get(obj_id)
+            if not obj:
+                return None
+            updated = copy.copy(obj)
+            updated.update(data)
+            self._check_unique(version.state, updated)
+            self._unindex(version, obj_id)
+            version.writable("storage")[obj_id] = updated
+            self._index(version, updated)
+            self._record("update", updated)
+            return updated
 
     def delete(self, obj_id):
-        if obj_id in self._storage:
-            del self._storage[obj_id]
+        with self.batch():
+            version = self._pending
+            if obj_id in version.state["storage"]:
+                self._unindex(version, obj_id)
+                del version.writable("storage")[obj_id]
+                self._record("delete", obj_id)
+
+    def batch(self):
+        """
+        Apply every write in the block to one new version.
+
+        The version is published when the outermost block exits; writes
+        applied before an exception are published too. Other writers wait
+        on the lock meanwhile; readers keep seeing the previous version.
+        """
+        return _Batch(self)
 
     def get_by_attribute(self, attr_name, attr_value):
+        state = self._read().state
+        storage = state["storage"]
+        if attr_name in state["unique"]:
+            obj_id = state["unique"][attr_name].get(attr_value)
+            return storage.get(obj_id)
+        if attr_name in state["indexes"]:
+            obj_ids = state["indexes"][attr_name].get(attr_value)
+            return storage[next(iter(obj_ids))] if obj_ids else None
         return next(
             (
                 obj
-                for obj in self._storage.values()
-                if getattr(obj, attr_name) == attr_value
+                for obj in storage.values()
+                if _extract(obj, attr_name) == attr_value
             ),
             None,
         )
+
+    def get_all_by_attribute(self, attr_name, attr_value):
+        state = self._read().state
+        storage = state["storage"]
+        if attr_name in state["unique"]:
+            obj = storage.get(state["unique"][attr_name].get(attr_value))
+            return [obj] if obj else []
+        if attr_name in state["indexes"]:
+            obj_ids = state["indexes"][attr_name].get(attr_value, ())
+            return [storage[obj_id] for obj_id in obj_ids]
+        return [
+            obj
+            for obj in storage.values()
+            if _extract(obj, attr_name) == attr_value
+        ]
+
+    def count_by_attribute(self, attr_name, attr_value):
+        """
+        Return how many objects have attr_name equal to attr_value.
+
+        Read from the index bucket in O(1) when attr_name is indexed, so
+        callers can pick the smaller of two buckets before listing either.
+        """
+        state = self._read().state
+        if attr_name in state["unique"]:
+            return int(attr_value in state["unique"][attr_name])
+        if attr_name in state["indexes"]:
+            return len(state["indexes"][attr_name].get(attr_value, ()))
+        return len(self.get_all_by_attribute(attr_name, attr_value))
+
+    def get_by_range(self, attr_name, low=None, high=None):
+        """
+        Return the objects whose attr_name lies in [low, high].
+
+        Either bound may be None (open-ended). Results are ordered by the
+        attribute value. Falls back to a scan if attr_name has no range
+        index.
+        """
+        state = self._read().state
+        return [state["storage"][obj_id]
+                for obj_id in _range_ids(state, attr_name, low, high)]
+
+    def get_by_ranges(self, ranges):
+        """
+        Return the objects matching every {attr_name: (low, high)} range.
+
+        Each range is answered from its sorted index; the id sets are then
+        intersected starting from the smallest one, so the result is a list
+        ordered by the attribute of that narrowest range. Without ranges,
+        every object is returned (as a list too).
+        """
+        if not ranges:
+            return list(self.get_all())
+        state = self._read().state
+        candidates = sorted(
+            (_range_ids(state, attr, low, high)
+             for attr, (low, high) in ranges.items()),
+            key=len,
+        )
+        result = candidates[0]
+        for obj_ids in candidates[1:]:
+            if not result:
+                break
+            keep = set(obj_ids)
+            result = [obj_id for obj_id in result if obj_id in keep]
+        return [state["storage"][obj_id] for obj_id in result]
+
+    def _read(self):
+        """Version visible to the caller: own pending writes, pin or latest."""
+        if (self._pending is not None
+                and self._pending_thread == threading.get_ident()):
+            return self._pending
+        pinned = _pinned_versions.get()
+        if pinned is None:
+            return self._current
+        version = pinned.get(self)
+        if version is None:
+            version = pinned[self] = self._current
+        return version
+
+    def _record(self, op, target):
+        if self._journal is not None:
+            self._pending_ops.append((op, target))
+
+    def _publish(self, version, ops):
+        version.seal()
+        journal = self._journal
+        if journal is not None and ops:
+            with journal.lock:
+                journal.write(self, ops)
+                self._current = version
+        else:
+            self._current = version
+        pinned = _pinned_versions.get()
+        if pinned is not None:
+            pinned[self] = version
+
+    def _check_unique(self, state, obj):
+        for attr, index in state["unique"].items():
+            owner_id = index.get(_extract(obj, attr))
+            if owner_id is not None and owner_id != obj.id:
+                raise ValueError(f"{attr} must be unique")
+
+    def _index(self, version, obj):
+        state = version.state
+        values = {}
+        for attr, index in state["unique"].items():
+            value = _extract(obj, attr)
+            # Never take over a value another object already owns
+            if index.get(value, obj.id) == obj.id:
+                version.writable("unique", attr)[value] = obj.id
+                values[attr] = value
+        for attr in state["indexes"]:
+            value = _extract(obj, attr)
+            if attr in self._multi:
+                value = frozenset(value or ())
+                keys = value
+            else:
+                keys = (value,)
+            for key in keys:
+                version.writable("indexes", attr, key)[obj.id] = None
+            values[attr] = value
+
+        range_values = {}
+        for attr in state["ranges"]:
+            value = _extract(obj, attr)
+            if value is None:
+                continue
+            keys = version.writable("ranges", attr, "keys")
+            obj_ids = version.writable("ranges", attr, "ids")
+            pos = bisect_right(keys, value)
+            keys.insert(pos, value)
+            obj_ids.insert(pos, obj.id)
+            range_values[attr] = value
+        version.writable("indexed")[obj.id] = (values, range_values)
+
+    def _unindex(self, version, obj_id):
+        state = version.state
+        values, range_values = version.writable("indexed").pop(
+            obj_id, ({}, {}))
+        for attr, index in state["unique"].items():
+            if attr in values and index.get(values[attr]) == obj_id:
+                del version.writable("unique", attr)[values[attr]]
+        for attr in state["indexes"]:
+            if attr not in values:
+                continue
+            keys = values[attr] if attr in self._multi else (values[attr],)
+            for key in keys:
+                if key not in state["indexes"][attr]:
+                    continue
+                obj_ids = version.writable("indexes", attr, key)
+                obj_ids.pop(obj_id, None)
+                if not obj_ids:
+                    del state["indexes"][attr][key]
+
+        for attr, value in range_values.items():
+            keys = version.writable("ranges", attr, "keys")
+            obj_ids = version.writable("ranges", attr, "ids")
+            start = bisect_left(keys, value)
+            end = bisect_right(keys, value)
+            pos = obj_ids.index(obj_id, start, end)
+            del keys[pos]
+            del obj_ids[pos]
+
+
+class _Batch:
+    """Context manager returned by InMemoryRepository.batch()."""
+
+    def __init__(self, repo):
+        self._repo = repo
+        self._outermost = False
+
+    def __enter__(self):
+        repo = self._repo
+        repo._write_lock.acquire()
+        if repo._pending is None:
+            self._outermost = True
+            repo._pending = repo._current.branch()
+            repo._pending_thread = threading.get_ident()
+            repo._pending_ops = []
+        return repo
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        repo = self._repo
+        try:
+            if self._outermost:
+                version, repo._pending = repo._pending, None
+                ops, repo._pending_ops = repo._pending_ops, []
+                repo._pending_thread = None
+                repo._publish(version, ops)
+        finally:
+            repo._write_lock.release()
+        # Outside the lock: compaction snapshots every attached repository
+        if self._outermost and repo._journal is not None:
+            repo._journal.maybe_compact()
+
+
+def _range_ids(state, attr_name, low, high):
+    if attr_name not in state["ranges"]:
+        return [
+            obj.id
+            for obj in state["storage"].values()
+            if _in_range(_extract(obj, attr_name), low, high)
+        ]
+    sorted_index = state["ranges"][attr_name]
+    keys = sorted_index["keys"]
+    start = 0 if low is None else bisect_left(keys, low)
+    end = len(keys) if high is None else bisect_right(keys, high)
+    return sorted_index["ids"][start:end]
+
+
+def _in_range(value, low, high):
+    if value is None:
+        return False
+    return (low is None or value >= low) and (high is None or value <= high)
+
+
+def _extract(obj, attr_path):
+    """Read a possibly dotted attribute path ('owner.id'); None if absent."""
+    try:
+        return attrgetter(attr_path)(obj)
+    except AttributeError:
+        return None
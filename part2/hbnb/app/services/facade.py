@@ -1,3 +1,4 @@
+from hbnb.app.persistence.journal import Journal
 from hbnb.app.persistence.repository import InMemoryRepository
 from hbnb.app.models.user import User
 from hbnb.app.models.amenity import Amenity
@@ -6,11 +7,107 @@ from hbnb.app.models.review import Review
 
 
 class HBnBFacade:
+    # Attribute paths saved by open_journal(); relationships are stored as
+    # ids and resolved again on restore
+    JOURNAL_FIELDS = {
+        'users': ('id', 'created_at', 'updated_at', 'first_name',
+                  'last_name', 'email', 'is_admin'),
+        'amenities': ('id', 'created_at', 'updated_at', 'name'),
+        'places': ('id', 'created_at', 'updated_at', 'title', 'description',
+                   'price', 'latitude', 'longitude', 'owner.id',
+                   'amenity_ids'),
+        'reviews': ('id', 'created_at', 'updated_at', 'text', 'rating',
+                    'user.id', 'place.id'),
+    }
+
     def __init__(self):
-        self.user_repo = InMemoryRepository()
-        self.place_repo = InMemoryRepository()
-        self.review_repo = InMemoryRepository()
-        self.amenity_repo = InMemoryRepository()
+        # Hash indexes back the email/name lookups done on every
+        # registration and amenity creation
+        self.user_repo = InMemoryRepository(unique_indexes=('email',))
+        self.amenity_repo = InMemoryRepository(unique_indexes=('name',))
+        # Foreign-key reverse indexes: owner -> places, amenity -> places,
+        # place -> reviews, user -> reviews
+        # Sorted range indexes for price and bounding-box filtering
+        self.place_repo = InMemoryRepository(
+            indexes=('owner.id',), multi_indexes=('amenity_ids',),
+            range_indexes=('price', 'latitude', 'longitude'))
+        self.review_repo = InMemoryRepository(indexes=('place.id', 'user.id'))
+        self.journal = None
+
+    # ===== Durability =====
+
+    def open_journal(self, directory, compact_every=10000, fsync=False):
+        """
+        Restore the data saved in directory, then journal every write there.
+
+        Does nothing if a journal is already open.
+        """
+        if self.journal is not None:
+            return self.journal
+        journal = Journal(directory, compact_every=compact_every, fsync=fsync)
+        repos = {
+            'users': self.user_repo,
+            'amenities': self.amenity_repo,
+            'places': self.place_repo,
+            'reviews': self.review_repo,
+        }
+        for name, repo in repos.items():
+            journal.attach(name, repo, self.JOURNAL_FIELDS[name])
+        self._restore(journal.load())
+        journal.start()
+        self.journal = journal
+        return journal
+
+    def _restore(self, records):
+        """Rebuild the objects of Journal.load() records, parents first."""
+        def saved(record):
+            return {key: record[key]
+                    for key in ('id', 'created_at', 'updated_at')}
+
+        with self.user_repo.batch():
+            for record in records['users'].values():
+                self.user_repo.add(User(
+                    first_name=record['first_name'],
+                    last_name=record['last_name'],
+                    email=record['email'],
+                    is_admin=record['is_admin'],
+                    **saved(record)))
+
+        with self.amenity_repo.batch():
+            for record in records['amenities'].values():
+                self.amenity_repo.add(
+                    Amenity(name=record['name'], **saved(record)))
+
+        with self.place_repo.batch():
+            for record in records['places'].values():
+                place = Place(
+                    title=record['title'],
+                    description=record['description'],
+                    price=record['price'],
+                    latitude=record['latitude'],
+                    longitude=record['longitude'],
+                    owner=self.user_repo.get(record['owner.id']),
+                    **saved(record))
+                place.amenities = [
+                    amenity for amenity in map(self.amenity_repo.get,
+                                               record['amenity_ids'])
+                    if amenity
+                ]
+                self.place_repo.add(place)
+
+        with self.review_repo.batch():
+            for record in records['reviews'].values():
+                self.review_repo.add(Review(
+                    text=record['text'],
+                    rating=record['rating'],
+                    user=self.user_repo.get(record['user.id']),
+                    place=self.place_repo.get(record['place.id']),
+                    **saved(record)))
+
+        # Linking reviews touched their places' updated_at
+        for record in records['places'].values():
+            self.place_repo.get(record['id']).updated_at = \
+                record['updated_at']
 
     # ===== User Management Methods =====
 
@@ -34,26 +131,21 @@ class HBnBFacade:
 
     def update_user(self, user_id, user_data):
         """Update a user's information"""
-        user = self.user_repo.get(user_id)
+        # The repository applies, validates and checks the email for
+        # uniqueness on a copy of the user, and stores it only if all pass
+        user = self.user_repo.update(user_id, {
+            key: user_data[key]
+            for key in ('first_name', 'last_name', 'email', 'is_admin')
+            if key in user_data
+        })
         if not user:
             return None
 
-        # Update user attributes
-        if 'first_name' in user_data:
-            user.first_name = user_data['first_name']
-        if 'last_name' in user_data:
-            user.last_name = user_data['last_name']
-        if 'email' in user_data:
-            user.email = user_data['email']
-        if 'is_admin' in user_data:
-            user.is_admin = user_data['is_admin']
-
-        # Validate the updated user
-        user.validate()
-        user.save()
-
-        # Update in repository
-        self.user_repo.update(user_id, user_data)
+        # Point the user's places and reviews at the stored copy
+        for place in self.get_places_by_owner(user_id):
+            place.owner = user
+        for review in self.get_reviews_by_user(user_id):
+            review.user = user
         return user
 
     # ===== Place Management Methods =====
@@ -104,41 +196,75 @@ class HBnBFacade:
         if not place:
             return None
 
-        # Update basic attributes
-        if 'title' in place_data:
-            place.title = place_data['title']
-        if 'description' in place_data:
-            place.description = place_data['description']
-        if 'price' in place_data:
-            place.price = place_data['price']
-        if 'latitude' in place_data:
-            place.latitude = place_data['latitude']
-        if 'longitude' in place_data:
-            place.longitude = place_data['longitude']
-
-        # Update owner if provided
+        data = {
+            key: place_data[key]
+            for key in ('title', 'description', 'price', 'latitude',
+                        'longitude')
+            if key in place_data
+        }
+
+        # Resolve the owner and amenities before anything is changed
         if 'owner_id' in place_data:
             owner = self.user_repo.get(place_data['owner_id'])
             if not owner:
                 raise ValueError("Owner not found")
-            place.owner = owner
-
-        # Update amenities if provided
+            data['owner'] = owner
         if 'amenities' in place_data:
-            place.amenities = []
-            for amenity_id in place_data['amenities']:
-                amenity = self.amenity_repo.get(amenity_id)
-                if amenity:
-                    place.add_amenity(amenity)
-
-        # Validate and save
-        place.validate()
-        place.save()
-
-        # Update in repository
-        self.place_repo.update(place_id, place_data)
+            data['amenities'] = [
+                amenity for amenity in map(self.amenity_repo.get,
+                                           place_data['amenities'])
+                if amenity
+            ]
+
+        # Validated on a copy, like update_user(): a rejected update leaves
+        # the place and its price/coordinate/owner/amenity indexes unchanged
+        place = self.place_repo.update(place_id, data)
+
+        # Point the place's reviews at the stored copy
+        for review in self.get_reviews_by_place(place_id):
+            review.place = place
         return place
 
+    def get_places_by_owner(self, owner_id):
+        """Get all places owned by a user"""
+        return self.place_repo.get_all_by_attribute('owner.id', owner_id)
+
+    def get_places_by_amenity(self, amenity_id):
+        """Get all places offering an amenity"""
+        return self.place_repo.get_all_by_attribute('amenity_ids', amenity_id)
+
+    def filter_places(self, min_price=None, max_price=None,
+                      min_latitude=None, max_latitude=None,
+                      min_longitude=None, max_longitude=None):
+        """
+        Get the places within the given price and coordinate bounds.
+
+        Bounds are inclusive and optional. A longitude range whose minimum
+        is greater than its maximum crosses the antimeridian: the places
+        from min_longitude to 180 come first, then those from -180 to
+        max_longitude.
+
+        Returns a list, ordered as get_by_ranges() orders each side.
+        """
+        ranges = {}
+        if min_price is not None or max_price is not None:
+            ranges['price'] = (min_price, max_price)
+        if min_latitude is not None or max_latitude is not None:
+            ranges['latitude'] = (min_latitude, max_latitude)
+
+        if (min_longitude is not None and max_longitude is not None
+                and min_longitude > max_longitude):
+            # e.g. 170..-170: split into 170..180 and -180..-170
+            east = self.place_repo.get_by_ranges(
+                dict(ranges, longitude=(min_longitude, None)))
+            west = self.place_repo.get_by_ranges(
+                dict(ranges, longitude=(None, max_longitude)))
+            return east + west
+
+        if min_longitude is not None or max_longitude is not None:
+            ranges['longitude'] = (min_longitude, max_longitude)
+        return self.place_repo.get_by_ranges(ranges)
+
     # ===== Amenity Management Methods =====
 
     def create_amenity(self, amenity_data):
@@ -161,20 +287,16 @@ class HBnBFacade:
 
     def update_amenity(self, amenity_id, amenity_data):
         """Update an amenity's information"""
-        amenity = self.amenity_repo.get(amenity_id)
+        # Same as update_user(): the name is checked before it is kept
+        amenity = self.amenity_repo.update(amenity_id, {
+            key: amenity_data[key] for key in ('name',) if key in amenity_data
+        })
         if not amenity:
             return None
 
-        # Update amenity attributes
-        if 'name' in amenity_data:
-            amenity.name = amenity_data['name']
-
-        # Validate the updated amenity
-        amenity.validate()
-        amenity.save()
-
-        # Update in repository
-        self.amenity_repo.update(amenity_id, amenity_data)
+        # Replace the previous copy in the places offering it
+        for place in self.get_places_by_amenity(amenity_id):
+            place.add_amenity(amenity)
         return amenity
 
     # ===== Review Management Methods =====
@@ -212,10 +334,23 @@ class HBnBFacade:
 
     def get_reviews_by_place(self, place_id):
         """Get all reviews for a specific place"""
-        place = self.place_repo.get(place_id)
-        if not place:
-            return []
-        return place.reviews
+        return self.review_repo.get_all_by_attribute('place.id', place_id)
+
+    def get_reviews_by_user(self, user_id):
+        """Get all reviews written by a user"""
+        return self.review_repo.get_all_by_attribute('user.id', user_id)
+
+    def has_reviewed(self, user_id, place_id):
+        """Check whether a user already reviewed a place"""
+        # Compare the index bucket sizes first, then list only the smaller
+        # side: O(min(reviews of the place, reviews of the user))
+        repo = self.review_repo
+        if (repo.count_by_attribute('user.id', user_id)
+                < repo.count_by_attribute('place.id', place_id)):
+            return any(review.place.id == place_id
+                       for review in self.get_reviews_by_user(user_id))
+        return any(review.user.id == user_id
+                   for review in self.get_reviews_by_place(place_id))
 
     def update_review(self, review_id, review_data):
         """Update a review's information"""
@@ -223,37 +358,29 @@ class HBnBFacade:
         if not review:
             return None
 
-        # Update basic attributes
-        if 'text' in review_data:
-            review.text = review_data['text']
-        if 'rating' in review_data:
-            review.rating = review_data['rating']
+        data = {key: review_data[key]
+                for key in ('text', 'rating') if key in review_data}
 
-        # Update user if provided
+        # Resolve the user and place before anything is changed
         if 'user_id' in review_data:
             user = self.user_repo.get(review_data['user_id'])
             if not user:
                 raise ValueError("User not found")
-            review.user = user
-
-        # Update place if provided
+            data['user'] = user
         if 'place_id' in review_data:
             place = self.place_repo.get(review_data['place_id'])
             if not place:
                 raise ValueError("Place not found")
-            # Remove from old place's reviews
-            if review in review.place.reviews:
-                review.place.reviews.remove(review)
-            review.place = place
-            # Add to new place's reviews
-            place.add_review(review)
+            data['place'] = place
 
-        # Validate and save
-        review.validate()
-        review.save()
+        # Validated on a copy: a rejected update leaves the review unchanged
+        previous_place = review.place
+        review = self.review_repo.update(review_id, data)
 
-        # Update in repository
-        self.review_repo.update(review_id, review_data)
+        # Move it between places' reviews, or replace the previous copy
+        if review.place.id != previous_place.id:
+            previous_place.remove_review(review)
+        review.place.add_review(review)
         return review
 
     def delete_review(self, review_id):
@@ -261,8 +388,7 @@ class HBnBFacade:
         review = self.review_repo.get(review_id)
         if review:
             # Remove from place's reviews list
-            if review in review.place.reviews:
-                review.place.reviews.remove(review)
+            review.place.remove_review(review)
             self.review_repo.delete(review_id)
             return True
         return False
@@ -32,6 +32,12 @@ def main():
     place.update({"price": 300})
     assert place.price == 300.0
 
+    # models are slotted: no per-instance __dict__
+    for obj in (user, place, wifi, review):
+        assert not hasattr(obj, "__dict__")
+    place.update({"unknown": 1})
+    assert not hasattr(place, "unknown")
+
     print("✅ All model tests passed!")
 
 
@@ -0,0 +1,707 @@
+"""
+Unit Tests for the in-memory persistence layer
+Uses pytest for automated testing
+Run with: pytest test_repository.py -v
+"""
+
+import functools
+import gc
+import sys
+import threading
+import weakref
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from hbnb.app.models.amenity import Amenity
+from hbnb.app.models.user import User
+from hbnb.app.persistence.journal import Journal
+from hbnb.app.persistence.partitioned import PartitionedRepository
+from hbnb.app.persistence.repository import InMemoryRepository, SnapshotScope
+from hbnb.app.services.facade import HBnBFacade
+
+
+def make_user(email, first_name='Test'):
+    return User(first_name=first_name, last_name='User', email=email)
+
+
+# Scan and aggregate functions run in the shard workers, so they must be
+# picklable (module-level)
+def is_admin(user):
+    return user.is_admin
+
+
+def fail_on(first_name, user):
+    if user.first_name == first_name:
+        raise RuntimeError(f'cannot scan {first_name}')
+    return False
+
+
+def name_length_stats(users):
+    return len(users), sum(len(user.first_name) for user in users)
+
+
+def sum_stats(partials):
+    return tuple(map(sum, zip(*partials)))
+
+
+# ==================== HASH INDEX TESTS ====================
+
+class TestHashIndexes:
+    """Test suite for unique and non-unique hash indexes"""
+
+    @pytest.fixture
+    def repo(self):
+        return InMemoryRepository(unique_indexes=('email',),
+                                  indexes=('first_name',))
+
+    def test_unique_lookup(self, repo):
+        user = make_user('a@example.com')
+        repo.add(user)
+        assert repo.get_by_attribute('email', 'a@example.com') is user
+        assert repo.get_by_attribute('email', 'missing@example.com') is None
+
+    def test_unique_index_does_not_scan(self, repo, monkeypatch):
+        user = make_user('a@example.com')
+        repo.add(user)
+        state = repo._current.state
+        monkeypatch.setitem(state, 'storage', _NoScanDict(state['storage']))
+        assert repo.get_by_attribute('email', 'a@example.com') is user
+
+    def test_unique_violation(self, repo):
+        repo.add(make_user('a@example.com'))
+        with pytest.raises(ValueError):
+            repo.add(make_user('a@example.com'))
+
+    def test_update_moves_index_entry(self, repo):
+        user = make_user('a@example.com')
+        repo.add(user)
+        updated = repo.update(user.id, {'email': 'b@example.com'})
+        assert repo.get_by_attribute('email', 'a@example.com') is None
+        assert repo.get_by_attribute('email', 'b@example.com') is updated
+        assert user.email == 'a@example.com'
+
+    def test_direct_mutation_then_update(self, repo):
+        """update() reindexes changes made directly on the stored object"""
+        user = make_user('a@example.com')
+        repo.add(user)
+        user.email = 'c@example.com'
+        updated = repo.update(user.id, {})
+        assert repo.get_by_attribute('email', 'a@example.com') is None
+        assert repo.get_by_attribute('email', 'c@example.com') is updated
+
+    def test_update_conflict_keeps_owner(self, repo):
+        first, second = make_user('a@example.com'), make_user('b@example.com')
+        repo.add(first)
+        repo.add(second)
+        with pytest.raises(ValueError):
+            repo.update(second.id, {'email': 'a@example.com'})
+        assert repo.get_by_attribute('email', 'a@example.com') is first
+        # The rejected value is not kept on the object either
+        assert second.email == 'b@example.com'
+        assert repo.get_by_attribute('email', 'b@example.com') is second
+
+    def test_delete_removes_index_entry(self, repo):
+        user = make_user('a@example.com')
+        repo.add(user)
+        repo.delete(user.id)
+        assert repo.get_by_attribute('email', 'a@example.com') is None
+        repo.add(make_user('a@example.com'))
+
+    def test_non_unique_index(self, repo):
+        a = make_user('a@example.com', 'Sam')
+        b = make_user('b@example.com', 'Sam')
+        repo.add(a)
+        repo.add(b)
+        assert set(repo.get_all_by_attribute('first_name', 'Sam')) == {a, b}
+        repo.delete(a.id)
+        assert repo.get_all_by_attribute('first_name', 'Sam') == [b]
+        assert repo.get_by_attribute('first_name', 'Sam') is b
+
+    def test_unindexed_attribute_falls_back_to_scan(self):
+        repo = InMemoryRepository()
+        wifi = Amenity(name='WiFi')
+        repo.add(wifi)
+        assert repo.get_by_attribute('name', 'WiFi') is wifi
+        assert repo.get_all_by_attribute('name', 'Pool') == []
+
+
+class _NoScanDict(dict):
+    """dict that fails the test if its values are iterated"""
+
+    def values(self):
+        raise AssertionError('unexpected full scan')
+
+
+# ==================== RELATIONSHIP INDEX TESTS ====================
+
+class TestRelationshipIndexes:
+    """Test suite for the facade's foreign-key reverse indexes"""
+
+    @pytest.fixture
+    def facade(self):
+        return HBnBFacade()
+
+    @pytest.fixture
+    def data(self, facade):
+        owner = facade.create_user({'first_name': 'Own', 'last_name': 'Er',
+                                    'email': 'owner@example.com'})
+        guest = facade.create_user({'first_name': 'Gu', 'last_name': 'Est',
+                                    'email': 'guest@example.com'})
+        wifi = facade.create_amenity({'name': 'WiFi'})
+        pool = facade.create_amenity({'name': 'Pool'})
+        place = facade.create_place({
+            'title': 'Loft', 'price': 100, 'latitude': 1, 'longitude': 2,
+            'owner_id': owner.id, 'amenities': [wifi.id],
+        })
+        other = facade.create_place({
+            'title': 'Villa', 'price': 300, 'latitude': 1, 'longitude': 2,
+            'owner_id': guest.id, 'amenities': [wifi.id, pool.id],
+        })
+        return dict(owner=owner, guest=guest, wifi=wifi, pool=pool,
+                    place=place, other=other)
+
+    def test_places_by_owner(self, facade, data):
+        assert facade.get_places_by_owner(data['owner'].id) == [data['place']]
+        place = facade.update_place(data['place'].id,
+                                    {'owner_id': data['guest'].id})
+        assert facade.get_places_by_owner(data['owner'].id) == []
+        assert set(facade.get_places_by_owner(data['guest'].id)) == {
+            place, data['other']}
+
+    def test_places_by_amenity(self, facade, data):
+        assert set(facade.get_places_by_amenity(data['wifi'].id)) == {
+            data['place'], data['other']}
+        place = facade.update_place(data['place'].id,
+                                    {'amenities': [data['pool'].id]})
+        assert facade.get_places_by_amenity(data['wifi'].id) == [data['other']]
+        assert [a.id for a in place.amenities] == [data['pool'].id]
+        assert [a.id for a in data['place'].amenities] == [data['wifi'].id]
+
+    def test_reviews_by_place_and_duplicates(self, facade, data):
+        place, guest = data['place'], data['guest']
+        assert not facade.has_reviewed(guest.id, place.id)
+        review = facade.create_review({'text': 'Nice', 'rating': 5,
+                                       'user_id': guest.id,
+                                       'place_id': place.id})
+        assert facade.get_reviews_by_place(place.id) == [review]
+        assert facade.get_reviews_by_user(guest.id) == [review]
+        assert facade.has_reviewed(guest.id, place.id)
+
+        review = facade.update_review(review.id,
+                                      {'place_id': data['other'].id})
+        assert facade.get_reviews_by_place(place.id) == []
+        assert place.reviews == []
+        assert data['other'].reviews == [review]
+
+        facade.delete_review(review.id)
+        assert facade.get_reviews_by_place(data['other'].id) == []
+        assert not facade.has_reviewed(guest.id, data['other'].id)
+
+    def test_links_follow_updated_copies(self, facade, data):
+        review = facade.create_review({'text': 'Nice', 'rating': 5,
+                                       'user_id': data['owner'].id,
+                                       'place_id': data['other'].id})
+        facade.update_user(data['owner'].id, {'first_name': 'Ann'})
+        facade.update_amenity(data['wifi'].id, {'name': 'Fast WiFi'})
+        facade.update_place(data['other'].id, {'title': 'Big villa'})
+        facade.update_review(review.id, {'text': 'Great'})
+
+        place = facade.get_place(data['place'].id)
+        assert place.owner is facade.get_user(data['owner'].id)
+        assert place.owner.first_name == 'Ann'
+        assert [a.name for a in place.amenities] == ['Fast WiFi']
+        other = facade.get_place(data['other'].id)
+        assert [r.text for r in other.reviews] == ['Great']
+        review = facade.get_review(review.id)
+        assert review.place is other
+        assert review.user.first_name == 'Ann'
+
+    def test_rejected_review_update_keeps_review(self, facade, data):
+        review = facade.create_review({'text': 'Nice', 'rating': 5,
+                                       'user_id': data['guest'].id,
+                                       'place_id': data['place'].id})
+        with pytest.raises(ValueError):
+            facade.update_review(review.id, {'text': 'Bad', 'rating': 9})
+        with pytest.raises(ValueError):
+            facade.update_review(review.id, {'rating': 1,
+                                             'place_id': 'missing'})
+        assert facade.get_review(review.id) is review
+        assert (review.text, review.rating) == ('Nice', 5)
+        assert data['place'].reviews == [review]
+
+    def test_has_reviewed_lists_smaller_side(self, facade, data, monkeypatch):
+        owner, guest = data['owner'], data['guest']
+        for i in range(5):
+            place = facade.create_place({
+                'title': f'Flat {i}', 'price': 50, 'latitude': 1,
+                'longitude': 2, 'owner_id': owner.id})
+            facade.create_review({'text': 'Ok', 'rating': 3,
+                                  'user_id': guest.id, 'place_id': place.id})
+        assert facade.review_repo.count_by_attribute('user.id', guest.id) == 5
+
+        def listed_by_user(user_id):
+            raise AssertionError('listed the larger side')
+
+        # data['place'] has no review: only its (empty) bucket is listed
+        monkeypatch.setattr(facade, 'get_reviews_by_user', listed_by_user)
+        assert not facade.has_reviewed(guest.id, data['place'].id)
+
+
+# ==================== RANGE INDEX TESTS ====================
+
+class TestRangeIndexes:
+    """Test suite for bisect-maintained range indexes"""
+
+    @pytest.fixture
+    def facade(self):
+        facade = HBnBFacade()
+        owner = facade.create_user({'first_name': 'Own', 'last_name': 'Er',
+                                    'email': 'owner@example.com'})
+        for title, price, lat, lon in [
+            ('Cheap', 40, 10.0, 20.0),
+            ('Mid', 100, 12.0, 22.0),
+            ('Same price', 100, -30.0, 175.0),
+            ('Pricey', 250, 50.0, -175.0),
+        ]:
+            facade.create_place({'title': title, 'price': price,
+                                 'latitude': lat, 'longitude': lon,
+                                 'owner_id': owner.id})
+        return facade
+
+    def titles(self, places):
+        return sorted(place.title for place in places)
+
+    def test_price_range(self, facade):
+        assert self.titles(facade.filter_places(min_price=50, max_price=100)) \
+            == ['Mid', 'Same price']
+        assert self.titles(facade.filter_places(min_price=101)) == ['Pricey']
+        assert self.titles(facade.filter_places(max_price=40)) == ['Cheap']
+
+    def test_bounding_box(self, facade):
+        box = facade.filter_places(min_latitude=0, max_latitude=20,
+                                   min_longitude=15, max_longitude=25)
+        assert self.titles(box) == ['Cheap', 'Mid']
+        combined = facade.filter_places(max_price=50, min_latitude=0,
+                                        max_latitude=20)
+        assert self.titles(combined) == ['Cheap']
+
+    def test_antimeridian_box(self, facade):
+        box = facade.filter_places(min_longitude=170, max_longitude=-170)
+        # Eastward across the antimeridian: 175 then -175
+        assert [place.title for place in box] == ['Same price', 'Pricey']
+        # Same result type on every path
+        assert isinstance(box, list)
+        assert isinstance(facade.filter_places(min_longitude=170), list)
+        assert isinstance(facade.filter_places(), list)
+
+    def test_rejected_place_update_keeps_place(self, facade):
+        place = facade.filter_places(max_price=40)[0]
+        with pytest.raises(ValueError):
+            facade.update_place(place.id, {'price': -5, 'latitude': 200})
+        with pytest.raises(ValueError):
+            facade.update_place(place.id, {'price': 60,
+                                           'owner_id': 'missing'})
+        assert facade.get_place(place.id) is place
+        assert (place.price, place.latitude) == (40.0, 10.0)
+        assert facade.filter_places(max_price=40) == [place]
+        assert facade.filter_places(min_price=50, max_price=60) == []
+
+    def test_update_and_delete_refresh_index(self):
+        repo = InMemoryRepository(range_indexes=('price',))
+        facade = HBnBFacade()
+        owner = facade.create_user({'first_name': 'A', 'last_name': 'B',
+                                    'email': 'a@example.com'})
+        place = facade.create_place({'title': 'Loft', 'price': 100,
+                                     'latitude': 0, 'longitude': 0,
+                                     'owner_id': owner.id})
+        repo.add(place)
+        place.price = 300.0
+        updated = repo.update(place.id, {})
+        assert repo.get_by_range('price', 0, 200) == []
+        assert repo.get_by_range('price', 250, None) == [updated]
+        repo.delete(place.id)
+        assert repo.get_by_range('price') == []
+
+    def test_results_ordered_by_value(self, facade):
+        prices = [p.price for p in facade.place_repo.get_by_range('price')]
+        assert prices == sorted(prices)
+
+    def test_unindexed_range_falls_back_to_scan(self):
+        repo = InMemoryRepository()
+        repo.add(make_user('a@example.com', 'Ann'))
+        repo.add(make_user('b@example.com', 'Zed'))
+        assert [u.first_name for u in repo.get_by_range('first_name', 'B')] \
+            == ['Zed']
+
+
+# ==================== SNAPSHOT TESTS ====================
+
+class TestSnapshots:
+    """Test suite for copy-on-write versions and snapshot scopes"""
+
+    @pytest.fixture
+    def repo(self):
+        return InMemoryRepository(unique_indexes=('email',),
+                                  indexes=('first_name',))
+
+    def test_scope_pins_version(self, repo):
+        first = make_user('a@example.com')
+        repo.add(first)
+        with SnapshotScope():
+            assert repo.get_all() == (first,)
+            writer = threading.Thread(
+                target=repo.add, args=(make_user('b@example.com'),))
+            writer.start()
+            writer.join()
+            assert repo.get_all() == (first,)
+            assert repo.get_by_attribute('email', 'b@example.com') is None
+        assert len(repo.get_all()) == 2
+
+    def test_scope_reads_own_writes(self, repo):
+        with SnapshotScope():
+            assert repo.get_all() == ()
+            user = make_user('a@example.com')
+            repo.add(user)
+            assert repo.get_all() == (user,)
+            repo.delete(user.id)
+            assert repo.get(user.id) is None
+
+    def test_get_all_shared_per_version(self, repo):
+        repo.add(make_user('a@example.com'))
+        assert repo.get_all() is repo.get_all()
+
+    def test_batch_publishes_once(self, repo):
+        before = repo.get_all()
+        with repo.batch():
+            repo.add(make_user('a@example.com'))
+            repo.add(make_user('b@example.com'))
+            assert len(repo.get_all()) == 2
+            seen = []
+            reader = threading.Thread(
+                target=lambda: seen.append(len(repo.get_all())))
+            reader.start()
+            reader.join()
+            assert seen == [0]
+        assert before == ()
+        assert len(repo.get_all()) == 2
+
+    def test_get_all_inside_batch_not_cached(self, repo):
+        first, second = make_user('a@example.com'), make_user('b@example.com')
+        with repo.batch():
+            repo.add(first)
+            assert repo.get_all() == (first,)
+            repo.add(second)
+            assert repo.get_all() == (first, second)
+        assert repo.get_all() == (first, second)
+
+    def test_old_version_reclaimed(self, repo):
+        repo.add(make_user('a@example.com'))
+        with SnapshotScope():
+            repo.get_all()
+            old = weakref.ref(repo._current)
+            repo.add(make_user('b@example.com'))
+        gc.collect()
+        assert old() is None
+
+    def test_writes_do_not_touch_published_indexes(self, repo):
+        user = make_user('a@example.com', 'Ann')
+        repo.add(user)
+        published = repo._current.state
+        updated = repo.update(user.id, {'first_name': 'Bob',
+                                        'email': 'b@example.com'})
+        assert list(published['unique']['email']) == ['a@example.com']
+        assert list(published['indexes']['first_name']) == ['Ann']
+        assert published['storage'][user.id] is user
+        assert repo.get_by_attribute('first_name', 'Bob') is updated
+
+    def test_scope_isolates_updated_attributes(self, repo):
+        user = make_user('a@example.com')
+        repo.add(user)
+        with SnapshotScope():
+            assert repo.get(user.id) is user
+            writer = threading.Thread(target=repo.update, args=(
+                user.id, {'email': 'b@example.com'}))
+            writer.start()
+            writer.join()
+            assert repo.get(user.id).email == 'a@example.com'
+            assert repo.get_by_attribute(
+                'email', 'a@example.com').email == 'a@example.com'
+        assert repo.get(user.id).email == 'b@example.com'
+
+    def test_concurrent_writers_and_readers(self, repo):
+        errors = []
+
+        def write(prefix):
+            for i in range(200):
+                user = make_user(f'{prefix}{i}@example.com', prefix)
+                repo.add(user)
+                if i % 3 == 0:
+                    repo.delete(user.id)
+
+        def read():
+            try:
+                for _ in range(200):
+                    with SnapshotScope():
+                        users = repo.get_all()
+                        indexed = [
+                            user
+                            for name in 'wx'
+                            for user in repo.get_all_by_attribute(
+                                'first_name', name)
+                        ]
+                        assert sorted(u.id for u in indexed) == \
+                            sorted(u.id for u in users)
+            except AssertionError as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=write, args=(p,)) for p in 'wx']
+        threads += [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        assert len(repo.get_all()) == 2 * 133
+
+
+# ==================== JOURNAL TESTS ====================
+
+class TestJournal:
+    """Test suite for the append-only journal and snapshot restore"""
+
+    @staticmethod
+    def seed(facade):
+        owner = facade.create_user({'first_name': 'Ann', 'last_name': 'Lee',
+                                    'email': 'ann@example.com'})
+        wifi = facade.create_amenity({'name': 'WiFi'})
+        place = facade.create_place({'title': 'Loft', 'price': 80,
+                                     'latitude': 10, 'longitude': 20,
+                                     'owner_id': owner.id,
+                                     'amenities': [wifi.id]})
+        guest = facade.create_user({'first_name': 'Bob', 'last_name': 'Ray',
+                                    'email': 'bob@example.com'})
+        review = facade.create_review({'text': 'Nice', 'rating': 5,
+                                       'user_id': guest.id,
+                                       'place_id': place.id})
+        return owner, wifi, place, guest, review
+
+    @staticmethod
+    def reopen(path, **kwargs):
+        facade = HBnBFacade()
+        facade.open_journal(path, **kwargs)
+        return facade
+
+    def test_restore_from_log(self, tmp_path):
+        facade = HBnBFacade()
+        facade.open_journal(tmp_path)
+        owner, wifi, place, guest, review = self.seed(facade)
+        facade.update_user(owner.id, {'email': 'ann@new.example.com'})
+        facade.journal.close()
+
+        restored = self.reopen(tmp_path)
+        user = restored.get_user_by_email('ann@new.example.com')
+        assert user.id == owner.id
+        assert user.created_at == owner.created_at
+        assert restored.get_user_by_email('ann@example.com') is None
+        loft = restored.get_place(place.id)
+        assert loft.owner is user
+        assert loft.amenity_ids == [wifi.id]
+        assert loft.created_at == place.created_at
+        assert [r.id for r in loft.reviews] == [review.id]
+        assert restored.get_reviews_by_user(guest.id)[0].place is loft
+        assert restored.get_places_by_owner(owner.id) == [loft]
+
+    def test_rejected_update_not_logged(self, tmp_path):
+        facade = HBnBFacade()
+        facade.open_journal(tmp_path)
+        owner, _, _, guest, _ = self.seed(facade)
+        with pytest.raises(ValueError):
+            facade.update_user(guest.id, {'first_name': 'Robert',
+                                          'email': 'ann@example.com'})
+        assert guest.email == 'bob@example.com'
+        assert guest.first_name == 'Bob'
+        facade.journal.close()
+
+        restored = self.reopen(tmp_path)
+        assert restored.get_user_by_email('ann@example.com').id == owner.id
+        user = restored.get_user(guest.id)
+        assert (user.first_name, user.email) == ('Bob', 'bob@example.com')
+
+    def test_delete_is_replayed(self, tmp_path):
+        facade = HBnBFacade()
+        facade.open_journal(tmp_path)
+        *_, place, _, review = self.seed(facade)
+        facade.delete_review(review.id)
+        facade.journal.close()
+
+        restored = self.reopen(tmp_path)
+        assert restored.get_review(review.id) is None
+        assert restored.get_place(place.id).reviews == []
+
+    def test_compaction_writes_snapshot(self, tmp_path):
+        facade = HBnBFacade()
+        facade.open_journal(tmp_path, compact_every=3)
+        owner, *_ = self.seed(facade)
+        facade.journal.close()
+        journal = facade.journal
+        assert journal.snapshot_path.exists()
+        assert not journal.rotated_path.exists()
+        assert len(journal.log_path.read_text().splitlines()) < 3
+
+        restored = self.reopen(tmp_path)
+        assert len(restored.get_all_users()) == 2
+        assert restored.get_user(owner.id).email == 'ann@example.com'
+
+    def test_startup_compacts_log(self, tmp_path):
+        facade = HBnBFacade()
+        facade.open_journal(tmp_path)
+        self.seed(facade)
+        facade.journal.close()
+
+        restored = self.reopen(tmp_path)
+        assert restored.journal.snapshot_path.exists()
+        assert not restored.journal.log_path.exists()
+        assert len(self.reopen(tmp_path).get_all_reviews()) == 1
+
+    def test_torn_line_skipped(self, tmp_path):
+        facade = HBnBFacade()
+        facade.open_journal(tmp_path)
+        owner, *_ = self.seed(facade)
+        facade.journal.close()
+        with open(facade.journal.log_path, 'a') as log:
+            log.write('["users", "update", {"id": ')
+
+        restored = self.reopen(tmp_path)
+        assert restored.get_user(owner.id).email == 'ann@example.com'
+
+    def test_interrupted_compaction_replays_rotated_log(self, tmp_path):
+        facade = HBnBFacade()
+        facade.open_journal(tmp_path)
+        owner, *_ = self.seed(facade)
+        journal = facade.journal
+        journal.compact()
+        # Crash after rotating but before the new snapshot replaced the
+        # old one: the rotated log still holds the writes
+        facade.update_user(owner.id, {'first_name': 'Anna'})
+        journal.close()
+        journal.log_path.rename(journal.rotated_path)
+        facade.update_user(owner.id, {'last_name': 'Lane'})
+        journal.close()
+
+        restored = self.reopen(tmp_path)
+        user = restored.get_user(owner.id)
+        assert (user.first_name, user.last_name) == ('Anna', 'Lane')
+
+    def test_snapshot_is_columnar(self, tmp_path):
+        journal = Journal(tmp_path)
+        repo = InMemoryRepository()
+        journal.attach('users', repo, ('id', 'email', 'created_at'))
+        journal.start()
+        for i in range(3):
+            repo.add(make_user(f'u{i}@example.com'))
+        journal.compact()
+
+        reader = Journal(tmp_path)
+        reader.attach('users', InMemoryRepository(),
+                      ('id', 'email', 'created_at'))
+        records = reader.load()['users']
+        assert sorted(r['email'] for r in records.values()) == \
+            ['u0@example.com', 'u1@example.com', 'u2@example.com']
+        for user in repo.get_all():
+            assert records[user.id]['created_at'] == user.created_at
+
+
+# ==================== PARTITIONED REPOSITORY TESTS ====================
+
+class TestPartitionedRepository:
+    """Test suite for the process-sharded repository"""
+
+    @pytest.fixture
+    def repo(self):
+        with PartitionedRepository(shards=3, unique_indexes=('email',),
+                                   indexes=('first_name',),
+                                   range_indexes=('first_name',)) as repo:
+            yield repo
+
+    @pytest.fixture
+    def users(self, repo):
+        users = [make_user(f'user{i}@example.com', f'Name{i:02d}')
+                 for i in range(30)]
+        for user in users[::3]:
+            user.is_admin = True
+        for user in users:
+            repo.add(user)
+        return users
+
+    def test_objects_spread_over_shards(self, repo, users):
+        per_shard = [shard.call('count', None) for shard in repo._shards]
+        assert sum(per_shard) == 30
+        assert all(per_shard)
+
+    def test_point_lookup_routed_to_owner(self, repo, users):
+        user = repo.get(users[7].id)
+        assert (user.id, user.email) == (users[7].id, users[7].email)
+        assert repo.get('missing') is None
+        assert repo.get_by_attribute('email', users[3].email).id == \
+            users[3].id
+
+    def test_scan_count_and_aggregate(self, repo, users):
+        admins = repo.scan(is_admin)
+        assert sorted(u.id for u in admins) == \
+            sorted(u.id for u in users if u.is_admin)
+        assert repo.count(is_admin) == 10
+        assert repo.count() == 30
+        assert repo.aggregate(name_length_stats, sum_stats) == (30, 180)
+
+    def test_range_results_merged_in_order(self, repo, users):
+        names = [u.first_name for u in repo.get_by_range(
+            'first_name', 'Name05', 'Name24')]
+        assert names == [f'Name{i:02d}' for i in range(5, 25)]
+        assert len(repo.get_all()) == 30
+
+    def test_update_and_delete(self, repo, users):
+        repo.update(users[0].id, {'first_name': 'Zed'})
+        assert repo.get(users[0].id).first_name == 'Zed'
+        assert [u.id for u in repo.get_all_by_attribute('first_name', 'Zed')] \
+            == [users[0].id]
+        repo.delete(users[0].id)
+        assert repo.get(users[0].id) is None
+        assert repo.count() == 29
+
+    def test_unique_across_shards(self, repo, users):
+        with pytest.raises(ValueError):
+            repo.add(make_user(users[5].email))
+        with pytest.raises(ValueError):
+            repo.update(users[1].id, {'email': users[2].email})
+        repo.delete(users[5].id)
+        repo.add(make_user(users[5].email))
+
+    def test_add_many(self, repo, users):
+        batch = [make_user(f'bulk{i}@example.com') for i in range(10)]
+        repo.add_many(batch)
+        assert repo.count() == 40
+        assert repo.get(batch[4].id).email == 'bulk4@example.com'
+        with pytest.raises(ValueError):
+            repo.add_many([make_user('dup@example.com'),
+                           make_user('dup@example.com')])
+        assert repo.count() == 40
+
+    def test_worker_errors_raised(self, repo, users):
+        with pytest.raises(ValueError, match='first_name is required'):
+            repo.update(users[4].id, {'first_name': ''})
+        assert repo.count() == 30
+
+    def test_error_on_first_shard_leaves_pipes_clean(self, repo, users):
+        # Every shard still answers: later calls must not read the stale
+        # replies of the shards after the failing one
+        user = next(u for u in users if repo._shard_index(u.id) == 0)
+        with pytest.raises(RuntimeError, match='cannot scan'):
+            repo.scan(functools.partial(fail_on, user.first_name))
+        assert repo.count() == 30
+        assert len(repo.scan(is_admin)) == 10
+        assert repo.get(user.id).email == user.email
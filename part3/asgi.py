@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point for the HBnB application.
+
+Serves the same /api/v1 routes as run.py from an asyncio event loop (see
+hbnb/app/asgi.py), e.g.:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5001
+"""
+import os
+from config import config
+from hbnb.app import create_app
+from hbnb.app.asgi import create_asgi_app
+
+# Get configuration from environment variable (development/production)
+config_name = os.getenv('FLASK_ENV', 'development')
+if config_name not in config:
+    raise SystemExit(f"Unknown FLASK_ENV '{config_name}', expected one of: "
+                     + ', '.join(sorted(config)))
+
+flask_app = create_app(config[config_name])
+app = create_asgi_app(flask_app)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=5001)
@@ -1,5 +1,21 @@
 import os
 
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+# SQLite connection profile for concurrent readers and a single writer:
+# WAL lets readers run alongside the writer, synchronous=NORMAL fsyncs at
+# checkpoints instead of on every commit (still corruption-safe under WAL),
+# and busy_timeout waits for the write lock instead of failing with
+# "database is locked".
+SQLITE_PERFORMANCE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 268435456,     # 256 MiB memory-mapped I/O
+    'cache_size': -65536,       # 64 MiB page cache (negative = KiB)
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,       # milliseconds
+}
+
 class Config:
     """Base configuration class"""
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
@@ -9,15 +25,46 @@ class Config:
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt_secret_key')
     JWT_ACCESS_TOKEN_EXPIRES = 3600  # 1 hour in seconds
 
+    # Commit once per write request instead of once per repository call
+    UNIT_OF_WORK_PER_REQUEST = True
+    # Reuse rows already loaded during the request, keyed by (model, id)
+    IDENTITY_CACHE = True
+    # Threads hashing/checking passwords in the ASGI app (None = default
+    # ThreadPoolExecutor size)
+    BCRYPT_WORKERS = None
+    # Items accepted by one request to the /batch endpoints
+    BATCH_MAX_ITEMS = 1000
+    # Add model columns missing from existing tables when the app starts
+    # (see hbnb/app/persistence/schema.py)
+    AUTO_UPGRADE_SCHEMA = True
+    # Keep the in-memory k-nearest-neighbour index of the places used by
+    # GET /places/nearest (see hbnb/app/persistence/place_index.py)
+    PLACE_INDEX = True
+
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # PRAGMAs applied to every new SQLite connection (empty = SQLite defaults)
+    SQLITE_PRAGMAS = {}
+    # Optional read replica: read-only repository queries go here, writes
+    # and reads inside a transaction stay on SQLALCHEMY_DATABASE_URI.
+    # Locally the primary file can be reopened read-only, e.g.
+    # 'sqlite:///file:/path/development.db?mode=ro&uri=true'
+    SQLALCHEMY_REPLICA_URI = os.getenv('SQLALCHEMY_REPLICA_URI')
+
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
     # Use absolute path for database
-    basedir = os.path.abspath(os.path.dirname(__file__))
     SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(basedir, 'development.db')
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLITE_PRAGMAS = SQLITE_PERFORMANCE_PRAGMAS
+
+class ProductionConfig(Config):
+    """Production configuration"""
+    SQLALCHEMY_DATABASE_URI = os.getenv(
+        'DATABASE_URL', 'sqlite:///' + os.path.join(basedir, 'production.db'))
+    SQLITE_PRAGMAS = SQLITE_PERFORMANCE_PRAGMAS
 
 config = {
     'development': DevelopmentConfig,
+    'production': ProductionConfig,
     'default': DevelopmentConfig
 }
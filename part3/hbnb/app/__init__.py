@@ -1,11 +1,23 @@
-from flask import Flask
+from flask import Flask, g, request
 from flask_restx import Api
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 from hbnb.app.extensions import bcrypt, jwt
+from hbnb.app.persistence.replica import (
+    REPLICA_BIND, init_read_replica, register_replica_bind)
+from hbnb.app.persistence.sqlite import apply_sqlite_pragmas
 
 db = SQLAlchemy()
 
+# CORS policy of the /api/* routes (also applied by the ASGI app)
+API_CORS_OPTIONS = {
+    "origins": ["http://localhost:8000", "http://127.0.0.1:8000"],
+    "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    "allow_headers": ["Content-Type", "Authorization"],
+    "expose_headers": ["X-Next-Cursor", "Link", "X-Identity-Cache-Saved"],
+    "supports_credentials": True
+}
+
 
 def create_app(config_class="config.DevelopmentConfig"):
     """
@@ -21,19 +33,39 @@ def create_app(config_class="config.DevelopmentConfig"):
     app.config.from_object(config_class)
     
     # Enable CORS for all routes (allow frontend on port 8000 to access API)
-    CORS(app, resources={
-        r"/api/*": {
-            "origins": ["http://localhost:8000", "http://127.0.0.1:8000"],
-            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"],
-            "supports_credentials": True
-        }
-    })
+    CORS(app, resources={r"/api/*": API_CORS_OPTIONS})
     
     # Initialize extensions
+    register_replica_bind(app)
     db.init_app(app)
+    with app.app_context():
+        pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+        apply_sqlite_pragmas(db.engine, pragmas)
+        if REPLICA_BIND in db.engines:
+            # The replica may be opened read-only: skip the journal switch
+            apply_sqlite_pragmas(db.engines[REPLICA_BIND], {
+                k: v for k, v in pragmas.items() if k != 'journal_mode'})
+        init_read_replica(app, db)
+        if app.config.get('AUTO_UPGRADE_SCHEMA', True):
+            import hbnb.app.models  # noqa: F401  (register the tables)
+            from hbnb.app.persistence.schema import upgrade_schema
+            upgrade_schema(db)
+        if app.config.get('PLACE_INDEX', True):
+            from hbnb.app.persistence.place_index import init_place_index
+            init_place_index(app, db)
+        from hbnb.app.persistence.prefix_index import init_prefix_index
+        init_prefix_index(app, db)
     bcrypt.init_app(app)
     jwt.init_app(app)
+
+    if app.config.get('UNIT_OF_WORK_PER_REQUEST', True):
+        register_unit_of_work(app)
+
+    from hbnb.app.services.identity_cache import register_identity_cache
+    register_identity_cache(app)
+
+    from hbnb.app.commands import register_commands
+    register_commands(app)
     
     api = Api(
         app,
@@ -48,10 +80,42 @@ def create_app(config_class="config.DevelopmentConfig"):
     from hbnb.app.api.v1.amenities import api as amenities_ns
     from hbnb.app.api.v1.places import api as places_ns
     from hbnb.app.api.v1.reviews import api as reviews_ns
+    from hbnb.app.api.v1.autocomplete import api as autocomplete_ns
 
     api.add_namespace(users_ns, path='/api/v1/users')
     api.add_namespace(amenities_ns, path='/api/v1/amenities')
     api.add_namespace(places_ns, path='/api/v1/places')
     api.add_namespace(reviews_ns, path='/api/v1/reviews')
+    api.add_namespace(autocomplete_ns, path='/api/v1/autocomplete')
 
     return app
+
+
+def register_unit_of_work(app):
+    """
+    Wrap every write request in a single UnitOfWork.
+
+    Repository writes made while handling the request are only flushed; one
+    COMMIT is issued after the response is built, or the transaction is
+    rolled back when the request fails (status >= 400 or an exception).
+    """
+    from hbnb.app.persistence.repository import UnitOfWork
+
+    @app.before_request
+    def begin_unit_of_work():
+        if request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return
+        g.unit_of_work = UnitOfWork().__enter__()
+
+    @app.after_request
+    def commit_unit_of_work(response):
+        uow = g.pop('unit_of_work', None)
+        if uow is not None:
+            uow.close(commit=response.status_code < 400)
+        return response
+
+    @app.teardown_request
+    def discard_unit_of_work(exc):
+        uow = g.pop('unit_of_work', None)
+        if uow is not None:
+            uow.close(commit=False)
@@ -1,6 +1,8 @@
 """Amenity API endpoints for HBnB application"""
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt
+from hbnb.app.api.v1.fieldsets import Fieldset, fields_parser
+from hbnb.app.api.v1.pagination import pagination_parser, page_headers
 from hbnb.app.services.facade import HBnBFacade
 
 api = Namespace('amenities', description='Amenity operations')
@@ -13,6 +15,19 @@ def is_admin():
     claims = get_jwt()
     return claims.get('is_admin', False)
 
+
+# Fields of the amenity responses (see ?fields=)
+amenity_fields = Fieldset()
+amenity_fields.add('id')
+amenity_fields.add('name')
+amenity_fields.add('created_at', lambda amenity: amenity.created_at.isoformat())
+amenity_fields.add('updated_at', lambda amenity: amenity.updated_at.isoformat())
+
+
+def amenity_to_dict(amenity, fields=None):
+    """Amenity as returned by the amenity endpoints (fields: ?fields=)"""
+    return amenity_fields.to_dict(amenity, fields)
+
 # Define the amenity model for input validation
 amenity_model = api.model('Amenity', {
     'name': fields.String(required=True, description='Amenity name', min_length=1, max_length=50)
@@ -32,19 +47,23 @@ class AmenityList(Resource):
     """Handles operations on the amenity collection"""
 
     @api.doc('list_amenities')
+    @api.expect(pagination_parser, fields_parser)
     @api.response(200, 'List of amenities retrieved successfully')
+    @api.response(400, 'Invalid pagination parameters or unknown field')
     def get(self):
-        """Get list of all amenities"""
-        amenities = facade.get_all_amenities()
+        """Get one page of amenities (see X-Next-Cursor for the next one)"""
+        args = pagination_parser.parse_args()
+        fields = amenity_fields.from_request()
+        try:
+            amenities, next_cursor = facade.get_amenities_page(
+                args['limit'], args['cursor'],
+                fields=amenity_fields.attributes(fields))
+        except ValueError as e:
+            api.abort(400, str(e))
         return [
-            {
-                'id': amenity.id,
-                'name': amenity.name,
-                'created_at': amenity.created_at.isoformat(),
-                'updated_at': amenity.updated_at.isoformat()
-            }
+            amenity_to_dict(amenity, fields)
             for amenity in amenities
-        ], 200
+        ], 200, page_headers(next_cursor)
 
     @api.doc('create_amenity')
     @api.expect(amenity_model, validate=True)
@@ -68,12 +87,7 @@ class AmenityList(Resource):
 
         try:
             new_amenity = facade.create_amenity(amenity_data)
-            return {
-                'id': new_amenity.id,
-                'name': new_amenity.name,
-                'created_at': new_amenity.created_at.isoformat(),
-                'updated_at': new_amenity.updated_at.isoformat()
-            }, 201
+            return amenity_to_dict(new_amenity), 201
         except ValueError as e:
             api.abort(400, str(e))
 
@@ -84,20 +98,19 @@ class AmenityResource(Resource):
     """Handles operations on a single amenity"""
 
     @api.doc('get_amenity')
+    @api.expect(fields_parser)
     @api.response(200, 'Amenity details retrieved successfully')
+    @api.response(400, 'Unknown field')
     @api.response(404, 'Amenity not found')
     def get(self, amenity_id):
         """Get amenity details by ID"""
-        amenity = facade.get_amenity(amenity_id)
+        fields = amenity_fields.from_request()
+        amenity = facade.get_amenity(
+            amenity_id, fields=amenity_fields.attributes(fields))
         if not amenity:
             api.abort(404, 'Amenity not found')
 
-        return {
-            'id': amenity.id,
-            'name': amenity.name,
-            'created_at': amenity.created_at.isoformat(),
-            'updated_at': amenity.updated_at.isoformat()
-        }, 200
+        return amenity_to_dict(amenity, fields), 200
 
     @api.doc('update_amenity')
     @api.expect(amenity_model, validate=True)
@@ -129,11 +142,6 @@ class AmenityResource(Resource):
 
         try:
             updated_amenity = facade.update_amenity(amenity_id, amenity_data)
-            return {
-                'id': updated_amenity.id,
-                'name': updated_amenity.name,
-                'created_at': updated_amenity.created_at.isoformat(),
-                'updated_at': updated_amenity.updated_at.isoformat()
-            }, 200
+            return amenity_to_dict(updated_amenity), 200
         except ValueError as e:
             api.abort(400, str(e))
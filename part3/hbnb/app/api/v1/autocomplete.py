@@ -0,0 +1,46 @@
+"""Autocomplete API endpoint for HBnB application"""
+from flask_restx import Namespace, Resource, fields, reqparse
+from hbnb.app.persistence.prefix_index import PrefixIndex
+from hbnb.app.services.facade import HBnBFacade
+
+api = Namespace('autocomplete', description='Typeahead suggestions')
+
+facade = HBnBFacade()
+
+# Query parameters of GET /autocomplete
+autocomplete_parser = reqparse.RequestParser()
+autocomplete_parser.add_argument(
+    'prefix', type=str, required=True, location='args',
+    help='Start of a word of the place titles or amenity names')
+autocomplete_parser.add_argument(
+    'limit', type=int, location='args',
+    help='Number of suggestions (default {}, at most {})'.format(
+        PrefixIndex.DEFAULT_LIMIT, PrefixIndex.MAX_LIMIT))
+
+# Define the suggestion response model
+suggestion_model = api.model('Suggestion', {
+    'type': fields.String(description="Kind of match: 'place' or 'amenity'"),
+    'id': fields.String(description='ID of the place or amenity'),
+    'text': fields.String(description='Place title or amenity name'),
+})
+
+
+@api.route('')
+class Autocomplete(Resource):
+    """Handles typeahead lookups"""
+
+    @api.doc('autocomplete')
+    @api.expect(autocomplete_parser)
+    @api.marshal_list_with(suggestion_model)
+    @api.response(400, 'Missing or empty prefix, or invalid limit')
+    def get(self):
+        """Get the places and amenities with a word starting with prefix"""
+        args = autocomplete_parser.parse_args()
+        try:
+            matches = facade.autocomplete(args['prefix'], args['limit'])
+        except ValueError as e:
+            api.abort(400, str(e))
+        return [
+            {'type': kind, 'id': obj_id, 'text': label}
+            for kind, obj_id, label in matches
+        ], 200
@@ -0,0 +1,57 @@
+"""Per-item results of the batch create endpoints"""
+from flask import current_app
+from werkzeug.exceptions import HTTPException
+
+
+class BatchResults:
+    """
+    Outcome of each item of a batch request, in payload order.
+
+    The payload must be a JSON array of at most BATCH_MAX_ITEMS items; each
+    item is validated against the namespace model on its own, so one bad
+    item does not reject the others. Items still pending after the checks
+    are written together, and response() reports every item as
+    {"index": i, "status": 201, <key>: {...}} or
+    {"index": i, "status": 4xx, "message": "..."}.
+    """
+
+    def __init__(self, api, model):
+        items = api.payload
+        if not isinstance(items, list):
+            api.abort(400, 'Expected a JSON array of items')
+        max_items = current_app.config.get('BATCH_MAX_ITEMS', 1000)
+        if len(items) > max_items:
+            api.abort(400, f'A batch accepts at most {max_items} items')
+
+        self.items = items
+        self.results = [None] * len(items)
+        for index, item in self.pending():
+            try:
+                model.validate(item)
+            except HTTPException as e:
+                self.fail(index, 400, e.data['message'], e.data.get('errors'))
+
+    def pending(self):
+        """(index, item) of the items with no result yet"""
+        for index, item in enumerate(self.items):
+            if self.results[index] is None:
+                yield index, item
+
+    def fail(self, index, status, message, errors=None):
+        result = {'index': index, 'status': status, 'message': message}
+        if errors:
+            result['errors'] = errors
+        self.results[index] = result
+
+    def succeed(self, index, key, data):
+        self.results[index] = {'index': index, 'status': 201, key: data}
+
+    def response(self):
+        """Body and status: 201 if every item was created, 207 otherwise"""
+        created = sum(result['status'] == 201 for result in self.results)
+        failed = len(self.results) - created
+        return {
+            'created': created,
+            'failed': failed,
+            'results': self.results,
+        }, 201 if not failed else 207
@@ -0,0 +1,84 @@
+"""Sparse fieldsets (?fields=) shared by the read endpoints"""
+from operator import attrgetter
+
+from flask_restx import abort, reqparse
+
+# Query parameter accepted by every collection and detail endpoint
+fields_parser = reqparse.RequestParser()
+fields_parser.add_argument(
+    'fields', type=str, location='args',
+    help='Comma-separated response fields to return, e.g. id,title,price '
+         '(default: all)')
+
+
+class Fieldset:
+    """
+    The response fields of one resource, in response order.
+
+    Each field has a getter building its value from the model object and
+    the model attributes (columns and relationships) the getter reads.
+    attributes() turns the fields asked for with ?fields= into the
+    attributes the repositories load (see SQLAlchemyRepository.projection()),
+    so columns nobody asked for are not selected and relationships nobody
+    asked for are not loaded.
+    """
+
+    def __init__(self):
+        self.fields = {}
+
+    @classmethod
+    def from_model(cls, model):
+        """Fieldset whose fields are those of a flask-restx model"""
+        fieldset = cls()
+        for name, field in model.items():
+            fieldset.add(name, lambda obj, name=name, field=field:
+                         field.output(name, obj))
+        return fieldset
+
+    def add(self, name, getter=None, attributes=None):
+        """
+        Args:
+            name: Response field name
+            getter: Callable(obj) returning the value (default: the
+                attribute called name)
+            attributes: Model attributes getter reads (default: (name,))
+        """
+        self.fields[name] = (getter or attrgetter(name),
+                             tuple(attributes or (name,)))
+
+    def parse(self, value):
+        """
+        Names listed in a ?fields= value, in response order.
+
+        Returns None (every field) when value is None. Raises ValueError
+        for an empty list or an unknown name.
+        """
+        if value is None:
+            return None
+        names = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = sorted(names - self.fields.keys())
+        if unknown or not names:
+            problem = (f"Unknown field '{unknown[0]}'" if unknown else
+                       'fields must list at least one field')
+            raise ValueError(
+                f"{problem}; available fields: {', '.join(self.fields)}")
+        return [name for name in self.fields if name in names]
+
+    def from_request(self):
+        """Parse the current request's ?fields=, aborting with 400 if invalid"""
+        try:
+            return self.parse(fields_parser.parse_args()['fields'])
+        except ValueError as e:
+            abort(400, str(e))
+
+    def attributes(self, names):
+        """Model attributes read by the named fields (None: all fields)"""
+        if names is None:
+            return None
+        return {attr for name in names for attr in self.fields[name][1]}
+
+    def to_dict(self, obj, names=None):
+        """The named fields of obj (default: all of them)"""
+        if names is None:
+            names = self.fields
+        return {name: self.fields[name][0](obj) for name in names}
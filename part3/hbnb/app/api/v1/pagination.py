@@ -0,0 +1,33 @@
+"""Keyset pagination helpers shared by the collection endpoints"""
+from urllib.parse import urlencode
+
+from flask import request
+from flask_restx import reqparse
+
+# Query parameters accepted by every paginated collection endpoint
+pagination_parser = reqparse.RequestParser()
+pagination_parser.add_argument(
+    'limit', type=int, location='args',
+    help='Maximum number of items to return (capped server-side)')
+pagination_parser.add_argument(
+    'cursor', type=str, location='args',
+    help='Opaque cursor taken from the X-Next-Cursor header of the previous page')
+
+
+def page_headers(next_cursor, base_url=None, args=None):
+    """
+    Build the response headers advertising the next page.
+
+    The body stays a plain JSON list; the cursor of the next page is sent in
+    X-Next-Cursor and as a Link rel="next" URL. No headers on the last page.
+    base_url and args (query parameters) default to the current request's.
+    """
+    if not next_cursor:
+        return {}
+    args = dict(request.args.to_dict() if args is None else args)
+    args['cursor'] = next_cursor
+    next_url = f'{base_url or request.base_url}?{urlencode(args)}'
+    return {
+        'X-Next-Cursor': next_cursor,
+        'Link': f'<{next_url}>; rel="next"',
+    }
@@ -1,6 +1,10 @@
 """Place API endpoints for HBnB application"""
-from flask_restx import Namespace, Resource, fields
+from flask_restx import Namespace, Resource, fields, reqparse
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from hbnb.app.api.v1.batch import BatchResults
+from hbnb.app.api.v1.fieldsets import Fieldset, fields_parser
+from hbnb.app.api.v1.pagination import pagination_parser, page_headers
+from hbnb.app.models.place import RATINGS
 from hbnb.app.services.facade import HBnBFacade
 
 api = Namespace('places', description='Place operations')
@@ -13,6 +17,201 @@ def is_admin():
     claims = get_jwt()
     return claims.get('is_admin', False)
 
+
+def _floats(value, count):
+    parts = value.split(',')
+    if len(parts) != count:
+        raise ValueError(f'expected {count} comma-separated numbers')
+    return [float(part) for part in parts]
+
+
+def latitude_arg(value):
+    """Latitude in degrees, -90 to 90"""
+    lat = float(value)
+    if not -90 <= lat <= 90:
+        raise ValueError('latitude must be between -90 and 90')
+    return lat
+
+
+def longitude_arg(value):
+    """Longitude in degrees, -180 to 180"""
+    lon = float(value)
+    if not -180 <= lon <= 180:
+        raise ValueError('longitude must be between -180 and 180')
+    return lon
+
+
+def point_arg(value):
+    """(lat, lon) from 'lat,lon'"""
+    lat, lon = _floats(value, 2)
+    return latitude_arg(lat), longitude_arg(lon)
+
+
+def sort_arg(value):
+    """Order of GET /places: 'id' or 'rating'"""
+    if value not in PLACE_SORTS:
+        raise ValueError('sort must be one of: ' + ', '.join(PLACE_SORTS))
+    return value
+
+
+def bbox_arg(value):
+    """
+    (min_lon, min_lat, max_lon, max_lat) from 'min_lon,min_lat,max_lon,max_lat'
+
+    min_lon may exceed max_lon: the box then crosses the antimeridian.
+    """
+    min_lon, min_lat, max_lon, max_lat = _floats(value, 4)
+    for lat, lon in ((min_lat, min_lon), (max_lat, max_lon)):
+        latitude_arg(lat)
+        longitude_arg(lon)
+    if min_lat > max_lat:
+        raise ValueError('min_lat must not exceed max_lat')
+    return min_lon, min_lat, max_lon, max_lat
+
+
+# Radius of a ?near= search when radius_km is not given
+DEFAULT_RADIUS_KM = 10.0
+
+# Orders of GET /places/ (?sort=); ?near= always sorts by distance
+PLACE_SORTS = ('id', 'rating')
+
+# Query parameters narrowing GET /places/ (all optional, combined with AND)
+place_filter_parser = reqparse.RequestParser()
+place_filter_parser.add_argument(
+    'min_price', type=float, location='args', help='Lowest price per night')
+place_filter_parser.add_argument(
+    'max_price', type=float, location='args', help='Highest price per night')
+place_filter_parser.add_argument(
+    'amenities', type=str, location='args',
+    help='Comma-separated amenity IDs the places must all have')
+place_filter_parser.add_argument(
+    'min_rating', type=float, location='args',
+    help='Lowest average rating (unreviewed places are left out)')
+place_filter_parser.add_argument(
+    'owner_id', type=str, location='args', help='Only the places of this owner')
+place_filter_parser.add_argument(
+    'bbox', type=bbox_arg, location='args',
+    help='Bounding box min_lon,min_lat,max_lon,max_lat')
+place_filter_parser.add_argument(
+    'near', type=point_arg, location='args',
+    help='Centre lat,lon of a radius search (nearest places first)')
+place_filter_parser.add_argument(
+    'radius_km', type=float, location='args', default=DEFAULT_RADIUS_KM,
+    help='Radius of the near search in km')
+place_filter_parser.add_argument(
+    'sort', type=sort_arg, location='args', default='id',
+    help='Order of the places: id, or rating (best rated first, '
+         'unreviewed places left out)')
+
+
+# Query parameters of GET /places/nearest
+nearest_parser = reqparse.RequestParser()
+nearest_parser.add_argument(
+    'lat', type=latitude_arg, required=True, location='args',
+    help='Latitude of the point')
+nearest_parser.add_argument(
+    'lon', type=longitude_arg, required=True, location='args',
+    help='Longitude of the point')
+nearest_parser.add_argument(
+    'k', type=int, location='args',
+    help='Number of places (default 10, at most 200)')
+
+
+# Query parameter of GET /places/search
+search_parser = reqparse.RequestParser()
+search_parser.add_argument(
+    'q', type=str, required=True, location='args',
+    help='Words to find in titles and descriptions ("phrase", prefix*)')
+
+
+def place_filters(args):
+    """Facade filters (see get_places_page()) from place_filter_parser args"""
+    filters = {
+        name: args[name]
+        for name in ('min_price', 'max_price', 'min_rating', 'owner_id',
+                     'bbox')
+        if args.get(name) is not None
+    }
+    if args.get('amenities'):
+        filters['amenity_ids'] = [
+            amenity_id.strip()
+            for amenity_id in args['amenities'].split(',')
+            if amenity_id.strip()
+        ]
+    return filters
+
+
+def check_near_sort(args):
+    """Reject a sort=rating given with near= (those sort by distance)"""
+    if args['sort'] != 'id':
+        raise ValueError('sort cannot be combined with near')
+
+
+def place_rating(place):
+    """Review aggregates of a place, as returned by the API"""
+    return {
+        'count': place.review_count or 0,
+        'average': place.rating_avg,
+        'histogram': {
+            str(stars): count
+            for stars, count in place.rating_histogram.items()
+        }
+    }
+
+
+def place_owner(place):
+    return {
+        'id': place.owner_id,
+        'first_name': place.owner.first_name,
+        'last_name': place.owner.last_name,
+        'email': place.owner.email
+    }
+
+
+def place_amenities(place):
+    return [
+        {'id': amenity.id, 'name': amenity.name}
+        for amenity in place.amenities
+    ]
+
+
+def place_reviews(place):
+    return [
+        {
+            'id': review.id,
+            'text': review.text,
+            'rating': review.rating,
+            'user_id': review.user_id
+        }
+        for review in place.reviews
+    ]
+
+
+# Fields of the list and detail responses (see ?fields=)
+place_fields = Fieldset()
+for name in ('id', 'title', 'description', 'price', 'latitude', 'longitude',
+             'owner_id'):
+    place_fields.add(name)
+place_fields.add('owner', place_owner, ('owner_id', 'owner'))
+place_fields.add('amenities', place_amenities)
+place_fields.add('reviews', place_reviews)
+place_fields.add('rating', place_rating, ('review_count', 'rating_avg') + tuple(
+    f'rating_{stars}' for stars in RATINGS))
+place_fields.add('created_at', lambda place: place.created_at.isoformat())
+place_fields.add('updated_at', lambda place: place.updated_at.isoformat())
+
+
+def place_to_dict(place, fields=None):
+    """Place as returned by the list and detail endpoints (fields: ?fields=)"""
+    return place_fields.to_dict(place, fields)
+
+
+def nearby_place_to_dict(place, distance_km, fields=None):
+    """place_to_dict() plus the distance_km of a ?near= search"""
+    data = place_to_dict(place, fields)
+    data['distance_km'] = round(distance_km, 3)
+    return data
+
 # Define the place model for input validation
 place_model = api.model('Place', {
     'title': fields.String(required=True, description='Place title', min_length=1, max_length=100),
@@ -43,6 +242,11 @@ place_response_model = api.model('PlaceResponse', {
         'id': fields.String(description='Amenity ID'),
         'name': fields.String(description='Amenity name')
     }))),
+    'rating': fields.Nested(api.model('PlaceRating', {
+        'count': fields.Integer(description='Number of reviews'),
+        'average': fields.Float(description='Average rating (null if none)'),
+        'histogram': fields.Raw(description='Number of reviews per rating, 1 to 5')
+    })),
     'created_at': fields.String(description='Creation date'),
     'updated_at': fields.String(description='Last update date')
 })
@@ -53,43 +257,44 @@ class PlaceList(Resource):
     """Handles operations on the place collection"""
 
     @api.doc('list_places')
+    @api.expect(pagination_parser, fields_parser, place_filter_parser)
     @api.response(200, 'List of places retrieved successfully')
+    @api.response(400, 'Invalid pagination or filter parameters, or unknown field')
     def get(self):
-        """Get list of all places"""
-        places = facade.get_all_places()
+        """
+        Get one page of the places matching the filters (see X-Next-Cursor)
+
+        With near=lat,lon the places within radius_km are returned nearest
+        first, each with its distance_km. sort=rating returns the reviewed
+        places best rated first.
+        """
+        args = pagination_parser.parse_args()
+        fields = place_fields.from_request()
+        filter_args = place_filter_parser.parse_args()
+        filters = place_filters(filter_args)
+        try:
+            if filter_args['near'] is not None:
+                check_near_sort(filter_args)
+                nearby, next_cursor = facade.get_places_near(
+                    *filter_args['near'], filter_args['radius_km'],
+                    args['limit'], args['cursor'],
+                    fields=place_fields.attributes(fields), filters=filters)
+                return [
+                    nearby_place_to_dict(place, distance, fields)
+                    for place, distance in nearby
+                ], 200, page_headers(next_cursor)
+            get_page = (facade.get_top_rated_places
+                        if filter_args['sort'] == 'rating'
+                        else facade.get_places_page)
+            places, next_cursor = get_page(
+                args['limit'], args['cursor'],
+                fields=place_fields.attributes(fields), filters=filters)
+        except ValueError as e:
+            api.abort(400, str(e))
         return [
-            {
-                'id': place.id,
-                'title': place.title,
-                'description': place.description,
-                'price': place.price,
-                'latitude': place.latitude,
-                'longitude': place.longitude,
-                'owner_id': place.owner.id,
-                'owner': {
-                    'id': place.owner.id,
-                    'first_name': place.owner.first_name,
-                    'last_name': place.owner.last_name,
-                    'email': place.owner.email
-                },
-                'amenities': [
-                    {'id': amenity.id, 'name': amenity.name}
-                    for amenity in place.amenities
-                ],
-                'reviews': [
-                    {
-                        'id': review.id,
-                        'text': review.text,
-                        'rating': review.rating,
-                        'user_id': review.user.id
-                    }
-                    for review in place.reviews
-                ],
-                'created_at': place.created_at.isoformat(),
-                'updated_at': place.updated_at.isoformat()
-            }
+            place_to_dict(place, fields)
             for place in places
-        ], 200
+        ], 200, page_headers(next_cursor)
 
     @api.doc('create_place')
     @api.expect(place_model, validate=True)
@@ -115,13 +320,9 @@ class PlaceList(Resource):
             api.abort(404, 'Owner not found')
 
         # Validate amenities if provided
-        amenity_ids = place_data.get('amenities', [])
-        amenities = []
-        for amenity_id in amenity_ids:
-            amenity = facade.get_amenity(amenity_id)
-            if not amenity:
-                api.abort(404, f'Amenity with ID {amenity_id} not found')
-            amenities.append(amenity)
+        _, missing = facade.get_amenities(place_data.get('amenities', []))
+        if missing:
+            api.abort(404, f'Amenity with ID {missing[0]} not found')
 
         try:
             new_place = facade.create_place(place_data)
@@ -132,9 +333,9 @@ class PlaceList(Resource):
                 'price': new_place.price,
                 'latitude': new_place.latitude,
                 'longitude': new_place.longitude,
-                'owner_id': new_place.owner.id,
+                'owner_id': new_place.owner_id,
                 'owner': {
-                    'id': new_place.owner.id,
+                    'id': new_place.owner_id,
                     'first_name': new_place.owner.first_name,
                     'last_name': new_place.owner.last_name,
                     'email': new_place.owner.email
@@ -150,50 +351,121 @@ class PlaceList(Resource):
             api.abort(400, str(e))
 
 
+@api.route('/batch')
+class PlaceBatch(Resource):
+    """Creates many places in one request"""
+
+    @api.doc('create_places')
+    @api.expect([place_model])
+    @api.response(201, 'All places successfully created')
+    @api.response(207, 'Some places not created: see the status of each result')
+    @api.response(400, 'Payload is not an array or has too many items')
+    @api.response(401, 'Unauthorized')
+    @jwt_required()
+    def post(self):
+        """Create several places in one transaction (requires authentication)"""
+        batch = BatchResults(api, place_model)
+        current_user_id = get_jwt_identity()
+
+        # Same checks as POST /places/, with one lookup for all the owners
+        # and one for all the amenities
+        owner = facade.get_user(current_user_id)
+        _, missing = facade.get_amenities([
+            amenity_id
+            for _, place_data in batch.pending()
+            for amenity_id in place_data.get('amenities', [])
+        ])
+        missing = set(missing)
+        for index, place_data in batch.pending():
+            if place_data['owner_id'] != current_user_id:
+                batch.fail(index, 401, 'Unauthorized: You can only create places for yourself')
+            elif not owner:
+                batch.fail(index, 404, 'Owner not found')
+            else:
+                for amenity_id in place_data.get('amenities', []):
+                    if amenity_id in missing:
+                        batch.fail(index, 404, f'Amenity with ID {amenity_id} not found')
+                        break
+
+        pending = list(batch.pending())
+        try:
+            places = facade.create_places(
+                place_data for _, place_data in pending)
+        except ValueError as e:
+            api.abort(400, str(e))
+        for (index, _), place in zip(pending, places):
+            batch.succeed(index, 'place', place_to_dict(place))
+        return batch.response()
+
+
+@api.route('/search')
+class PlaceSearch(Resource):
+    """Handles full-text place search"""
+
+    @api.doc('search_places')
+    @api.expect(search_parser, pagination_parser, fields_parser)
+    @api.response(200, 'Matching places retrieved successfully')
+    @api.response(400, 'Empty query, invalid pagination or unknown field')
+    def get(self):
+        """Get one page of the places matching q, best match first (see X-Next-Cursor)"""
+        query = search_parser.parse_args()['q']
+        args = pagination_parser.parse_args()
+        fields = place_fields.from_request()
+        try:
+            places, next_cursor = facade.search_places(
+                query, args['limit'], args['cursor'],
+                fields=place_fields.attributes(fields))
+        except ValueError as e:
+            api.abort(400, str(e))
+        return [
+            place_to_dict(place, fields)
+            for place in places
+        ], 200, page_headers(next_cursor)
+
+
+@api.route('/nearest')
+class PlaceNearest(Resource):
+    """Handles k-nearest-neighbour place lookups"""
+
+    @api.doc('nearest_places')
+    @api.expect(nearest_parser, fields_parser)
+    @api.response(200, 'Nearest places retrieved successfully')
+    @api.response(400, 'Invalid coordinates or k, or unknown field')
+    def get(self):
+        """Get the k places closest to a point, nearest first (with distance_km)"""
+        args = nearest_parser.parse_args()
+        fields = place_fields.from_request()
+        try:
+            nearest = facade.get_nearest_places(
+                args['lat'], args['lon'], args['k'],
+                fields=place_fields.attributes(fields))
+        except ValueError as e:
+            api.abort(400, str(e))
+        return [
+            nearby_place_to_dict(place, distance, fields)
+            for place, distance in nearest
+        ], 200
+
+
 @api.route('/<place_id>')
 @api.param('place_id', 'The place identifier')
 class PlaceResource(Resource):
     """Handles operations on a single place"""
 
     @api.doc('get_place')
+    @api.expect(fields_parser)
     @api.response(200, 'Place details retrieved successfully')
+    @api.response(400, 'Unknown field')
     @api.response(404, 'Place not found')
     def get(self, place_id):
         """Get place details by ID"""
-        place = facade.get_place(place_id)
+        fields = place_fields.from_request()
+        place = facade.get_place(place_id,
+                                 fields=place_fields.attributes(fields))
         if not place:
             api.abort(404, 'Place not found')
 
-        return {
-            'id': place.id,
-            'title': place.title,
-            'description': place.description,
-            'price': place.price,
-            'latitude': place.latitude,
-            'longitude': place.longitude,
-            'owner_id': place.owner.id,
-            'owner': {
-                'id': place.owner.id,
-                'first_name': place.owner.first_name,
-                'last_name': place.owner.last_name,
-                'email': place.owner.email
-            },
-            'amenities': [
-                {'id': amenity.id, 'name': amenity.name}
-                for amenity in place.amenities
-            ],
-            'reviews': [
-                {
-                    'id': review.id,
-                    'text': review.text,
-                    'rating': review.rating,
-                    'user_id': review.user.id
-                }
-                for review in place.reviews
-            ],
-            'created_at': place.created_at.isoformat(),
-            'updated_at': place.updated_at.isoformat()
-        }, 200
+        return place_to_dict(place, fields), 200
 
     @api.doc('update_place')
     @api.expect(place_model, validate=True)
@@ -210,19 +482,19 @@ class PlaceResource(Resource):
         current_user_id = get_jwt_identity()
 
         # Check if place exists
-        existing_place = facade.get_place(place_id)
+        existing_place = facade.get_place(place_id, profile=None)
         if not existing_place:
             api.abort(404, 'Place not found')
         
         # Debug: print the IDs for troubleshooting
         print(f"\n[DEBUG] Update Place:")
         print(f"  Current User ID (from token): {current_user_id}")
-        print(f"  Place Owner ID: {existing_place.owner.id}")
-        print(f"  Match: {existing_place.owner.id == current_user_id}")
+        print(f"  Place Owner ID: {existing_place.owner_id}")
+        print(f"  Match: {existing_place.owner_id == current_user_id}")
         print(f"  Is Admin: {is_admin()}")
         
         # Check if the current user is the owner of the place or is admin
-        if str(existing_place.owner.id) != str(current_user_id) and not is_admin():
+        if str(existing_place.owner_id) != str(current_user_id) and not is_admin():
             api.abort(403, 'Unauthorized: You can only modify your own places')
 
         # Validate owner if being updated
@@ -233,11 +505,9 @@ class PlaceResource(Resource):
 
         # Validate amenities if being updated
         if 'amenities' in place_data:
-            amenity_ids = place_data['amenities']
-            for amenity_id in amenity_ids:
-                amenity = facade.get_amenity(amenity_id)
-                if not amenity:
-                    api.abort(404, f'Amenity with ID {amenity_id} not found')
+            _, missing = facade.get_amenities(place_data['amenities'])
+            if missing:
+                api.abort(404, f'Amenity with ID {missing[0]} not found')
 
         try:
             updated_place = facade.update_place(place_id, place_data)
@@ -248,9 +518,9 @@ class PlaceResource(Resource):
                 'price': updated_place.price,
                 'latitude': updated_place.latitude,
                 'longitude': updated_place.longitude,
-                'owner_id': updated_place.owner.id,
+                'owner_id': updated_place.owner_id,
                 'owner': {
-                    'id': updated_place.owner.id,
+                    'id': updated_place.owner_id,
                     'first_name': updated_place.owner.first_name,
                     'last_name': updated_place.owner.last_name,
                     'email': updated_place.owner.email
@@ -276,12 +546,12 @@ class PlaceResource(Resource):
         current_user_id = get_jwt_identity()
         
         # Check if place exists
-        place = facade.get_place(place_id)
+        place = facade.get_place(place_id, profile=None)
         if not place:
             api.abort(404, 'Place not found')
         
         # Check if the current user is the owner of the place or is admin
-        if place.owner.id != current_user_id and not is_admin():
+        if place.owner_id != current_user_id and not is_admin():
             api.abort(403, 'Unauthorized: You can only delete your own places')
         
         # Delete the place
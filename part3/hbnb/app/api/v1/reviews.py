@@ -1,7 +1,10 @@
 """Review API endpoints for HBnB application"""
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from hbnb.app.services.facade import HBnBFacade
+from hbnb.app.api.v1.batch import BatchResults
+from hbnb.app.api.v1.fieldsets import Fieldset, fields_parser
+from hbnb.app.api.v1.pagination import pagination_parser, page_headers
+from hbnb.app.services.facade import DuplicateReviewError, HBnBFacade
 
 api = Namespace('reviews', description='Review operations')
 
@@ -13,6 +16,32 @@ def is_admin():
     claims = get_jwt()
     return claims.get('is_admin', False)
 
+
+def review_user(review):
+    return {
+        'id': review.user_id,
+        'first_name': review.user.first_name,
+        'last_name': review.user.last_name
+    }
+
+
+# Fields of the review responses (see ?fields=)
+review_fields = Fieldset()
+for name in ('id', 'text', 'rating', 'user_id', 'place_id'):
+    review_fields.add(name)
+review_fields.add('user', review_user, ('user_id', 'user'))
+review_fields.add('created_at', lambda review: review.created_at.isoformat())
+review_fields.add('updated_at', lambda review: review.updated_at.isoformat())
+
+
+def review_to_dict(review, include_place_id=True, fields=None):
+    """Review as returned by the review endpoints (fields: ?fields=)"""
+    data = review_fields.to_dict(review, fields)
+    if not include_place_id:
+        # Listed under its place already
+        data.pop('place_id', None)
+    return data
+
 # Define the review model for input validation
 review_model = api.model('Review', {
     'text': fields.String(required=True, description='Review text', min_length=1),
@@ -43,27 +72,23 @@ class ReviewList(Resource):
     """Handles operations on the review collection"""
 
     @api.doc('list_reviews')
+    @api.expect(pagination_parser, fields_parser)
     @api.response(200, 'List of reviews retrieved successfully')
+    @api.response(400, 'Invalid pagination parameters or unknown field')
     def get(self):
-        """Get list of all reviews"""
-        reviews = facade.get_all_reviews()
+        """Get one page of reviews (see X-Next-Cursor for the next one)"""
+        args = pagination_parser.parse_args()
+        fields = review_fields.from_request()
+        try:
+            reviews, next_cursor = facade.get_reviews_page(
+                args['limit'], args['cursor'],
+                fields=review_fields.attributes(fields))
+        except ValueError as e:
+            api.abort(400, str(e))
         return [
-            {
-                'id': review.id,
-                'text': review.text,
-                'rating': review.rating,
-                'user_id': review.user.id,
-                'place_id': review.place.id,
-                'user': {
-                    'id': review.user.id,
-                    'first_name': review.user.first_name,
-                    'last_name': review.user.last_name
-                },
-                'created_at': review.created_at.isoformat(),
-                'updated_at': review.updated_at.isoformat()
-            }
+            review_to_dict(review, fields=fields)
             for review in reviews
-        ], 200
+        ], 200, page_headers(next_cursor)
 
     @api.doc('create_review')
     @api.expect(review_model, validate=True)
@@ -90,68 +115,98 @@ class ReviewList(Resource):
             api.abort(404, 'User not found')
 
         # Validate place exists
-        place = facade.get_place(review_data['place_id'])
+        place = facade.get_place(review_data['place_id'], profile=None)
         if not place:
             api.abort(404, 'Place not found')
         
         # Prevent users from reviewing their own places
-        if place.owner.id == current_user_id:
+        if place.owner_id == current_user_id:
             api.abort(403, 'You cannot review your own place')
         
         # Prevent duplicate reviews - check if user already reviewed this place
-        existing_reviews = facade.get_reviews_by_place(review_data['place_id'])
-        for review in existing_reviews:
-            if review.user.id == current_user_id:
-                api.abort(403, 'You have already reviewed this place')
+        if facade.has_reviewed(current_user_id, review_data['place_id']):
+            api.abort(403, 'You have already reviewed this place')
 
         try:
             new_review = facade.create_review(review_data)
-            return {
-                'id': new_review.id,
-                'text': new_review.text,
-                'rating': new_review.rating,
-                'user_id': new_review.user.id,
-                'place_id': new_review.place.id,
-                'user': {
-                    'id': new_review.user.id,
-                    'first_name': new_review.user.first_name,
-                    'last_name': new_review.user.last_name
-                },
-                'created_at': new_review.created_at.isoformat(),
-                'updated_at': new_review.updated_at.isoformat()
-            }, 201
+            return review_to_dict(new_review), 201
+        except DuplicateReviewError as e:
+            api.abort(403, str(e))
         except ValueError as e:
             api.abort(400, str(e))
 
 
+@api.route('/batch')
+class ReviewBatch(Resource):
+    """Creates many reviews in one request"""
+
+    @api.doc('create_reviews')
+    @api.expect([review_model])
+    @api.response(201, 'All reviews successfully created')
+    @api.response(207, 'Some reviews not created: see the status of each result')
+    @api.response(400, 'Payload is not an array or has too many items')
+    @api.response(401, 'Unauthorized')
+    @jwt_required()
+    def post(self):
+        """Create several reviews in one transaction (requires authentication)"""
+        batch = BatchResults(api, review_model)
+        current_user_id = get_jwt_identity()
+
+        # Same checks as POST /reviews/, with one lookup for all the places
+        # and one for the places already reviewed
+        user = facade.get_user(current_user_id)
+        place_ids = [review_data['place_id'] for _, review_data in batch.pending()]
+        places, _ = facade.get_places(place_ids)
+        places = {place.id: place for place in places}
+        reviewed = facade.get_reviewed_place_ids(current_user_id, places)
+        for index, review_data in batch.pending():
+            place = places.get(review_data['place_id'])
+            if review_data['user_id'] != current_user_id:
+                batch.fail(index, 401, 'Unauthorized: You can only create reviews as yourself')
+            elif not user:
+                batch.fail(index, 404, 'User not found')
+            elif not place:
+                batch.fail(index, 404, 'Place not found')
+            elif place.owner_id == current_user_id:
+                batch.fail(index, 403, 'You cannot review your own place')
+            elif place.id in reviewed:
+                # Reviewed before, or earlier in this batch
+                batch.fail(index, 403, 'You have already reviewed this place')
+            else:
+                reviewed.add(place.id)
+
+        pending = list(batch.pending())
+        try:
+            reviews = facade.create_reviews(
+                review_data for _, review_data in pending)
+        except DuplicateReviewError as e:
+            api.abort(403, str(e))
+        except ValueError as e:
+            api.abort(400, str(e))
+        for (index, _), review in zip(pending, reviews):
+            batch.succeed(index, 'review', review_to_dict(review))
+        return batch.response()
+
+
 @api.route('/<review_id>')
 @api.param('review_id', 'The review identifier')
 class ReviewResource(Resource):
     """Handles operations on a single review"""
 
     @api.doc('get_review')
+    @api.expect(fields_parser)
     @api.response(200, 'Review details retrieved successfully')
+    @api.response(400, 'Unknown field')
     @api.response(404, 'Review not found')
     def get(self, review_id):
         """Get review details by ID"""
-        review = facade.get_review(review_id)
+        fields = review_fields.from_request()
+        review = facade.get_review(review_id,
+                                   fields=review_fields.attributes(fields))
         if not review:
             api.abort(404, 'Review not found')
 
-        return {
-            'id': review.id,
-            'text': review.text,
-            'rating': review.rating,
-            'user_id': review.user.id,
-            'place_id': review.place.id,
-            'user': {
-                'id': review.user.id,
-                'first_name': review.user.first_name,
-                'last_name': review.user.last_name
-            },
-            'created_at': review.created_at.isoformat(),
-            'updated_at': review.updated_at.isoformat()
-        }, 200
+        return review_to_dict(review, fields=fields), 200
 
     @api.doc('update_review')
     @api.expect(review_model, validate=True)
@@ -175,12 +230,12 @@ class ReviewResource(Resource):
         # Debug: print the IDs for troubleshooting
         print(f"\n[DEBUG] Update Review:")
         print(f"  Current User ID (from token): {current_user_id}")
-        print(f"  Review Author ID: {existing_review.user.id}")
-        print(f"  Match: {existing_review.user.id == current_user_id}")
+        print(f"  Review Author ID: {existing_review.user_id}")
+        print(f"  Match: {existing_review.user_id == current_user_id}")
         print(f"  Is Admin: {is_admin()}")
         
         # Check if the current user is the author of the review or is admin
-        if str(existing_review.user.id) != str(current_user_id) and not is_admin():
+        if str(existing_review.user_id) != str(current_user_id) and not is_admin():
             api.abort(403, 'Unauthorized: You can only modify your own reviews')
 
         # Validate user if being updated
@@ -191,26 +246,15 @@ class ReviewResource(Resource):
 
         # Validate place if being updated
         if 'place_id' in review_data:
-            place = facade.get_place(review_data['place_id'])
+            place = facade.get_place(review_data['place_id'], profile=None)
             if not place:
                 api.abort(404, 'Place not found')
 
         try:
             updated_review = facade.update_review(review_id, review_data)
-            return {
-                'id': updated_review.id,
-                'text': updated_review.text,
-                'rating': updated_review.rating,
-                'user_id': updated_review.user.id,
-                'place_id': updated_review.place.id,
-                'user': {
-                    'id': updated_review.user.id,
-                    'first_name': updated_review.user.first_name,
-                    'last_name': updated_review.user.last_name
-                },
-                'created_at': updated_review.created_at.isoformat(),
-                'updated_at': updated_review.updated_at.isoformat()
-            }, 200
+            return review_to_dict(updated_review), 200
+        except DuplicateReviewError as e:
+            api.abort(403, str(e))
         except ValueError as e:
             api.abort(400, str(e))
 
@@ -229,7 +273,7 @@ class ReviewResource(Resource):
             api.abort(404, 'Review not found')
         
         # Check if the current user is the author of the review or is admin
-        if review.user.id != current_user_id and not is_admin():
+        if review.user_id != current_user_id and not is_admin():
             api.abort(403, 'Unauthorized: You can only delete your own reviews')
 
         facade.delete_review(review_id)
@@ -242,28 +286,25 @@ class PlaceReviewList(Resource):
     """Handles operations for reviews of a specific place"""
 
     @api.doc('get_place_reviews')
+    @api.expect(pagination_parser, fields_parser)
     @api.response(200, 'List of reviews for the place retrieved successfully')
+    @api.response(400, 'Invalid pagination parameters or unknown field')
     @api.response(404, 'Place not found')
     def get(self, place_id):
-        """Get all reviews for a specific place"""
-        place = facade.get_place(place_id)
+        """Get one page of reviews for a specific place"""
+        place = facade.get_place(place_id, profile=None)
         if not place:
             api.abort(404, 'Place not found')
 
-        reviews = facade.get_reviews_by_place(place_id)
+        args = pagination_parser.parse_args()
+        fields = review_fields.from_request()
+        try:
+            reviews, next_cursor = facade.get_reviews_by_place_page(
+                place_id, args['limit'], args['cursor'],
+                fields=review_fields.attributes(fields))
+        except ValueError as e:
+            api.abort(400, str(e))
         return [
-            {
-                'id': review.id,
-                'text': review.text,
-                'rating': review.rating,
-                'user_id': review.user.id,
-                'user': {
-                    'id': review.user.id,
-                    'first_name': review.user.first_name,
-                    'last_name': review.user.last_name
-                },
-                'created_at': review.created_at.isoformat(),
-                'updated_at': review.updated_at.isoformat()
-            }
+            review_to_dict(review, include_place_id=False, fields=fields)
             for review in reviews
-        ], 200
+        ], 200, page_headers(next_cursor)
@@ -3,6 +3,8 @@ User API endpoints for HBnB application
 """
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
+from hbnb.app.api.v1.fieldsets import Fieldset, fields_parser
+from hbnb.app.api.v1.pagination import pagination_parser, page_headers
 from hbnb.app.services.facade import HBnBFacade
 
 api = Namespace('users', description='User operations')
@@ -43,18 +45,28 @@ user_response_model = api.model('UserResponse', {
     'updated_at': fields.DateTime(description='Last update date')
 })
 
+# Fields of the user read responses (see ?fields=)
+user_fields = Fieldset.from_model(user_response_model)
+
 
 @api.route('/')
 class UserList(Resource):
     """Handles operations on the user collection"""
 
     @api.doc('list_users')
-    @api.marshal_list_with(user_response_model)
-    @api.response(200, 'List of users retrieved successfully')
+    @api.expect(pagination_parser, fields_parser)
+    @api.response(200, 'List of users retrieved successfully', [user_response_model])
+    @api.response(400, 'Invalid pagination parameters or unknown field')
     def get(self):
-        """Get list of all users"""
-        users = facade.get_all_users()
-        return users, 200
+        """Get one page of users (see X-Next-Cursor for the next one)"""
+        args = pagination_parser.parse_args()
+        fields = user_fields.from_request()
+        try:
+            users, next_cursor = facade.get_users_page(
+                args['limit'], args['cursor'], fields=user_fields.attributes(fields))
+        except ValueError as e:
+            api.abort(400, str(e))
+        return [user_fields.to_dict(user, fields) for user in users], 200, page_headers(next_cursor)
 
     @api.doc('create_user')
     @api.expect(user_model, validate=True)
@@ -67,10 +79,8 @@ class UserList(Resource):
     def post(self):
         """Register a new user (requires admin privileges, except for first user)"""
         # Allow first user creation without authentication
-        all_users = facade.get_all_users()
-        
         # If there are existing users, require admin privileges
-        if all_users:
+        if facade.has_users():
             if not is_admin():
                 api.abort(403, 'Admin privileges required')
         
@@ -94,15 +104,17 @@ class UserResource(Resource):
     """Handles operations on a single user"""
 
     @api.doc('get_user')
-    @api.marshal_with(user_response_model)
-    @api.response(200, 'User details retrieved successfully')
+    @api.expect(fields_parser)
+    @api.response(200, 'User details retrieved successfully', user_response_model)
+    @api.response(400, 'Unknown field')
     @api.response(404, 'User not found')
     def get(self, user_id):
         """Get user details by ID"""
-        user = facade.get_user(user_id)
+        fields = user_fields.from_request()
+        user = facade.get_user(user_id, fields=user_fields.attributes(fields))
         if not user:
             api.abort(404, 'User not found')
-        return user, 200
+        return user_fields.to_dict(user, fields), 200
 
     @api.doc('update_user')
     @api.expect(user_model, validate=True)
@@ -0,0 +1,399 @@
+"""
+ASGI serving mode for the HBnB API.
+
+The GET endpoints of /api/v1 and login are served natively from the event
+loop through AsyncHBnBFacade: a request waiting on the database or on
+bcrypt holds no thread, so one process can keep thousands of keep-alive
+connections open. Every other request (writes, Swagger UI, preflights) is
+forwarded to the Flask application, which asgiref's WsgiToAsgi runs in a
+thread pool. Native responses are built with the same serializers as the
+Flask routes, so both paths return the same JSON.
+"""
+import difflib
+import json
+import re
+from urllib.parse import parse_qsl
+
+from asgiref.wsgi import WsgiToAsgi
+from flask_jwt_extended import create_access_token
+from flask_restx.api import RE_RULES
+from werkzeug.exceptions import HTTPException
+
+from hbnb.app import API_CORS_OPTIONS
+from hbnb.app.api.v1.amenities import amenity_fields, amenity_to_dict
+from hbnb.app.api.v1.pagination import page_headers, pagination_parser
+from hbnb.app.api.v1.places import (
+    check_near_sort, nearby_place_to_dict, nearest_parser, place_fields,
+    place_filter_parser, place_filters, place_to_dict, search_parser)
+from hbnb.app.api.v1.reviews import review_fields, review_to_dict
+from hbnb.app.api.v1.users import login_model, user_fields
+from hbnb.app.persistence.async_repository import create_async_session_factory
+from hbnb.app.persistence.place_index import app_place_index
+from hbnb.app.services.async_facade import AsyncHBnBFacade
+
+
+class HTTPError(Exception):
+    """Abort a native handler with a flask-restx style JSON error body."""
+
+    def __init__(self, status, message, errors=None):
+        super().__init__(message)
+        self.status = status
+        self.body = {'message': message}
+        if errors:
+            self.body['errors'] = errors
+
+
+class Request:
+    """The parts of an ASGI HTTP request the native handlers use."""
+
+    def __init__(self, scope, body=b''):
+        self.scope = scope
+        self.body = body
+        # Blank values are kept, as Flask's request.args keeps them
+        self.args = dict(parse_qsl(scope.get('query_string', b'').decode(),
+                                   keep_blank_values=True))
+        self.headers = {
+            name.decode('latin-1').lower(): value.decode('latin-1')
+            for name, value in scope.get('headers', ())
+        }
+
+    @classmethod
+    async def read(cls, scope, receive):
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        return cls(scope, b''.join(chunks))
+
+    @property
+    def base_url(self):
+        """scheme://host/path, like Flask's request.base_url"""
+        host = self.headers.get('host')
+        if host is None:
+            server_host, port = self.scope.get('server') or ('localhost', 80)
+            host = f'{server_host}:{port}'
+        path = self.scope.get('root_path', '') + self.scope['path']
+        return f"{self.scope.get('scheme', 'http')}://{host}{path}"
+
+    def json(self):
+        try:
+            return json.loads(self.body or b'null')
+        except ValueError:
+            raise HTTPError(400, 'The browser (or proxy) sent a request '
+                                 'that this server could not understand.')
+
+    def parse_args(self, parser):
+        """Query parameters of a flask-restx RequestParser, as it reads them"""
+        values = {}
+        for arg in parser.args:
+            value = self.args.get(arg.name)
+            if value is None and arg.required:
+                raise HTTPError(400, 'Input payload validation failed', {
+                    arg.name: f'{arg.help} Missing required parameter in '
+                              'the query string'})
+            if value is None:
+                value = arg.default
+            else:
+                try:
+                    value = arg.type(value)
+                except ValueError as e:
+                    raise HTTPError(400, 'Input payload validation failed',
+                                    {arg.name: f'{arg.help} {e}'})
+            values[arg.name] = value
+        return values
+
+    def page_args(self):
+        """(limit, cursor) query parameters of pagination_parser"""
+        args = self.parse_args(pagination_parser)
+        return args['limit'], args['cursor']
+
+    def fields(self, fieldset):
+        """?fields= names, as Fieldset.from_request() reads them"""
+        try:
+            return fieldset.parse(self.args.get('fields'))
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+
+
+class AsgiApp:
+    """
+    ASGI application: native async handlers with a Flask fallback.
+
+    Args:
+        flask_app: Application from create_app(), serving everything the
+            native handlers do not
+        facade: AsyncHBnBFacade to use (default: one on the app's database)
+    """
+
+    def __init__(self, flask_app, facade=None):
+        self.flask_app = flask_app
+        self.facade = facade or AsyncHBnBFacade(
+            create_async_session_factory(flask_app),
+            bcrypt_workers=flask_app.config.get('BCRYPT_WORKERS'),
+            place_index=app_place_index(flask_app))
+        self.wsgi_app = WsgiToAsgi(flask_app)
+        self.routes = [
+            (method, re.compile(f'^/api/v1{pattern}$'), handler)
+            for method, pattern, handler in (
+                ('GET', '/users/', self.list_users),
+                ('POST', '/users/login', self.login),
+                ('GET', '/users/(?P<user_id>[^/]+)', self.get_user),
+                ('GET', '/amenities/', self.list_amenities),
+                ('GET', '/amenities/(?P<amenity_id>[^/]+)', self.get_amenity),
+                ('GET', '/places/', self.list_places),
+                ('GET', '/places/nearest', self.nearest_places),
+                ('GET', '/places/search', self.search_places),
+                ('GET', '/places/(?P<place_id>[^/]+)', self.get_place),
+                ('GET', '/reviews/', self.list_reviews),
+                ('GET', '/reviews/places/(?P<place_id>[^/]+)/reviews',
+                 self.list_place_reviews),
+                ('GET', '/reviews/(?P<review_id>[^/]+)', self.get_review),
+            )
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        handler, params = self.match(scope)
+        if handler is None:
+            await self.wsgi_app(scope, receive, send)
+            return
+
+        request = await Request.read(scope, receive)
+        headers = {}
+        try:
+            body, status, headers = await handler(request, **params)
+        except HTTPError as e:
+            body, status = e.body, e.status
+            if status == 404:
+                body['message'] = self.help_on_404(
+                    scope['path'], body['message'])
+        await self.send_json(request, send, body, status, headers)
+
+    def match(self, scope):
+        if scope['type'] != 'http':
+            return None, None
+        for method, pattern, handler in self.routes:
+            if scope['method'] != method:
+                continue
+            found = pattern.match(scope['path'])
+            if found:
+                return handler, found.groupdict()
+        return None, None
+
+    def help_on_404(self, path, message):
+        """The "did you mean" hint flask-restx appends to 404 messages"""
+        if not self.flask_app.config.get('RESTX_ERROR_404_HELP', True):
+            return message
+        rules = {
+            RE_RULES.sub('', rule.rule): rule.rule
+            for rule in self.flask_app.url_map.iter_rules()
+        }
+        close_matches = difflib.get_close_matches(path, rules.keys())
+        if not close_matches:
+            return message
+        return (f"{message.rstrip('.')}. You have requested this URI "
+                f"[{path}] but did you mean "
+                f"{' or '.join(rules[match] for match in close_matches)} ?")
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.facade.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def send_json(self, request, send, body, status, headers):
+        payload = (json.dumps(body) + '\n').encode()
+        headers = dict(headers)
+        headers.update(self.cors_headers(request))
+        raw_headers = [(b'content-type', b'application/json'),
+                       (b'content-length', str(len(payload)).encode())]
+        raw_headers += [(name.lower().encode('latin-1'),
+                         value.encode('latin-1'))
+                        for name, value in headers.items()]
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': raw_headers})
+        await send({'type': 'http.response.body', 'body': payload})
+
+    def cors_headers(self, request):
+        """The headers flask-cors adds for API_CORS_OPTIONS"""
+        origin = request.headers.get('origin')
+        if origin not in API_CORS_OPTIONS['origins']:
+            return {}
+        headers = {
+            'Access-Control-Allow-Origin': origin,
+            'Access-Control-Expose-Headers': ', '.join(
+                API_CORS_OPTIONS['expose_headers']),
+            'Vary': 'Origin',
+        }
+        if API_CORS_OPTIONS['supports_credentials']:
+            headers['Access-Control-Allow-Credentials'] = 'true'
+        return headers
+
+    async def page(self, request, get_page, *args, **kwargs):
+        limit, cursor = request.page_args()
+        try:
+            objs, next_cursor = await get_page(*args, limit, cursor, **kwargs)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        return objs, page_headers(next_cursor, request.base_url, request.args)
+
+    # ===== Native handlers: return (body, status, headers) =====
+
+    async def list_users(self, request):
+        fields = request.fields(user_fields)
+        users, headers = await self.page(
+            request, self.facade.get_users_page,
+            fields=user_fields.attributes(fields))
+        return [
+            user_fields.to_dict(user, fields) for user in users
+        ], 200, headers
+
+    async def get_user(self, request, user_id):
+        fields = request.fields(user_fields)
+        user = await self.facade.get_user(
+            user_id, fields=user_fields.attributes(fields))
+        if not user:
+            raise HTTPError(404, 'User not found')
+        return user_fields.to_dict(user, fields), 200, {}
+
+    async def login(self, request):
+        credentials = request.json()
+        try:
+            login_model.validate(credentials)
+        except HTTPException as e:
+            raise HTTPError(400, e.data['message'], e.data.get('errors'))
+
+        user = await self.facade.authenticate(credentials['email'],
+                                              credentials['password'])
+        if not user:
+            raise HTTPError(401, 'Invalid credentials')
+
+        with self.flask_app.app_context():
+            access_token = create_access_token(
+                identity=str(user.id),
+                additional_claims={'is_admin': user.is_admin})
+        return {
+            'access_token': access_token,
+            'user': {
+                'id': user.id,
+                'email': user.email,
+                'first_name': user.first_name,
+                'last_name': user.last_name,
+                'is_admin': user.is_admin
+            }
+        }, 200, {}
+
+    async def list_amenities(self, request):
+        fields = request.fields(amenity_fields)
+        amenities, headers = await self.page(
+            request, self.facade.get_amenities_page,
+            fields=amenity_fields.attributes(fields))
+        return [
+            amenity_to_dict(amenity, fields) for amenity in amenities
+        ], 200, headers
+
+    async def get_amenity(self, request, amenity_id):
+        fields = request.fields(amenity_fields)
+        amenity = await self.facade.get_amenity(
+            amenity_id, fields=amenity_fields.attributes(fields))
+        if not amenity:
+            raise HTTPError(404, 'Amenity not found')
+        return amenity_to_dict(amenity, fields), 200, {}
+
+    async def list_places(self, request):
+        fields = request.fields(place_fields)
+        filter_args = request.parse_args(place_filter_parser)
+        filters = place_filters(filter_args)
+        if filter_args['near'] is not None:
+            try:
+                check_near_sort(filter_args)
+            except ValueError as e:
+                raise HTTPError(400, str(e))
+            nearby, headers = await self.page(
+                request, self.facade.get_places_near, *filter_args['near'],
+                filter_args['radius_km'],
+                fields=place_fields.attributes(fields), filters=filters)
+            return [
+                nearby_place_to_dict(place, distance, fields)
+                for place, distance in nearby
+            ], 200, headers
+        get_page = (self.facade.get_top_rated_places
+                    if filter_args['sort'] == 'rating'
+                    else self.facade.get_places_page)
+        places, headers = await self.page(
+            request, get_page,
+            fields=place_fields.attributes(fields), filters=filters)
+        return [place_to_dict(place, fields) for place in places], 200, headers
+
+    async def nearest_places(self, request):
+        args = request.parse_args(nearest_parser)
+        fields = request.fields(place_fields)
+        try:
+            nearest = await self.facade.get_nearest_places(
+                args['lat'], args['lon'], args['k'],
+                fields=place_fields.attributes(fields))
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        return [
+            nearby_place_to_dict(place, distance, fields)
+            for place, distance in nearest
+        ], 200, {}
+
+    async def search_places(self, request):
+        query = request.parse_args(search_parser)['q']
+        fields = request.fields(place_fields)
+        places, headers = await self.page(
+            request, self.facade.search_places, query,
+            fields=place_fields.attributes(fields))
+        return [place_to_dict(place, fields) for place in places], 200, headers
+
+    async def get_place(self, request, place_id):
+        fields = request.fields(place_fields)
+        place = await self.facade.get_place(
+            place_id, fields=place_fields.attributes(fields))
+        if not place:
+            raise HTTPError(404, 'Place not found')
+        return place_to_dict(place, fields), 200, {}
+
+    async def list_reviews(self, request):
+        fields = request.fields(review_fields)
+        reviews, headers = await self.page(
+            request, self.facade.get_reviews_page,
+            fields=review_fields.attributes(fields))
+        return [
+            review_to_dict(review, fields=fields)
+            for review in reviews
+        ], 200, headers
+
+    async def get_review(self, request, review_id):
+        fields = request.fields(review_fields)
+        review = await self.facade.get_review(
+            review_id, fields=review_fields.attributes(fields))
+        if not review:
+            raise HTTPError(404, 'Review not found')
+        return review_to_dict(review, fields=fields), 200, {}
+
+    async def list_place_reviews(self, request, place_id):
+        if not await self.facade.get_place(place_id, profile=None):
+            raise HTTPError(404, 'Place not found')
+        fields = request.fields(review_fields)
+        reviews, headers = await self.page(
+            request, self.facade.get_reviews_by_place_page, place_id,
+            fields=review_fields.attributes(fields))
+        return [
+            review_to_dict(review, include_place_id=False, fields=fields)
+            for review in reviews
+        ], 200, headers
+
+
+def create_asgi_app(flask_app):
+    """Wrap an application from create_app() for an ASGI server."""
+    return AsgiApp(flask_app)
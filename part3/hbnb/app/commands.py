@@ -0,0 +1,38 @@
+"""
+Maintenance commands of the HBnB application.
+
+Run them with the Flask CLI, e.g. `flask --app run rebuild-spatial-index`.
+"""
+import click
+
+
+def register_commands(app):
+    """Add the maintenance commands to app.cli."""
+
+    @app.cli.command('rebuild-spatial-index')
+    def rebuild_spatial_index_command():
+        """Refill the places R*Tree from the places table (e.g. after VACUUM)."""
+        from hbnb.app import db
+        from hbnb.app.persistence.spatial import (
+            ensure_spatial_index, rebuild_spatial_index)
+        if db.engine.dialect.name != 'sqlite':
+            raise click.ClickException(
+                'The spatial index only exists on SQLite databases')
+        with db.engine.begin() as conn:
+            ensure_spatial_index(conn)
+            count = rebuild_spatial_index(conn)
+        click.echo(f'Spatial index rebuilt: {count} places')
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Re-index the places' titles and descriptions for full-text search."""
+        from hbnb.app import db
+        from hbnb.app.persistence.search import (
+            ensure_search_index, rebuild_search_index)
+        if db.engine.dialect.name != 'sqlite':
+            raise click.ClickException(
+                'The search index only exists on SQLite databases')
+        with db.engine.begin() as conn:
+            ensure_search_index(conn)
+            count = rebuild_search_index(conn)
+        click.echo(f'Search index rebuilt: {count} places')
@@ -8,7 +8,10 @@ from hbnb.app.models.amenity import Amenity
 # Association table for many-to-many relationship between Place and Amenity
 place_amenity = db.Table('place_amenity',
     db.Column('place_id', db.String(36), db.ForeignKey('places.id'), primary_key=True),
-    db.Column('amenity_id', db.String(36), db.ForeignKey('amenities.id'), primary_key=True)
+    db.Column('amenity_id', db.String(36), db.ForeignKey('amenities.id'), primary_key=True),
+    # The primary key serves place -> amenities; this serves the places
+    # having an amenity (GET /places/?amenities=...)
+    db.Index('ix_place_amenity_amenity_place', 'amenity_id', 'place_id')
 )
 
 __all__ = ["BaseModel", "User", "Place", "Review", "Amenity", "place_amenity"]
\ No newline at end of file
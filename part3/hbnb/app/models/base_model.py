@@ -7,6 +7,7 @@ import uuid
 from datetime import datetime
 from typing import Any
 from hbnb.app import db
+from hbnb.app.persistence.repository import flush_or_commit
 
 
 class BaseModel(db.Model):
@@ -26,9 +27,14 @@ class BaseModel(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def save(self) -> None:
-        """Update the updated_at timestamp and commit to database"""
+        """
+        Update the updated_at timestamp and persist the change.
+
+        Inside a UnitOfWork this only flushes; the commit happens once when
+        the unit of work closes.
+        """
         self.updated_at = datetime.utcnow()
-        db.session.commit()
+        flush_or_commit()
 
     def validate(self) -> None:
         """Override in subclasses."""
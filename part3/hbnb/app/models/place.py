@@ -3,8 +3,13 @@ from __future__ import annotations
 from typing import Any
 
 from hbnb.app.models.base_model import BaseModel
+from hbnb.app.persistence.search import attach_search_index
+from hbnb.app.persistence.spatial import attach_spatial_index
 from hbnb.app import db
 
+# Star values a review can give, one histogram column each (rating_1..5)
+RATINGS = range(1, 6)
+
 
 class Place(BaseModel):
     """
@@ -15,16 +20,46 @@ class Place(BaseModel):
     - latitude  (-90..90)
     - longitude (-180..180)
     - owner_id (foreign key to User)
+    - review aggregates: review_count, rating_sum, rating_avg and the
+      rating_1..rating_5 histogram, kept up to date by the facade on every
+      review write (see PlaceRepository.apply_rating()); never set them
+      directly
     Relationships: owner, reviews, amenities
+
+    On SQLite the places_rtree spatial index on (latitude, longitude) and
+    the places_fts full-text index on (title, description) are created with
+    the table and kept in sync by triggers (see persistence/spatial.py and
+    persistence/search.py).
     """
     __tablename__ = 'places'
+    __table_args__ = (
+        # Same name as in schema.sql, so existing databases keep theirs
+        db.Index('idx_places_owner_id', 'owner_id'),
+    )
 
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(1000), nullable=True, default="")
-    price = db.Column(db.Float, nullable=False)
+    price = db.Column(db.Float, nullable=False, index=True)
     latitude = db.Column(db.Float, nullable=False)
     longitude = db.Column(db.Float, nullable=False)
     owner_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+
+    # Review aggregates; rating_avg is NULL until the first review
+    review_count = db.Column(db.Integer, nullable=False, default=0,
+                             server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0,
+                           server_default='0')
+    rating_avg = db.Column(db.Float, nullable=True, index=True)
+    rating_1 = db.Column(db.Integer, nullable=False, default=0,
+                         server_default='0')
+    rating_2 = db.Column(db.Integer, nullable=False, default=0,
+                         server_default='0')
+    rating_3 = db.Column(db.Integer, nullable=False, default=0,
+                         server_default='0')
+    rating_4 = db.Column(db.Integer, nullable=False, default=0,
+                         server_default='0')
+    rating_5 = db.Column(db.Integer, nullable=False, default=0,
+                         server_default='0')
     
     # Relationships
     reviews = db.relationship('Review', backref='place', lazy=True, cascade='all, delete-orphan')
@@ -75,4 +110,15 @@ class Place(BaseModel):
             raise ValueError("longitude must be a number")
         if not (-180 <= float(self.longitude) <= 180):
             raise ValueError("longitude must be between -180 and 180")
-        self.longitude = float(self.longitude)
\ No newline at end of file
+        self.longitude = float(self.longitude)
+
+    @property
+    def rating_histogram(self) -> dict[int, int]:
+        """Number of reviews per star value, {1: n1, ..., 5: n5}."""
+        return {
+            stars: getattr(self, f"rating_{stars}") or 0 for stars in RATINGS
+        }
+
+
+attach_spatial_index(Place.__table__)
+attach_search_index(Place.__table__)
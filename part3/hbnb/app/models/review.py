@@ -13,8 +13,14 @@ class Review(BaseModel):
     - rating (int 1..5)
     - user_id (foreign key to User)
     - place_id (foreign key to Place)
+    A user can review a given place only once.
     """
     __tablename__ = 'reviews'
+    # One review per user and place; also answers "has this user reviewed
+    # this place?" with a single index probe
+    __table_args__ = (
+        db.Index('ix_reviews_user_place', 'user_id', 'place_id', unique=True),
+    )
 
     text = db.Column(db.String(1000), nullable=False)
     rating = db.Column(db.Integer, nullable=False)
@@ -0,0 +1,204 @@
+"""
+asyncio counterparts of UnitOfWork and SQLAlchemyRepository.
+
+Used by AsyncHBnBFacade for the ASGI serving mode (see asgi.py). They run
+on SQLAlchemy's asyncio engine (aiosqlite for SQLite) and reuse the models,
+load profiles, page sizes and cursor format of the synchronous
+repositories, so both modes return the same rows in the same pages.
+
+Lazy loading is not available under asyncio: an async query only loads the
+relationships its load profile names.
+"""
+import functools
+from contextvars import ContextVar
+
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from hbnb.app.persistence.repository import (
+    _chunks, decode_cursor, encode_cursor)
+from hbnb.app.persistence.sqlite import apply_sqlite_pragmas
+
+# AsyncSession of the AsyncUnitOfWork open in the current task
+_async_session = ContextVar("async_session", default=None)
+
+# Async DBAPI driver used for each synchronous backend
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+    "mysql": "aiomysql",
+}
+
+
+def async_database_uri(uri):
+    """Return uri with its driver swapped for the asyncio one."""
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver known for '{backend}' databases")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def create_async_session_factory(app):
+    """
+    Build an async_sessionmaker on the app's primary database.
+
+    The engine gets the same SQLITE_PRAGMAS as the synchronous one.
+    Objects stay readable after commit (expire_on_commit=False), since
+    expired attributes could only be reloaded by awaiting.
+    """
+    engine = create_async_engine(
+        async_database_uri(app.config["SQLALCHEMY_DATABASE_URI"]))
+    apply_sqlite_pragmas(engine.sync_engine,
+                         app.config.get("SQLITE_PRAGMAS") or {})
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+def current_async_session():
+    """Return the AsyncSession of the open AsyncUnitOfWork."""
+    session = _async_session.get()
+    if session is None:
+        raise RuntimeError("No AsyncUnitOfWork is open")
+    return session
+
+
+def async_transactional(func):
+    """
+    Run the decorated async facade method inside self.unit_of_work().
+
+    The AsyncHBnBFacade counterpart of transactional.
+    """
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        async with self.unit_of_work():
+            return await func(self, *args, **kwargs)
+    return wrapper
+
+
+class AsyncUnitOfWork:
+    """
+    One AsyncSession and transaction for a block of async repository calls.
+
+    Usage:
+        async with AsyncUnitOfWork(session_factory):
+            await repo.add(...)
+
+    Units of work nest within a task: inner blocks join the outermost one,
+    which commits (or rolls back when an exception escapes) and closes the
+    session.
+    """
+
+    def __init__(self, session_factory):
+        self._session_factory = session_factory
+        self._session = None
+        self._token = None
+
+    async def __aenter__(self):
+        session = _async_session.get()
+        if session is None:
+            self._session = session = self._session_factory()
+            self._token = _async_session.set(session)
+        return session
+
+    async def __aexit__(self, exc_type, exc, tb):
+        session = self._session
+        if session is None:
+            return False
+        self._session = None
+        try:
+            if exc_type is None:
+                await session.commit()
+            else:
+                await session.rollback()
+        finally:
+            _async_session.reset(self._token)
+            await session.close()
+        return False
+
+
+class AsyncSQLAlchemyRepository:
+    """
+    Async access to one model, mirroring a synchronous SQLAlchemyRepository.
+
+    Wraps the synchronous repository to share its model, load profiles and
+    paging settings. Every method needs an open AsyncUnitOfWork.
+    """
+
+    def __init__(self, repository):
+        """
+        Args:
+            repository: SQLAlchemyRepository of the model, e.g.
+                PlaceRepository()
+        """
+        self.repository = repository
+        self.model = repository.model
+
+    def _select(self, profile=None, fields=None):
+        return select(self.model).options(
+            *self.repository._options(profile, fields))
+
+    async def add(self, obj):
+        session = current_async_session()
+        session.add(obj)
+        await session.flush()
+
+    async def get(self, obj_id, profile=None, fields=None):
+        return await current_async_session().get(
+            self.model, obj_id,
+            options=self.repository._options(profile, fields))
+
+    async def get_many(self, obj_ids, profile=None, fields=None):
+        """Like SQLAlchemyRepository.get_many(): (objects, missing_ids)."""
+        session = current_async_session()
+        obj_ids = list(dict.fromkeys(obj_ids))
+        found = {}
+        for chunk in _chunks(obj_ids, self.repository.IN_CHUNK_SIZE):
+            result = await session.scalars(
+                self._select(profile, fields)
+                .where(self.model.id.in_(chunk)))
+            found.update((obj.id, obj) for obj in result)
+        objs = [found[obj_id] for obj_id in obj_ids if obj_id in found]
+        missing = [obj_id for obj_id in obj_ids if obj_id not in found]
+        return objs, missing
+
+    async def get_all(self, profile=None, fields=None):
+        result = await current_async_session().scalars(
+            self._select(profile, fields))
+        return result.all()
+
+    async def get_by_attribute(self, attr_name, attr_value, profile=None):
+        result = await current_async_session().scalars(
+            self._select(profile).filter_by(**{attr_name: attr_value})
+            .limit(1))
+        return result.first()
+
+    async def exists(self, **filters):
+        """True if a row matches the column equality filters."""
+        stmt = select(select(self.model).filter_by(**filters).exists())
+        return await current_async_session().scalar(stmt)
+
+    async def get_page(self, limit=None, cursor=None, profile=None,
+                       fields=None, criteria=(), **filters):
+        """Like SQLAlchemyRepository.get_page(): (objects, next_cursor)."""
+        limit = self.repository.page_limit(limit)
+        stmt = (self._select(profile, fields)
+                .where(*criteria)
+                .filter_by(**filters)
+                .order_by(self.model.id))
+        if cursor:
+            stmt = stmt.where(self.model.id > decode_cursor(cursor))
+
+        # Fetch one extra row to know whether another page follows
+        result = await current_async_session().scalars(stmt.limit(limit + 1))
+        objs = result.all()
+        next_cursor = None
+        if len(objs) > limit:
+            objs = objs[:limit]
+            next_cursor = encode_cursor(objs[-1].id)
+        return objs, next_cursor
+
+    async def delete(self, obj):
+        session = current_async_session()
+        await session.delete(obj)
+        await session.flush()
@@ -0,0 +1,56 @@
+"""
+Callbacks run once a session's transaction commits.
+
+For the in-memory structures that mirror database rows (PlaceIndex,
+PrefixIndex): a write queues its update with after_commit() and the update
+is applied only if the write is committed. Updates queued in a transaction
+that rolls back, or in a savepoint that rolls back, are dropped.
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# session.info keys: callbacks queued in the open transaction, and their
+# count when each open savepoint began
+_HOOKS_KEY = 'after_commit_hooks'
+_MARKS_KEY = 'after_commit_marks'
+
+
+def after_commit(session, func, *args):
+    """Call func(*args) once session's outermost transaction commits."""
+    session.info.setdefault(_HOOKS_KEY, []).append((func, args))
+
+
+@event.listens_for(Session, 'after_transaction_create')
+def _mark_savepoint(session, transaction):
+    if transaction.nested:
+        session.info.setdefault(_MARKS_KEY, {})[transaction] = len(
+            session.info.get(_HOOKS_KEY, ()))
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _drop_savepoint_hooks(session, previous_transaction):
+    if not previous_transaction.nested:
+        return
+    mark = session.info.get(_MARKS_KEY, {}).pop(previous_transaction, None)
+    hooks = session.info.get(_HOOKS_KEY)
+    if mark is not None and hooks:
+        del hooks[mark:]
+
+
+@event.listens_for(Session, 'after_commit')
+def _run_hooks(session):
+    if session.in_nested_transaction():
+        # RELEASE SAVEPOINT: the outer transaction may still roll back
+        return
+    for func, args in session.info.pop(_HOOKS_KEY, ()):
+        func(*args)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _forget_transaction(session, transaction):
+    # Savepoint marks are kept until then: after_transaction_end of a
+    # savepoint fires before its after_soft_rollback
+    if transaction.parent is None:
+        # Committed (hooks already run), rolled back or closed
+        session.info.pop(_HOOKS_KEY, None)
+        session.info.pop(_MARKS_KEY, None)
@@ -0,0 +1,173 @@
+"""
+k-d tree of 3-d points for nearest-neighbour queries, in pure Python.
+
+Used by PlaceIndex (place_index.py) over the places' unit-sphere vectors.
+"""
+import random
+from heapq import heappush, heapreplace
+
+# Sample size used to pick a split value (approximate median)
+_SAMPLE_SIZE = 255
+
+
+class _Leaf:
+    __slots__ = ('keys', 'points', 'limit')
+
+    def __init__(self, keys, points, limit):
+        self.keys = keys
+        self.points = points
+        self.limit = limit  # size past which insert() splits the leaf
+
+
+class _Split:
+    __slots__ = ('axis', 'value', 'low', 'high')
+
+    def __init__(self, axis, value, low, high):
+        self.axis = axis
+        self.value = value
+        self.low = low      # points with point[axis] < value
+        self.high = high
+
+
+class KDTree:
+    """
+    k-d tree mapping keys to 3-d points.
+
+    The initial items are split at approximate medians down to leaves of at
+    most LEAF_SIZE points, so building costs O(n log n) and a k-nearest
+    query visits O(log n + k) leaves. insert() adds a point to the leaf
+    whose cell holds it and splits the leaf once it doubles past LEAF_SIZE
+    points; remove() takes it out of its leaf. Cells are never merged:
+    after heavy deletions, rebuild the tree from its items().
+
+    Not thread-safe: callers serialize writes against reads.
+    """
+
+    LEAF_SIZE = 32
+
+    def __init__(self, items=()):
+        """
+        Args:
+            items: Iterable of (key, (x, y, z)); a repeated key keeps its
+                last point
+        """
+        self._points = dict(items)
+        self._root = self._build(list(self._points.keys()),
+                                 list(self._points.values()))
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, key):
+        return key in self._points
+
+    def items(self):
+        return self._points.items()
+
+    def insert(self, key, point):
+        """Add a point, or move the point of an existing key."""
+        point = tuple(point)
+        if key in self._points:
+            self.remove(key)
+        self._points[key] = point
+        parent, leaf = self._find_leaf(point)
+        leaf.keys.append(key)
+        leaf.points.append(point)
+        if len(leaf.keys) > leaf.limit:
+            node = self._build(leaf.keys, leaf.points)
+            if parent is None:
+                self._root = node
+            elif parent.low is leaf:
+                parent.low = node
+            else:
+                parent.high = node
+
+    def remove(self, key):
+        """Remove a key's point; unknown keys are ignored."""
+        point = self._points.pop(key, None)
+        if point is None:
+            return
+        _, leaf = self._find_leaf(point)
+        i = leaf.keys.index(key)
+        # Swap with the last entry: order within a leaf does not matter
+        leaf.keys[i] = leaf.keys[-1]
+        leaf.points[i] = leaf.points[-1]
+        leaf.keys.pop()
+        leaf.points.pop()
+
+    def nearest(self, point, k):
+        """
+        The k keys closest to point (Euclidean distance).
+
+        Returns:
+            List of (squared distance, key), nearest first
+        """
+        if k < 1 or not self._points:
+            return []
+        qx, qy, qz = point
+        heap = []   # max-heap of the best k so far, as (-distance2, key)
+
+        def visit(node):
+            if isinstance(node, _Leaf):
+                for key, (x, y, z) in zip(node.keys, node.points):
+                    d2 = (x - qx) ** 2 + (y - qy) ** 2 + (z - qz) ** 2
+                    if len(heap) < k:
+                        heappush(heap, (-d2, key))
+                    elif d2 < -heap[0][0]:
+                        heapreplace(heap, (-d2, key))
+                return
+            diff = point[node.axis] - node.value
+            if diff < 0:
+                near, far = node.low, node.high
+            else:
+                near, far = node.high, node.low
+            visit(near)
+            # The far cell can only hold closer points if the splitting
+            # plane is nearer than the current k-th neighbour
+            if len(heap) < k or diff * diff < -heap[0][0]:
+                visit(far)
+
+        visit(self._root)
+        return sorted((-neg_d2, key) for neg_d2, key in heap)
+
+    def _find_leaf(self, point):
+        parent, node = None, self._root
+        while isinstance(node, _Split):
+            parent = node
+            node = node.low if point[node.axis] < node.value else node.high
+        return parent, node
+
+    def _build(self, keys, points):
+        if len(points) <= self.LEAF_SIZE:
+            return _Leaf(list(keys), list(points), 2 * self.LEAF_SIZE)
+        sample = (points if len(points) <= _SAMPLE_SIZE
+                  else random.sample(points, _SAMPLE_SIZE))
+        # Split the axis along which the points spread the most
+        axis = max(range(3), key=lambda a: (max(p[a] for p in sample)
+                                            - min(p[a] for p in sample)))
+        values = sorted(p[axis] for p in sample)
+        value = values[len(values) // 2]
+        low, high = _partition(keys, points, axis, value)
+        if not low[0]:
+            # The median is the minimum: split just above it instead
+            upper = [p[axis] for p in points if p[axis] > value]
+            if not upper:
+                # Equal coordinates along the widest axis: one large
+                # leaf, only split again once it has doubled
+                return _Leaf(list(keys), list(points), 2 * len(points))
+            value = min(upper)
+            low, high = _partition(keys, points, axis, value)
+        return _Split(axis, value, self._build(*low), self._build(*high))
+
+
+def _partition(keys, points, axis, value):
+    """((low keys, low points), (high keys, high points)) around value"""
+    low_keys, low_points, high_keys, high_points = [], [], [], []
+    for key, point in zip(keys, points):
+        if point[axis] < value:
+            low_keys.append(key)
+            low_points.append(point)
+        else:
+            high_keys.append(key)
+            high_points.append(point)
+    return (low_keys, low_points), (high_keys, high_points)
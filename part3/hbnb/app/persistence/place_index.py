@@ -0,0 +1,141 @@
+"""
+In-process k-nearest-neighbour index of the places.
+
+PlaceIndex keeps every place as a unit vector on the sphere in a KDTree:
+the straight-line (chord) distance between two such vectors grows with
+their great-circle distance, so the k nearest vectors are the k nearest
+places. A query reads O(log n + k) tree leaves instead of computing the
+distance to every place.
+
+The index is built from the places table when the app starts, then follows
+the place writes of this process: ORM inserts, coordinate updates and
+deletes, and the repositories' bulk writes, applied only once their
+transaction commits (see commit_hooks.py). Rows changed by other processes
+or by raw SQL are only picked up by the next load().
+"""
+import math
+import threading
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect as sa_inspect, select
+from sqlalchemy.orm import object_session
+
+from hbnb.app.models.place import Place
+from hbnb.app.persistence.commit_hooks import after_commit
+from hbnb.app.persistence.kdtree import KDTree
+from hbnb.app.persistence.spatial import EARTH_RADIUS_KM
+
+_EXTENSION_KEY = 'place_index'
+
+
+def unit_vector(lat, lon):
+    """(x, y, z) on the unit sphere of a point given in degrees."""
+    phi, lam = math.radians(lat), math.radians(lon)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam),
+            math.sin(phi))
+
+
+def chord_to_km(chord):
+    """Great-circle distance in km of a chord between two unit vectors."""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+class PlaceIndex:
+    """k-nearest-neighbour index of the places' coordinates (thread-safe)."""
+
+    def __init__(self):
+        self._tree = KDTree()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tree)
+
+    def load(self, conn):
+        """Rebuild the index from the places table. Returns its size."""
+        rows = conn.execute(select(Place.id, Place.latitude, Place.longitude))
+        tree = KDTree((place_id, unit_vector(lat, lon))
+                      for place_id, lat, lon in rows)
+        with self._lock:
+            self._tree = tree
+        return len(tree)
+
+    def apply(self, changes):
+        """
+        Apply place writes in order.
+
+        Args:
+            changes: Iterable of (place_id, (lat, lon)), or (place_id,
+                None) for a deleted place
+        """
+        with self._lock:
+            for place_id, coordinates in changes:
+                if coordinates is None:
+                    self._tree.remove(place_id)
+                else:
+                    self._tree.insert(place_id, unit_vector(*coordinates))
+
+    def nearest(self, lat, lon, k):
+        """[(place_id, distance_km)] of the k nearest places, nearest first"""
+        with self._lock:
+            found = self._tree.nearest(unit_vector(lat, lon), k)
+        return [(place_id, chord_to_km(math.sqrt(d2)))
+                for d2, place_id in found]
+
+
+def init_place_index(app, db):
+    """
+    Build the app's PlaceIndex from its primary database.
+
+    Must run inside an application context. A database without a places
+    table yet gives an empty index, filled as places are written.
+    """
+    index = PlaceIndex()
+    if sa_inspect(db.engine).has_table(Place.__tablename__):
+        with db.engine.connect() as conn:
+            index.load(conn)
+    app.extensions[_EXTENSION_KEY] = index
+    return index
+
+
+def app_place_index(app):
+    """The app's PlaceIndex, or None if PLACE_INDEX is disabled."""
+    return app.extensions.get(_EXTENSION_KEY)
+
+
+def current_place_index():
+    """The current app's PlaceIndex, or None (disabled or no app context)."""
+    if not has_app_context():
+        return None
+    return app_place_index(current_app)
+
+
+def record_place_write(session, place_id, coordinates):
+    """
+    Queue a place write for the PlaceIndex until session commits.
+
+    Args:
+        session: Session whose transaction made the write
+        place_id: Id of the place
+        coordinates: (lat, lon) of the place, or None if it was deleted
+    """
+    index = current_place_index()
+    if session is None or index is None:
+        return
+    after_commit(session, index.apply, [(place_id, coordinates)])
+
+
+@event.listens_for(Place, 'after_insert')
+@event.listens_for(Place, 'after_update')
+def _place_saved(mapper, connection, place):
+    state = sa_inspect(place)
+    if not (state.attrs.latitude.history.has_changes()
+            or state.attrs.longitude.history.has_changes()):
+        return
+    record_place_write(object_session(place), place.id,
+                       (place.latitude, place.longitude))
+
+
+@event.listens_for(Place, 'after_delete')
+def _place_deleted(mapper, connection, place):
+    record_place_write(object_session(place), place.id, None)
+
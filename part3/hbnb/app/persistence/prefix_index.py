@@ -0,0 +1,213 @@
+"""
+In-process prefix index of place titles and amenity names (autocomplete).
+
+PrefixIndex keeps one sorted array of (key, kind, id) entries, a key per
+word of each label: "Seaside villa" is found by "sea", "seaside v" and
+"vil". Keys are casefolded with accents removed. A lookup is a binary
+search followed by a walk over the matching entries, so it costs
+O(log n + limit) however many labels there are.
+
+The array is built from the primary database on the first lookup (and
+again after invalidate()), then follows the title and name writes this
+process commits: ORM inserts, updates and deletes, and the repositories'
+bulk writes (see commit_hooks.py). Rows changed by other processes or by
+raw SQL are only picked up by a rebuild.
+"""
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect as sa_inspect, select
+from sqlalchemy.orm import object_session
+
+from hbnb.app.models.amenity import Amenity
+from hbnb.app.models.place import Place
+from hbnb.app.persistence.commit_hooks import after_commit
+
+_EXTENSION_KEY = 'prefix_index'
+
+# Indexed labels: kind -> (model, label attribute)
+LABELS = {
+    'place': (Place, 'title'),
+    'amenity': (Amenity, 'name'),
+}
+
+_WORD = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Casefolded text without accents, words separated by single spaces."""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ' '.join(''.join(
+        char for char in decomposed if not unicodedata.combining(char)
+    ).split())
+
+
+def label_keys(label):
+    """Keys of a label: its normalized text from the start of each word."""
+    text = normalize(label)
+    return list(dict.fromkeys(
+        text[word.start():] for word in _WORD.finditer(text)))
+
+
+class PrefixIndex:
+    """Sorted-array prefix index of labels (thread-safe)."""
+
+    # Matches returned by lookup() when no limit is given, and its cap
+    DEFAULT_LIMIT = 10
+    MAX_LIMIT = 50
+
+    def __init__(self, engine):
+        """
+        Args:
+            engine: Engine of the database to build the index from
+        """
+        self._engine = engine
+        self._entries = None    # sorted (key, kind, id); None until built
+        self._labels = {}       # (kind, id) -> label
+        self._lock = threading.RLock()
+
+    @property
+    def built(self):
+        return self._entries is not None
+
+    def invalidate(self):
+        """Drop the entries: the next lookup rebuilds them."""
+        with self._lock:
+            self._entries = None
+            self._labels = {}
+
+    def build(self):
+        """
+        Load every label from the database. Returns their number.
+
+        Holds the lock throughout, so that writes committed while it reads
+        are applied after it rather than dropped.
+        """
+        labels = {}
+        with self._lock:
+            with self._engine.connect() as conn:
+                for kind, (model, attr) in LABELS.items():
+                    rows = conn.execute(select(model.id, getattr(model, attr)))
+                    labels.update(((kind, obj_id), label)
+                                  for obj_id, label in rows)
+            self._entries = sorted(
+                (key, kind, obj_id)
+                for (kind, obj_id), label in labels.items()
+                for key in label_keys(label)
+            )
+            self._labels = labels
+        return len(labels)
+
+    def set(self, kind, obj_id, label):
+        """
+        Add, relabel or (label None) remove an object.
+
+        Ignored until the index is built, since build() reads the
+        committed labels anyway.
+        """
+        with self._lock:
+            if self._entries is None:
+                return
+            old = self._labels.pop((kind, obj_id), None)
+            if old is not None:
+                for key in label_keys(old):
+                    entry = (key, kind, obj_id)
+                    i = bisect_left(self._entries, entry)
+                    if i < len(self._entries) and self._entries[i] == entry:
+                        del self._entries[i]
+            if label is not None:
+                self._labels[(kind, obj_id)] = label
+                for key in label_keys(label):
+                    insort(self._entries, (key, kind, obj_id))
+
+    def lookup(self, prefix, limit=None):
+        """
+        Labels with a word starting with prefix, in key order.
+
+        Args:
+            prefix: Start of a word, or of several words, of the labels
+            limit: Number of matches (default DEFAULT_LIMIT, at most
+                MAX_LIMIT)
+
+        Returns:
+            List of (kind, id, label)
+
+        Raises:
+            ValueError: If prefix holds no letter or digit or limit is not
+                positive
+        """
+        if limit is None:
+            limit = self.DEFAULT_LIMIT
+        if limit < 1:
+            raise ValueError("limit must be a positive integer")
+        limit = min(limit, self.MAX_LIMIT)
+        text = normalize(prefix or '')
+        if not _WORD.search(text):
+            raise ValueError("prefix must contain a letter or digit")
+
+        with self._lock:
+            if self._entries is None:
+                self.build()
+            entries = self._entries
+            found, seen = [], set()
+            i = bisect_left(entries, (text,))
+            while i < len(entries) and len(found) < limit:
+                key, kind, obj_id = entries[i]
+                if not key.startswith(text):
+                    break
+                if (kind, obj_id) not in seen:
+                    seen.add((kind, obj_id))
+                    found.append((kind, obj_id, self._labels[(kind, obj_id)]))
+                i += 1
+        return found
+
+
+def init_prefix_index(app, db):
+    """Attach an (unbuilt) PrefixIndex on the app's primary database."""
+    index = PrefixIndex(db.engine)
+    app.extensions[_EXTENSION_KEY] = index
+    return index
+
+
+def current_prefix_index():
+    """The current app's PrefixIndex, or None outside an app context."""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get(_EXTENSION_KEY)
+
+
+def record_label_write(session, kind, obj_id, label):
+    """
+    Queue a label write for the PrefixIndex until session commits.
+
+    Args:
+        session: Session whose transaction made the write
+        kind: Key of LABELS, e.g. 'place'
+        obj_id: Id of the object
+        label: Its new label, or None if it was deleted
+    """
+    index = current_prefix_index()
+    if session is None or index is None:
+        return
+    after_commit(session, index.set, kind, obj_id, label)
+
+
+def _listen(kind, model, attr):
+    def saved(mapper, connection, obj):
+        if sa_inspect(obj).attrs[attr].history.has_changes():
+            record_label_write(object_session(obj), kind, obj.id,
+                               getattr(obj, attr))
+
+    def deleted(mapper, connection, obj):
+        record_label_write(object_session(obj), kind, obj.id, None)
+
+    event.listen(model, 'after_insert', saved)
+    event.listen(model, 'after_update', saved)
+    event.listen(model, 'after_delete', deleted)
+
+
+for _kind, (_model, _attr) in LABELS.items():
+    _listen(_kind, _model, _attr)
@@ -0,0 +1,63 @@
+"""
+Read/write session routing.
+
+When SQLALCHEMY_REPLICA_URI is configured it is registered as the
+"replica" bind, and repositories run their read-only queries through a
+separate session bound to it. Writes always use the primary db.session, and
+so do reads made while a UnitOfWork is open or while the primary session
+holds unflushed changes, so a request always reads its own writes.
+"""
+from flask import current_app
+from flask.globals import app_ctx
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from hbnb.app.persistence.repository import in_unit_of_work
+
+REPLICA_BIND = "replica"
+_EXTENSION_KEY = "hbnb_read_replica"
+
+
+def register_replica_bind(app):
+    """Add SQLALCHEMY_REPLICA_URI to SQLALCHEMY_BINDS (call before db.init_app)."""
+    replica_uri = app.config.get("SQLALCHEMY_REPLICA_URI")
+    if not replica_uri:
+        return
+    binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+    binds[REPLICA_BIND] = replica_uri
+    app.config["SQLALCHEMY_BINDS"] = binds
+
+
+def init_read_replica(app, db):
+    """
+    Create the read-only session for the replica bind, if configured.
+
+    Must run inside an application context, after db.init_app(app).
+    """
+    if REPLICA_BIND not in (app.config.get("SQLALCHEMY_BINDS") or {}):
+        return
+    session = scoped_session(
+        sessionmaker(bind=db.engines[REPLICA_BIND], autoflush=False),
+        scopefunc=lambda: id(app_ctx._get_current_object()),
+    )
+    app.extensions[_EXTENSION_KEY] = session
+
+    @app.teardown_appcontext
+    def remove_read_session(exc):
+        session.remove()
+
+
+def read_session():
+    """
+    Return the session read-only queries should use.
+
+    The replica session when one is configured and the primary session has
+    no transaction of ours in flight; db.session otherwise.
+    """
+    from hbnb.app import db
+    replica = current_app.extensions.get(_EXTENSION_KEY)
+    if replica is None or in_unit_of_work():
+        return db.session
+    primary = db.session
+    if primary.new or primary.dirty or primary.deleted:
+        return db.session
+    return replica
@@ -1,4 +1,121 @@
+import base64
+import binascii
+import functools
+import json
 from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from operator import attrgetter
+
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import joinedload, lazyload, load_only, selectinload
+
+
+_UOW_DEPTH_KEY = "unit_of_work_depth"
+
+
+def _session():
+    from hbnb.app import db
+    return db.session
+
+
+def in_unit_of_work():
+    """Return True if a UnitOfWork is currently open on the session."""
+    return _session().info.get(_UOW_DEPTH_KEY, 0) > 0
+
+
+def flush_or_commit():
+    """
+    Persist pending changes.
+
+    Inside a UnitOfWork the session is only flushed (so defaults, ids and
+    constraint errors surface immediately); the single COMMIT is left to the
+    outermost unit of work. Outside of one, commit straight away.
+    """
+    session = _session()
+    if in_unit_of_work():
+        session.flush()
+    else:
+        session.commit()
+
+
+def transactional(func):
+    """
+    Run the decorated (facade) method inside a UnitOfWork.
+
+    The method's writes are committed once, and the reads it makes use the
+    primary session, never the read replica.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with UnitOfWork():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def savepoint():
+    """
+    Run a block of writes inside a SAVEPOINT.
+
+    If the block raises (e.g. a flush hits a unique constraint) only its
+    writes are rolled back; the surrounding transaction stays usable.
+    """
+    with _session().begin_nested():
+        yield
+
+
+class UnitOfWork:
+    """
+    Group repository writes into a single database transaction.
+
+    Usage:
+        with UnitOfWork():
+            facade.create_user(...)
+            facade.create_place(...)
+
+    Units of work nest: inner blocks join the outermost one, and only the
+    outermost block commits (or rolls back when an exception escapes).
+    """
+
+    def __init__(self):
+        self._outermost = False
+        self._closed = False
+
+    def __enter__(self):
+        session = _session()
+        depth = session.info.get(_UOW_DEPTH_KEY, 0)
+        session.info[_UOW_DEPTH_KEY] = depth + 1
+        self._outermost = depth == 0
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(commit=exc_type is None)
+        return False
+
+    def close(self, commit=True):
+        """
+        Leave the unit of work, committing or rolling back if outermost.
+
+        Args:
+            commit: Commit the transaction when True, roll it back otherwise
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        session = _session()
+        session.info[_UOW_DEPTH_KEY] = session.info.get(_UOW_DEPTH_KEY, 1) - 1
+        if not self._outermost:
+            return
+        if not commit:
+            session.rollback()
+            return
+        try:
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
 
 
 class Repository(ABC):
@@ -28,11 +145,44 @@ class Repository(ABC):
 
 
 class InMemoryRepository(Repository):
-    def __init__(self):
+    """
+    Dict-backed repository.
+
+    unique_indexes / indexes name attributes to keep hash indexes on
+    (value -> id, and value -> ids in insertion order). Names may be dotted
+    paths such as 'owner.id', which gives foreign-key reverse indexes.
+    multi_indexes name collection attributes (e.g. 'amenity_ids') indexed
+    once per element. get_by_attribute() and get_all_by_attribute() use the
+    indexes for O(1) lookups and fall back to a scan for other attributes.
+
+    range_indexes name orderable attributes (e.g. 'price') kept in
+    bisect-maintained sorted arrays; get_by_range() and get_by_ranges()
+    answer range queries in O(log n + matches).
+
+    Indexes are refreshed by add/update/delete, so callers that mutate an
+    object directly must call update() after.
+    """
+
+    def __init__(self, unique_indexes=(), indexes=(), multi_indexes=(),
+                 range_indexes=()):
         self._storage = {}
+        self._unique = {attr: {} for attr in unique_indexes}
+        self._indexes = {attr: {} for attr in indexes}
+        self._multi = set(multi_indexes)
+        for attr in multi_indexes:
+            self._indexes[attr] = {}
+        # attr -> (sorted values, ids in the same order)
+        self._ranges = {attr: ([], []) for attr in range_indexes}
+        # obj_id -> {attr: value as last indexed}, to unindex stale values
+        self._indexed_values = {}
+        self._range_values = {}
 
     def add(self, obj):
+        if obj.id in self._storage:
+            self._unindex(obj.id)
+        self._check_unique(obj)
         self._storage[obj.id] = obj
+        self._index(obj)
 
     def get(self, obj_id):
         return self._storage.get(obj_id)
@@ -43,25 +193,190 @@ class InMemoryRepository(Repository):
     def update(self, obj_id, data):
         obj = self.get(obj_id)
         if obj:
-            obj.update(data)
+            # Values to put back if the update is rejected
+            previous = {attr: getattr(obj, attr)
+                        for attr in ("updated_at", *data)
+                        if hasattr(obj, attr)}
+            self._unindex(obj_id)
+            try:
+                obj.update(data)
+                self._check_unique(obj)
+            except Exception:
+                for attr, value in previous.items():
+                    setattr(obj, attr, value)
+                raise
+            finally:
+                self._index(obj)
 
     def delete(self, obj_id):
         if obj_id in self._storage:
+            self._unindex(obj_id)
             del self._storage[obj_id]
 
     def get_by_attribute(self, attr_name, attr_value):
+        if attr_name in self._unique:
+            obj_id = self._unique[attr_name].get(attr_value)
+            return self._storage.get(obj_id)
+        if attr_name in self._indexes:
+            obj_ids = self._indexes[attr_name].get(attr_value)
+            return self._storage[next(iter(obj_ids))] if obj_ids else None
         return next(
             (
                 obj
                 for obj in self._storage.values()
-                if getattr(obj, attr_name) == attr_value
+                if _extract(obj, attr_name) == attr_value
             ),
             None,
         )
 
+    def get_all_by_attribute(self, attr_name, attr_value):
+        if attr_name in self._unique:
+            obj = self.get_by_attribute(attr_name, attr_value)
+            return [obj] if obj else []
+        if attr_name in self._indexes:
+            obj_ids = self._indexes[attr_name].get(attr_value, ())
+            return [self._storage[obj_id] for obj_id in obj_ids]
+        return [
+            obj
+            for obj in self._storage.values()
+            if _extract(obj, attr_name) == attr_value
+        ]
+
+    def get_by_range(self, attr_name, low=None, high=None):
+        """
+        Return the objects whose attr_name lies in [low, high].
+
+        Either bound may be None (open-ended). Results are ordered by the
+        attribute value. Falls back to a scan if attr_name has no range
+        index.
+        """
+        return [self._storage[obj_id]
+                for obj_id in self._range_ids(attr_name, low, high)]
+
+    def get_by_ranges(self, ranges):
+        """
+        Return the objects matching every {attr_name: (low, high)} range.
+
+        Each range is answered from its sorted index; the id sets are then
+        intersected starting from the smallest one. Without ranges, every
+        object is returned.
+        """
+        if not ranges:
+            return self.get_all()
+        candidates = sorted(
+            (self._range_ids(attr, low, high)
+             for attr, (low, high) in ranges.items()),
+            key=len,
+        )
+        result = candidates[0]
+        for obj_ids in candidates[1:]:
+            if not result:
+                break
+            keep = set(obj_ids)
+            result = [obj_id for obj_id in result if obj_id in keep]
+        return [self._storage[obj_id] for obj_id in result]
+
+    def _range_ids(self, attr_name, low, high):
+        if attr_name not in self._ranges:
+            return [
+                obj.id
+                for obj in self._storage.values()
+                if _in_range(_extract(obj, attr_name), low, high)
+            ]
+        keys, obj_ids = self._ranges[attr_name]
+        start = 0 if low is None else bisect_left(keys, low)
+        end = len(keys) if high is None else bisect_right(keys, high)
+        return obj_ids[start:end]
+
+    def _check_unique(self, obj):
+        for attr, index in self._unique.items():
+            owner_id = index.get(_extract(obj, attr))
+            if owner_id is not None and owner_id != obj.id:
+                raise ValueError(f"{attr} must be unique")
+
+    def _index(self, obj):
+        values = {}
+        for attr, index in self._unique.items():
+            value = _extract(obj, attr)
+            # Never take over a value another object already owns
+            if index.setdefault(value, obj.id) == obj.id:
+                values[attr] = value
+        for attr, index in self._indexes.items():
+            value = _extract(obj, attr)
+            if attr in self._multi:
+                value = frozenset(value or ())
+                for element in value:
+                    index.setdefault(element, {})[obj.id] = None
+            else:
+                index.setdefault(value, {})[obj.id] = None
+            values[attr] = value
+        self._indexed_values[obj.id] = values
+
+        range_values = {}
+        for attr, (keys, obj_ids) in self._ranges.items():
+            value = _extract(obj, attr)
+            if value is None:
+                continue
+            pos = bisect_right(keys, value)
+            keys.insert(pos, value)
+            obj_ids.insert(pos, obj.id)
+            range_values[attr] = value
+        self._range_values[obj.id] = range_values
+
+    def _unindex(self, obj_id):
+        values = self._indexed_values.pop(obj_id, {})
+        for attr, index in self._unique.items():
+            if attr in values and index.get(values[attr]) == obj_id:
+                del index[values[attr]]
+        for attr, index in self._indexes.items():
+            if attr not in values:
+                continue
+            keys = values[attr] if attr in self._multi else (values[attr],)
+            for key in keys:
+                obj_ids = index.get(key)
+                if obj_ids is not None:
+                    obj_ids.pop(obj_id, None)
+                    if not obj_ids:
+                        del index[key]
+
+        range_values = self._range_values.pop(obj_id, {})
+        for attr, value in range_values.items():
+            keys, obj_ids = self._ranges[attr]
+            start = bisect_left(keys, value)
+            end = bisect_right(keys, value)
+            pos = obj_ids.index(obj_id, start, end)
+            del keys[pos]
+            del obj_ids[pos]
+
+
+def _in_range(value, low, high):
+    if value is None:
+        return False
+    return (low is None or value >= low) and (high is None or value <= high)
+
+
+def _extract(obj, attr_path):
+    """Read a possibly dotted attribute path ('owner.id'); None if absent."""
+    try:
+        return attrgetter(attr_path)(obj)
+    except AttributeError:
+        return None
+
 
 class SQLAlchemyRepository(Repository):
     """SQLAlchemy-based repository for database persistence"""
+
+    # Rows per executemany batch used by add_many()/upsert_many()
+    BULK_CHUNK_SIZE = 1000
+    # Maximum number of ids bound into a single IN (...) by get_many()
+    IN_CHUNK_SIZE = 500
+    # Page size used by get_page() when none is requested, and its hard cap
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+    # Many-to-many relationships whose association rows add_many() writes
+    bulk_associations = ()
+    # Columns upsert_many() never overwrites on existing rows
+    upsert_preserved = ('created_at',)
     
     def __init__(self, model):
         """
@@ -81,28 +396,117 @@ class SQLAlchemyRepository(Repository):
         """
         from hbnb.app import db
         db.session.add(obj)
-        db.session.commit()
+        flush_or_commit()
     
-    def get(self, obj_id):
+    def load_profiles(self):
+        """
+        Named sets of loader options (joinedload/selectinload) that
+        get()/get_all()/get_page() can apply, e.g. {'list': (...)}.
+        Override in subclasses.
+        """
+        return {}
+
+    def _read_session(self):
+        from hbnb.app.persistence.replica import read_session
+        return read_session()
+
+    def _query(self):
+        """Query for read-only operations, routed to the read replica if any."""
+        return self._read_session().query(self.model)
+
+    def _options(self, profile, fields=None):
+        if fields is not None:
+            return self.projection(fields)
+        if profile is None:
+            return ()
+        profiles = self.load_profiles()
+        if profile not in profiles:
+            raise ValueError(
+                f"Unknown load profile '{profile}' for {self.model.__name__}")
+        return profiles[profile]
+
+    def projection(self, fields):
+        """
+        Loader options loading only the given model attributes.
+
+        Columns not named are left out of the SELECT (the primary key is
+        always loaded) and relationships not named are not loaded at all;
+        named relationships are eager-loaded, many-to-one ones joined and
+        collections with an IN query. Passing fields to a read method
+        replaces its load profile.
+
+        Args:
+            fields: Iterable of column and relationship attribute names
+        """
+        fields = set(fields)
+        mapper = sa_inspect(self.model)
+        columns = [
+            getattr(self.model, attr.key)
+            for attr in mapper.column_attrs
+            if attr.key in fields or attr.columns[0].primary_key
+        ]
+        options = [load_only(*columns)]
+        for rel in mapper.relationships:
+            attr = getattr(self.model, rel.key)
+            if rel.key not in fields:
+                options.append(lazyload(attr))
+            elif rel.uselist:
+                options.append(selectinload(attr))
+            else:
+                options.append(joinedload(attr))
+        return tuple(options)
+
+    def get(self, obj_id, profile=None, fields=None):
         """
         Retrieve an object by its ID.
         
         Args:
             obj_id: The unique identifier of the object
+            profile: Optional load profile name (see load_profiles())
+            fields: Optional attribute names to load (see projection())
             
         Returns:
             Object instance or None if not found
         """
-        return self.model.query.get(obj_id)
+        return self._read_session().get(
+            self.model, obj_id, options=self._options(profile, fields))
     
-    def get_all(self):
+    def get_many(self, obj_ids, profile=None, fields=None):
+        """
+        Retrieve several objects by ID with a single IN query.
+
+        Args:
+            obj_ids: Iterable of identifiers (duplicates are ignored)
+            profile: Optional load profile name (see load_profiles())
+            fields: Optional attribute names to load (see projection())
+
+        Returns:
+            Tuple (objects, missing_ids): objects in the order of obj_ids,
+            and the ids that matched no row
+        """
+        obj_ids = list(dict.fromkeys(obj_ids))
+        found = {}
+        for chunk in _chunks(obj_ids, self.IN_CHUNK_SIZE):
+            query = (self._query()
+                     .options(*self._options(profile, fields))
+                     .filter(self.model.id.in_(chunk)))
+            found.update((obj.id, obj) for obj in query)
+        objs = [found[obj_id] for obj_id in obj_ids if obj_id in found]
+        missing = [obj_id for obj_id in obj_ids if obj_id not in found]
+        return objs, missing
+
+    def get_all(self, profile=None, fields=None):
         """
         Retrieve all objects of this model type.
         
+        Args:
+            profile: Optional load profile name (see load_profiles())
+            fields: Optional attribute names to load (see projection())
+
         Returns:
             List of all objects
         """
-        return self.model.query.all()
+        return self._query().options(*self._options(profile, fields)).all()
     
     def update(self, obj_id, data):
         """
@@ -113,11 +517,11 @@ class SQLAlchemyRepository(Repository):
             data: Dictionary of attributes to update
         """
         from hbnb.app import db
-        obj = self.get(obj_id)
+        obj = db.session.get(self.model, obj_id)
         if obj:
             for key, value in data.items():
                 setattr(obj, key, value)
-            db.session.commit()
+            flush_or_commit()
     
     def delete(self, obj_id):
         """
@@ -127,10 +531,10 @@ class SQLAlchemyRepository(Repository):
             obj_id: The unique identifier of the object
         """
         from hbnb.app import db
-        obj = self.get(obj_id)
+        obj = db.session.get(self.model, obj_id)
         if obj:
             db.session.delete(obj)
-            db.session.commit()
+            flush_or_commit()
     
     def get_by_attribute(self, attr_name, attr_value):
         """
@@ -143,4 +547,205 @@ class SQLAlchemyRepository(Repository):
         Returns:
             First matching object or None
         """
-        return self.model.query.filter_by(**{attr_name: attr_value}).first()
+        return self._query().filter_by(**{attr_name: attr_value}).first()
+
+    def get_page(self, limit=None, cursor=None, profile=None, fields=None,
+                 criteria=(), **filters):
+        """
+        Retrieve one page of objects using keyset (cursor) pagination.
+
+        Rows are ordered by primary key, so each page is an index range scan
+        starting right after the previous page, whatever its depth.
+
+        Args:
+            limit: Page size, clamped to MAX_PAGE_SIZE (default DEFAULT_PAGE_SIZE)
+            cursor: Opaque token returned with the previous page, or None
+            profile: Optional load profile name (see load_profiles())
+            fields: Optional attribute names to load (see projection())
+            criteria: Optional SQL expressions the rows must all match
+            **filters: Optional column equality filters (e.g. place_id=...)
+
+        Returns:
+            Tuple (objects, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If limit is not positive or cursor is malformed
+        """
+        limit = self.page_limit(limit)
+        query = (self._query()
+                 .options(*self._options(profile, fields))
+                 .filter(*criteria)
+                 .filter_by(**filters)
+                 .order_by(self.model.id))
+        if cursor:
+            query = query.filter(self.model.id > decode_cursor(cursor))
+
+        # Fetch one extra row to know whether another page follows
+        objs = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(objs) > limit:
+            objs = objs[:limit]
+            next_cursor = encode_cursor(objs[-1].id)
+        return objs, next_cursor
+
+    def page_limit(self, limit):
+        """Validate a requested page size and apply the default and cap."""
+        if limit is None:
+            limit = self.DEFAULT_PAGE_SIZE
+        if limit < 1:
+            raise ValueError("limit must be a positive integer")
+        return min(limit, self.MAX_PAGE_SIZE)
+
+    def add_many(self, objs, chunk_size=None):
+        """
+        Insert many objects at once with chunked executemany INSERTs.
+
+        Rows are built straight from the objects' column attributes and sent
+        as Core statements, skipping the per-object ORM flush. Association
+        rows of the relationships listed in bulk_associations are inserted
+        too. Everything runs in one transaction (joining an open UnitOfWork).
+        Missing ids and timestamps are filled in on the objects, which are
+        not attached to the session.
+
+        Args:
+            objs: Iterable of model instances
+            chunk_size: Rows per executemany batch (default BULK_CHUNK_SIZE)
+
+        Returns:
+            Number of objects inserted
+        """
+        return self._bulk_write(objs, chunk_size, upsert=False)
+
+    def upsert_many(self, objs, chunk_size=None):
+        """
+        Insert many objects, updating the rows whose primary key exists.
+
+        Same bulk path as add_many(), but uses INSERT ... ON CONFLICT DO
+        UPDATE (the upsert_preserved columns, created_at by default, keep
+        their stored values). Existing association rows are left in place;
+        new ones are added.
+
+        Args:
+            objs: Iterable of model instances
+            chunk_size: Rows per executemany batch (default BULK_CHUNK_SIZE)
+
+        Returns:
+            Number of objects written
+        """
+        return self._bulk_write(objs, chunk_size, upsert=True)
+
+    def _bulk_write(self, objs, chunk_size, upsert):
+        from hbnb.app import db
+        objs = list(objs)
+        if not objs:
+            return 0
+        chunk_size = chunk_size or self.BULK_CHUNK_SIZE
+
+        table = self.model.__table__
+        rows = [self._bulk_row(obj) for obj in objs]
+        links = self._bulk_links(objs)
+
+        if upsert:
+            stmt = _dialect_insert(table)
+            keys = {c.name for c in table.primary_key.columns}
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(keys),
+                set_={
+                    c.name: stmt.excluded[c.name]
+                    for c in table.columns
+                    if c.name not in keys
+                    and c.name not in self.upsert_preserved
+                },
+            )
+        else:
+            stmt = table.insert()
+
+        with UnitOfWork():
+            for chunk in _chunks(rows, chunk_size):
+                db.session.execute(stmt, chunk)
+            for secondary, link_rows in links.items():
+                link_stmt = _dialect_insert(secondary).on_conflict_do_nothing()
+                for chunk in _chunks(link_rows, chunk_size):
+                    db.session.execute(link_stmt, chunk)
+            self._bulk_written(objs)
+        return len(objs)
+
+    def _bulk_written(self, objs):
+        """
+        Called inside the transaction of add_many()/upsert_many() with the
+        objects written. Bulk writes skip the mapper events: override to
+        mirror them into in-memory indexes.
+        """
+
+    def _bulk_row(self, obj):
+        """Build the column dict of obj, filling in column defaults."""
+        row = {}
+        for attr in sa_inspect(self.model).column_attrs:
+            column = attr.columns[0]
+            value = getattr(obj, attr.key, None)
+            if value is None and column.default is not None:
+                default = column.default
+                value = default.arg(None) if default.is_callable else default.arg
+                setattr(obj, attr.key, value)
+            row[column.name] = value
+        return row
+
+    def _bulk_links(self, objs):
+        """Collect association rows for the bulk_associations relationships."""
+        links = {}
+        mapper = sa_inspect(self.model)
+        for key in self.bulk_associations:
+            rel = mapper.relationships[key]
+            rows = links.setdefault(rel.secondary, [])
+            for obj in objs:
+                if key not in obj.__dict__:
+                    continue
+                parent = {
+                    sec.name: getattr(obj, mapper.get_property_by_column(col).key)
+                    for col, sec in rel.synchronize_pairs
+                }
+                for target in getattr(obj, key):
+                    row = dict(parent)
+                    row.update({
+                        sec.name: getattr(
+                            target, rel.mapper.get_property_by_column(col).key)
+                        for col, sec in rel.secondary_synchronize_pairs
+                    })
+                    rows.append(row)
+        return {secondary: rows for secondary, rows in links.items() if rows}
+
+
+def encode_cursor(key):
+    """Encode the last key of a page as an opaque, URL-safe cursor."""
+    raw = json.dumps({"k": key}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor(), or raise ValueError."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded))["k"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError("invalid cursor")
+    if not isinstance(key, str):
+        raise ValueError("invalid cursor")
+    return key
+
+
+def _chunks(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _dialect_insert(table):
+    """Return a dialect INSERT supporting ON CONFLICT for the bound engine."""
+    from hbnb.app import db
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f"ON CONFLICT is not supported on {dialect}")
+    return insert(table)
@@ -0,0 +1,72 @@
+"""
+Additive upgrades for databases created by an older db.create_all().
+
+create_all() creates missing tables but never alters existing ones, and the
+project has no migration tool. upgrade_schema() adds the model columns an
+existing table lacks (ALTER TABLE ... ADD COLUMN) and the missing indexes,
+then backfills what the new columns derive from other rows. A unique index
+the stored rows violate is skipped with a warning. On SQLite the places
+spatial and full-text indexes (places_rtree, places_fts) are created and
+filled if missing.
+"""
+from flask import current_app
+from sqlalchemy import inspect as sa_inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateColumn
+
+
+def upgrade_schema(db):
+    """
+    Bring the primary database's existing tables up to the models.
+
+    Must run inside an application context, after the models are imported.
+    Tables that do not exist yet are left to create_all().
+
+    Returns:
+        Dict {table name: [added column names]}
+    """
+    engine = db.engine
+    existing = set(sa_inspect(engine).get_table_names())
+    added = {}
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing:
+                continue
+            present = {
+                column['name']
+                for column in sa_inspect(conn).get_columns(table.name)
+            }
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {ddl}'))
+                added.setdefault(table.name, []).append(column.name)
+
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        for index in table.indexes:
+            try:
+                with engine.begin() as conn:
+                    index.create(conn, checkfirst=True)
+            except IntegrityError as e:
+                # A unique index the existing rows violate: keep serving,
+                # the rows need cleaning up first
+                current_app.logger.warning(
+                    'Cannot create index %s: %s', index.name, e.orig)
+
+    if 'places' in existing and engine.dialect.name == 'sqlite':
+        from hbnb.app.persistence.search import ensure_search_index
+        from hbnb.app.persistence.spatial import ensure_spatial_index
+        with engine.begin() as conn:
+            ensure_spatial_index(conn)
+            ensure_search_index(conn)
+
+    if added.get('places'):
+        from hbnb.app.services.repositories.place_repository import (
+            RATING_COLUMNS, PlaceRepository)
+        if set(added['places']) & set(RATING_COLUMNS):
+            PlaceRepository().refresh_ratings()
+            db.session.commit()
+    return added
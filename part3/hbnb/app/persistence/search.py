@@ -0,0 +1,125 @@
+"""
+Full-text index of the places' titles and descriptions.
+
+On SQLite an FTS5 external-content table, places_fts, indexes places.title
+and places.description by the places rowid (the text itself stays in
+places). Triggers on places keep it in step with every insert, title or
+description update and delete, whichever code path writes. Prefix indexes
+on 2 and 3 characters keep prefix queries ("sea*") cheap, and results are
+ranked with BM25, matches in the title weighing TITLE_WEIGHT times more
+than matches in the description. Other databases fall back to substring
+matching without ranking (see PlaceRepository.search_statement()).
+
+VACUUM may renumber the rowids of places: run `flask rebuild-search-index`
+after one, or to index a database the triggers were not installed on.
+"""
+import re
+
+from sqlalchemy import (
+    DDL, Column, Integer, MetaData, Table, Text, event, func, literal_column,
+    text)
+
+# BM25 weights of the indexed columns
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+# Kept out of db.metadata: create_all() must not create it as a plain table
+places_fts = Table(
+    'places_fts', MetaData(),
+    Column('rowid', Integer, primary_key=True),     # places.rowid
+    Column('title', Text), Column('description', Text),
+)
+
+_CREATE_SEARCH_INDEX = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS places_fts USING fts5("
+    "title, description, content='places', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS places_fts_insert "
+    "AFTER INSERT ON places BEGIN "
+    "INSERT INTO places_fts(rowid, title, description) "
+    "VALUES (new.rowid, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS places_fts_update "
+    "AFTER UPDATE OF title, description ON places BEGIN "
+    "INSERT INTO places_fts(places_fts, rowid, title, description) "
+    "VALUES ('delete', old.rowid, old.title, old.description); "
+    "INSERT INTO places_fts(rowid, title, description) "
+    "VALUES (new.rowid, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS places_fts_delete "
+    "AFTER DELETE ON places BEGIN "
+    "INSERT INTO places_fts(places_fts, rowid, title, description) "
+    "VALUES ('delete', old.rowid, old.title, old.description); END",
+)
+
+_DROP_SEARCH_INDEX = "DROP TABLE IF EXISTS places_fts"
+
+# "quoted phrase" or word, optionally followed by * (prefix)
+_TERM = re.compile(r'"([^"]*)"(\*?)|(\w+)(\*?)')
+
+
+def attach_search_index(places_table):
+    """Create and drop the FTS5 index with the places table (SQLite only)."""
+    for statement in _CREATE_SEARCH_INDEX:
+        event.listen(places_table, 'after_create',
+                     DDL(statement).execute_if(dialect='sqlite'))
+    event.listen(places_table, 'before_drop',
+                 DDL(_DROP_SEARCH_INDEX).execute_if(dialect='sqlite'))
+
+
+def ensure_search_index(conn):
+    """
+    Create the FTS5 index and its triggers on an existing SQLite database.
+
+    A newly created index is filled from places. Returns True if it was
+    created.
+    """
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE name = 'places_fts'")).first()
+    for statement in _CREATE_SEARCH_INDEX:
+        conn.execute(text(statement))
+    if not exists:
+        rebuild_search_index(conn)
+    return not exists
+
+
+def rebuild_search_index(conn):
+    """Re-index every place. Returns the number of places."""
+    conn.execute(text("INSERT INTO places_fts(places_fts) VALUES ('rebuild')"))
+    return conn.execute(text("SELECT count(*) FROM places")).scalar()
+
+
+def search_terms(query):
+    """
+    Parse a search box query into (words, prefix) terms.
+
+    Words are matched in any order and must all be present; a quoted
+    "phrase" must appear as is, and a trailing * matches any word starting
+    with the term (sea* finds "seaside").
+
+    Returns:
+        List of (list of words, prefix flag)
+
+    Raises:
+        ValueError: If the query holds no word
+    """
+    terms = []
+    for phrase, phrase_star, word, word_star in _TERM.findall(query or ''):
+        words = re.findall(r'\w+', phrase) if phrase else [word]
+        if words:
+            terms.append((words, bool(phrase_star or word_star)))
+    if not terms:
+        raise ValueError("q must contain at least one word")
+    return terms
+
+
+def match_expression(terms):
+    """FTS5 MATCH expression of search_terms(), safe from query syntax."""
+    return ' '.join(
+        '"{}"{}'.format(' '.join(words), '*' if prefix else '')
+        for words, prefix in terms
+    )
+
+
+def bm25_score():
+    """BM25 rank of the current places_fts match (lower is better)."""
+    return func.bm25(literal_column('places_fts'), TITLE_WEIGHT,
+                     DESCRIPTION_WEIGHT)
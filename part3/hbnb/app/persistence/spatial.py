@@ -0,0 +1,137 @@
+"""
+Spatial index of the places' coordinates.
+
+On SQLite an R*Tree virtual table, places_rtree, holds one point box per
+place keyed by the places rowid. Triggers on places keep it in step with
+every insert, coordinate update and delete, whichever code path writes
+(ORM, bulk INSERT, upsert), so a box query reads a few R*Tree pages instead
+of scanning places. Other databases fall back to range criteria on the
+latitude/longitude columns (see PlaceRepository.box_criteria()).
+
+The R*Tree stores 32-bit floats, rounded outwards, so it only selects
+candidates; exact coordinates are checked afterwards. VACUUM may renumber
+the rowids of places: run `flask rebuild-spatial-index` after one.
+"""
+import heapq
+import math
+
+from sqlalchemy import DDL, Column, Float, Integer, MetaData, Table, event, text
+
+# Mean Earth radius (IUGG)
+EARTH_RADIUS_KM = 6371.0088
+
+# Kept out of db.metadata: create_all() must not create it as a plain table
+places_rtree = Table(
+    'places_rtree', MetaData(),
+    Column('id', Integer, primary_key=True),    # places.rowid
+    Column('min_lat', Float), Column('max_lat', Float),
+    Column('min_lon', Float), Column('max_lon', Float),
+)
+
+_CREATE_SPATIAL_INDEX = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS places_rtree "
+    "USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+    "CREATE TRIGGER IF NOT EXISTS places_rtree_insert "
+    "AFTER INSERT ON places BEGIN "
+    "INSERT INTO places_rtree VALUES (new.rowid, new.latitude, new.latitude, "
+    "new.longitude, new.longitude); END",
+    "CREATE TRIGGER IF NOT EXISTS places_rtree_update "
+    "AFTER UPDATE OF latitude, longitude ON places BEGIN "
+    "UPDATE places_rtree SET min_lat = new.latitude, max_lat = new.latitude, "
+    "min_lon = new.longitude, max_lon = new.longitude "
+    "WHERE id = new.rowid; END",
+    "CREATE TRIGGER IF NOT EXISTS places_rtree_delete "
+    "AFTER DELETE ON places BEGIN "
+    "DELETE FROM places_rtree WHERE id = old.rowid; END",
+)
+
+_DROP_SPATIAL_INDEX = "DROP TABLE IF EXISTS places_rtree"
+
+
+def attach_spatial_index(places_table):
+    """Create and drop the R*Tree with the places table (SQLite only)."""
+    for statement in _CREATE_SPATIAL_INDEX:
+        event.listen(places_table, 'after_create',
+                     DDL(statement).execute_if(dialect='sqlite'))
+    event.listen(places_table, 'before_drop',
+                 DDL(_DROP_SPATIAL_INDEX).execute_if(dialect='sqlite'))
+
+
+def ensure_spatial_index(conn):
+    """
+    Create the R*Tree and its triggers on an existing SQLite database.
+
+    A newly created R*Tree is filled from places. Returns True if it was
+    created.
+    """
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE name = 'places_rtree'")).first()
+    for statement in _CREATE_SPATIAL_INDEX:
+        conn.execute(text(statement))
+    if not exists:
+        rebuild_spatial_index(conn)
+    return not exists
+
+
+def rebuild_spatial_index(conn):
+    """Refill the R*Tree from places. Returns the number of places."""
+    conn.execute(places_rtree.delete())
+    result = conn.execute(text(
+        "INSERT INTO places_rtree SELECT rowid, latitude, latitude, "
+        "longitude, longitude FROM places"))
+    return result.rowcount
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km between two points given in degrees."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = (math.sin(dphi / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def split_box(min_lat, max_lat, min_lon, max_lon):
+    """
+    Boxes (min_lat, max_lat, min_lon, max_lon) within -180..180 covering a
+    box whose longitudes may run past +/-180 (across the antimeridian).
+    """
+    if max_lon - min_lon >= 360:
+        return [(min_lat, max_lat, -180.0, 180.0)]
+    if min_lon < -180:
+        return [(min_lat, max_lat, min_lon + 360, 180.0),
+                (min_lat, max_lat, -180.0, max_lon)]
+    if max_lon > 180:
+        return [(min_lat, max_lat, min_lon, 180.0),
+                (min_lat, max_lat, -180.0, max_lon - 360)]
+    return [(min_lat, max_lat, min_lon, max_lon)]
+
+
+def radius_boxes(lat, lon, radius_km):
+    """Boxes (see split_box()) covering the circle of radius_km around a point."""
+    angle = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angle)
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90 or angle >= math.pi / 2:
+        # The circle reaches a pole: every longitude
+        return [(max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0)]
+    # Widest longitude span of the circle (reached north or south of lat)
+    ratio = math.sin(angle) / math.cos(math.radians(lat))
+    if ratio >= 1:
+        return [(min_lat, max_lat, -180.0, 180.0)]
+    dlon = math.degrees(math.asin(ratio))
+    return split_box(min_lat, max_lat, lon - dlon, lon + dlon)
+
+
+def nearest_rows(rows, lat, lon, k):
+    """
+    [(place_id, distance_km)] of the k (id, latitude, longitude) rows
+    nearest to a point, nearest first: the full scan PlaceIndex avoids.
+    """
+    return [
+        (place_id, distance)
+        for distance, place_id in heapq.nsmallest(k, (
+            (haversine_km(lat, lon, place_lat, place_lon), place_id)
+            for place_id, place_lat, place_lon in rows))
+    ]
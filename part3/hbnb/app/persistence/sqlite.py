@@ -0,0 +1,43 @@
+"""
+SQLite connection tuning.
+
+PRAGMAs such as journal_mode or synchronous are per-connection settings, so
+they are applied from an engine "connect" event to every new DBAPI
+connection the pool opens.
+"""
+import re
+
+from sqlalchemy import event
+
+_PRAGMA_NAME_RE = re.compile(r"^[a-z_]+$")
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """
+    Run the given PRAGMAs on every new connection of a SQLite engine.
+
+    Args:
+        engine: SQLAlchemy engine (ignored unless its dialect is sqlite)
+        pragmas: Mapping of pragma name to value, e.g. {'synchronous': 'NORMAL'}
+    """
+    if not pragmas or engine.dialect.name != "sqlite":
+        return
+
+    statements = []
+    for name, value in pragmas.items():
+        if not _PRAGMA_NAME_RE.match(name):
+            raise ValueError(f"Invalid SQLite pragma name: {name}")
+        if not isinstance(value, (int, str)) or (
+            isinstance(value, str) and not value.isalnum()
+        ):
+            raise ValueError(f"Invalid value for SQLite pragma {name}: {value!r}")
+        statements.append(f"PRAGMA {name}={value}")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
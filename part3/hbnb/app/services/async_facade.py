@@ -0,0 +1,211 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+
+from hbnb.app.models.place import Place
+from hbnb.app.persistence.async_repository import (
+    AsyncSQLAlchemyRepository, AsyncUnitOfWork, async_transactional,
+    current_async_session)
+from hbnb.app.persistence.spatial import nearest_rows
+from hbnb.app.services.repositories.amenity_repository import AmenityRepository
+from hbnb.app.services.repositories.place_repository import (
+    PlaceRepository, page_of_ranked, pair_ranked)
+from hbnb.app.services.repositories.review_repository import ReviewRepository
+from hbnb.app.services.repositories.user_repository import UserRepository
+
+
+class AsyncHBnBFacade:
+    """
+    asyncio variant of HBnBFacade for the ASGI serving mode.
+
+    Covers the read side (the GET endpoints) and login: each call awaits the
+    database instead of holding a thread, and bcrypt runs in a dedicated
+    thread pool (bcrypt releases the GIL while hashing). Writes are still
+    made through HBnBFacade, by the Flask application the ASGI app forwards
+    the other requests to.
+
+    Unlike HBnBFacade this is not a singleton: it is bound to the session
+    factory (engine) and PlaceIndex it is given.
+    """
+
+    def __init__(self, session_factory, bcrypt_workers=None,
+                 place_index=None):
+        self.session_factory = session_factory
+        self.place_index = place_index
+        self.user_repo = AsyncSQLAlchemyRepository(UserRepository())
+        self.place_repo = AsyncSQLAlchemyRepository(PlaceRepository())
+        self.review_repo = AsyncSQLAlchemyRepository(ReviewRepository())
+        self.amenity_repo = AsyncSQLAlchemyRepository(AmenityRepository())
+        self._bcrypt_pool = ThreadPoolExecutor(
+            max_workers=bcrypt_workers, thread_name_prefix='bcrypt')
+
+    @property
+    def dialect(self):
+        """Name of the database dialect, e.g. 'sqlite'"""
+        return self.session_factory.kw['bind'].dialect.name
+
+    def unit_of_work(self):
+        """Group several awaited facade calls into one transaction."""
+        return AsyncUnitOfWork(self.session_factory)
+
+    async def close(self):
+        """Stop the bcrypt pool and close the engine's connections."""
+        self._bcrypt_pool.shutdown(wait=False)
+        await self.session_factory.kw['bind'].dispose()
+
+    async def _run_in_pool(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._bcrypt_pool, func, *args)
+
+    # ===== Users =====
+
+    @async_transactional
+    async def get_user(self, user_id, fields=None):
+        """Get a user by ID"""
+        return await self.user_repo.get(user_id, fields=fields)
+
+    @async_transactional
+    async def get_users_page(self, limit=None, cursor=None, fields=None):
+        """Get one page of users and the cursor of the next page"""
+        return await self.user_repo.get_page(limit, cursor, fields=fields)
+
+    @async_transactional
+    async def get_user_by_email(self, email):
+        """Get a user by email"""
+        return await self.user_repo.get_by_attribute('email', email)
+
+    async def authenticate(self, email, password):
+        """
+        Return the user with this email and password, or None.
+
+        The bcrypt check runs in the thread pool, so other requests keep
+        being served meanwhile.
+        """
+        user = await self.get_user_by_email(email)
+        if not user:
+            return None
+        if not await self._run_in_pool(user.verify_password, password):
+            return None
+        return user
+
+    # ===== Places =====
+
+    @async_transactional
+    async def get_place(self, place_id, profile='list', fields=None):
+        """Get a place by ID (profile: see PlaceRepository.load_profiles())"""
+        return await self.place_repo.get(place_id, profile=profile,
+                                         fields=fields)
+
+    @async_transactional
+    async def get_places_page(self, limit=None, cursor=None, profile='list',
+                              fields=None, filters=None):
+        """Get one page of places (filters: see HBnBFacade.get_places_page())"""
+        criteria = self.place_repo.repository.filter_criteria(
+            dialect=self.dialect, **(filters or {}))
+        return await self.place_repo.get_page(limit, cursor, profile=profile,
+                                              fields=fields, criteria=criteria)
+
+    @async_transactional
+    async def get_places_near(self, lat, lon, radius_km, limit=None,
+                              cursor=None, profile='list', fields=None,
+                              filters=None):
+        """Get one page of nearby places (see HBnBFacade.get_places_near())"""
+        repo = self.place_repo.repository
+        criteria = repo.filter_criteria(dialect=self.dialect,
+                                        **(filters or {}))
+        rows = await current_async_session().execute(repo.nearby_statement(
+            lat, lon, radius_km, criteria, dialect=self.dialect))
+        ranked, next_cursor = repo.rank_nearby(
+            rows, lat, lon, radius_km, limit, cursor)
+        places, _ = await self.place_repo.get_many(
+            [place_id for place_id, _ in ranked],
+            profile=profile, fields=fields)
+        return pair_ranked(places, ranked), next_cursor
+
+    @async_transactional
+    async def get_nearest_places(self, lat, lon, k=None, profile='list',
+                                 fields=None):
+        """Get the k closest places (see HBnBFacade.get_nearest_places())"""
+        k = self.place_repo.repository.nearest_limit(k)
+        if self.place_index is not None:
+            ranked = self.place_index.nearest(lat, lon, k)
+        else:
+            rows = await current_async_session().execute(
+                select(Place.id, Place.latitude, Place.longitude))
+            ranked = nearest_rows(rows, lat, lon, k)
+        places, _ = await self.place_repo.get_many(
+            [place_id for place_id, _ in ranked],
+            profile=profile, fields=fields)
+        return pair_ranked(places, ranked)
+
+    @async_transactional
+    async def get_top_rated_places(self, limit=None, cursor=None,
+                                   profile='list', fields=None, filters=None):
+        """Get one page of places by rating (see HBnBFacade)"""
+        repo = self.place_repo.repository
+        limit = repo.page_limit(limit)
+        criteria = repo.filter_criteria(dialect=self.dialect,
+                                        **(filters or {}))
+        rows = await current_async_session().execute(
+            repo.rated_statement(limit, cursor, criteria))
+        ranked, next_cursor = page_of_ranked(rows, limit)
+        places, _ = await self.place_repo.get_many(
+            [place_id for place_id, _ in ranked],
+            profile=profile, fields=fields)
+        return [place for place, _ in pair_ranked(places, ranked)], next_cursor
+
+    @async_transactional
+    async def search_places(self, query, limit=None, cursor=None,
+                            profile='list', fields=None):
+        """Get one page of matching places (see HBnBFacade.search_places())"""
+        repo = self.place_repo.repository
+        limit = repo.page_limit(limit)
+        rows = await current_async_session().execute(repo.search_statement(
+            query, limit, cursor, dialect=self.dialect))
+        ranked, next_cursor = page_of_ranked(rows, limit)
+        places, _ = await self.place_repo.get_many(
+            [place_id for place_id, _ in ranked],
+            profile=profile, fields=fields)
+        return [place for place, _ in pair_ranked(places, ranked)], next_cursor
+
+    # ===== Amenities =====
+
+    @async_transactional
+    async def get_amenity(self, amenity_id, fields=None):
+        """Get an amenity by ID"""
+        return await self.amenity_repo.get(amenity_id, fields=fields)
+
+    @async_transactional
+    async def get_amenities_page(self, limit=None, cursor=None, fields=None):
+        """Get one page of amenities and the cursor of the next page"""
+        return await self.amenity_repo.get_page(limit, cursor, fields=fields)
+
+    # ===== Reviews =====
+
+    @async_transactional
+    async def get_review(self, review_id, profile='list', fields=None):
+        """Get a review by ID (profile: see ReviewRepository.load_profiles())"""
+        return await self.review_repo.get(review_id, profile=profile,
+                                          fields=fields)
+
+    @async_transactional
+    async def get_reviews_page(self, limit=None, cursor=None, profile='list',
+                               fields=None):
+        """Get one page of reviews and the cursor of the next page"""
+        return await self.review_repo.get_page(limit, cursor, profile=profile,
+                                               fields=fields)
+
+    @async_transactional
+    async def get_reviews_by_place_page(self, place_id, limit=None,
+                                        cursor=None, profile='list',
+                                        fields=None):
+        """Get one page of a place's reviews and the cursor of the next page"""
+        return await self.review_repo.get_page(
+            limit, cursor, profile=profile, fields=fields, place_id=place_id)
+
+    @async_transactional
+    async def has_reviewed(self, user_id, place_id):
+        """Check whether a user has already reviewed a place"""
+        return await self.review_repo.exists(user_id=user_id,
+                                             place_id=place_id)
@@ -1,3 +1,12 @@
+from contextlib import contextmanager
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
+
+from hbnb.app.persistence.prefix_index import current_prefix_index
+from hbnb.app.persistence.repository import (
+    UnitOfWork, savepoint, transactional)
+from hbnb.app.services.identity_cache import current_identity_cache
 from hbnb.app.services.repositories.user_repository import UserRepository
 from hbnb.app.services.repositories.place_repository import PlaceRepository
 from hbnb.app.services.repositories.review_repository import ReviewRepository
@@ -8,6 +17,10 @@ from hbnb.app.models.place import Place
 from hbnb.app.models.review import Review
 
 
+class DuplicateReviewError(ValueError):
+    """The user has already reviewed the place."""
+
+
 class HBnBFacade:
     """
     Facade pattern implementation for the HBnB application.
@@ -31,8 +44,85 @@ class HBnBFacade:
             self.amenity_repo = AmenityRepository()
             HBnBFacade._repositories_initialized = True
 
+    def unit_of_work(self):
+        """
+        Group several facade calls into one transaction.
+
+        Usage:
+            with facade.unit_of_work():
+                facade.create_amenity(...)
+                facade.create_place(...)
+        """
+        return UnitOfWork()
+
+    # ===== Request-scoped Lookups =====
+
+    def _get(self, repo, obj_id, profile=None, fields=None):
+        """repo.get(), answered from the request's identity cache if loaded"""
+        cache = current_identity_cache()
+        if cache is None:
+            return repo.get(obj_id, profile=profile, fields=fields)
+        return cache.get(repo, obj_id, profile, fields)
+
+    def _get_many(self, repo, obj_ids, profile=None):
+        """repo.get_many(), only querying the ids not loaded in this request"""
+        cache = current_identity_cache()
+        if cache is None:
+            return repo.get_many(obj_ids, profile=profile)
+        return cache.get_many(repo, obj_ids, profile)
+
+    def _remember(self, obj):
+        cache = current_identity_cache()
+        if cache is not None:
+            cache.remember(obj)
+
+    # ===== Bulk Loading Methods =====
+
+    def add_many(self, objs, chunk_size=None):
+        """
+        Bulk-insert users, amenities, places and reviews in one transaction.
+
+        Objects are grouped by type and written in foreign-key order through
+        the repositories' add_many(). Returns the number of objects inserted.
+        """
+        return self._bulk_write(objs, 'add_many', chunk_size)
+
+    def upsert_many(self, objs, chunk_size=None):
+        """Like add_many(), but updates rows whose id already exists"""
+        return self._bulk_write(objs, 'upsert_many', chunk_size)
+
+    def _bulk_write(self, objs, method, chunk_size):
+        # Dict order is the foreign-key order the groups are written in
+        repos = {
+            User: self.user_repo,
+            Amenity: self.amenity_repo,
+            Place: self.place_repo,
+            Review: self.review_repo,
+        }
+        groups = {model: [] for model in repos}
+        for obj in objs:
+            if type(obj) not in groups:
+                raise ValueError(f"Cannot bulk load {type(obj).__name__} objects")
+            groups[type(obj)].append(obj)
+
+        count = 0
+        with self.unit_of_work():
+            # Places whose review aggregates the write changes: the reviews'
+            # new places and, for upserts, the ones they are moved from
+            rated = {review.place_id for review in groups[Review]}
+            if groups[Review] and method == 'upsert_many':
+                rated |= self.review_repo.get_place_ids(
+                    review.id for review in groups[Review] if review.id)
+            for model, group in groups.items():
+                if group:
+                    count += getattr(repos[model], method)(group, chunk_size)
+            if rated:
+                self.place_repo.refresh_ratings(rated)
+        return count
+
     # ===== User Management Methods =====
 
+    @transactional
     def create_user(self, user_data):
         """Create a new user"""
         # Extract password before creating user instance
@@ -41,23 +131,42 @@ class HBnBFacade:
         if password:
             user.hash_password(password)
         self.user_repo.add(user)
+        self._remember(user)
         return user
 
-    def get_user(self, user_id):
-        """Get a user by ID"""
-        return self.user_repo.get(user_id)
+    def get_user(self, user_id, fields=None):
+        """Get a user by ID (fields: see SQLAlchemyRepository.projection())"""
+        return self._get(self.user_repo, user_id, fields=fields)
+
+    def get_users(self, user_ids):
+        """
+        Get several users by ID in one query.
+
+        Returns a tuple (users, missing_ids).
+        """
+        return self._get_many(self.user_repo, user_ids)
 
     def get_all_users(self):
         """Get all users"""
         return self.user_repo.get_all()
 
+    def get_users_page(self, limit=None, cursor=None, fields=None):
+        """Get one page of users and the cursor of the next page"""
+        return self.user_repo.get_page(limit, cursor, fields=fields)
+
+    def has_users(self):
+        """Check whether at least one user exists"""
+        users, _ = self.user_repo.get_page(limit=1)
+        return bool(users)
+
     def get_user_by_email(self, email):
         """Get a user by email"""
         return self.user_repo.get_user_by_email(email)
 
+    @transactional
     def update_user(self, user_id, user_data):
         """Update a user's information"""
-        user = self.user_repo.get(user_id)
+        user = self._get(self.user_repo, user_id)
         if not user:
             return None
 
@@ -76,17 +185,15 @@ class HBnBFacade:
         # Validate the updated user
         user.validate()
         user.save()
-
-        # Update in repository
-        self.user_repo.update(user_id, user_data)
         return user
 
     # ===== Place Management Methods =====
 
+    @transactional
     def create_place(self, place_data):
         """Create a new place with owner and amenities"""
         # Validate owner exists
-        owner = self.user_repo.get(place_data['owner_id'])
+        owner = self._get(self.user_repo, place_data['owner_id'])
         if not owner:
             raise ValueError("Owner not found")
 
@@ -102,25 +209,148 @@ class HBnBFacade:
 
         # Add amenities if provided
         if 'amenities' in place_data and place_data['amenities']:
-            for amenity_id in place_data['amenities']:
-                amenity = self.amenity_repo.get(amenity_id)
-                if amenity:
-                    place.amenities.append(amenity)
+            amenities, _ = self._get_many(
+                self.amenity_repo, place_data['amenities'])
+            place.amenities.extend(amenities)
 
         self.place_repo.add(place)
+        self._remember(place)
         return place
 
-    def get_place(self, place_id):
-        """Get a place by ID"""
-        return self.place_repo.get(place_id)
-
-    def get_all_places(self):
+    @transactional
+    def create_places(self, places_data):
+        """
+        Create several places with one bulk INSERT (see add_many()).
+
+        Owners and amenities are looked up with one query each instead of
+        once per place. Returns the new places in input order, loaded with
+        the 'list' profile.
+        """
+        places_data = list(places_data)
+        if not places_data:
+            return []
+        _, missing = self._get_many(
+            self.user_repo, [data['owner_id'] for data in places_data])
+        if missing:
+            raise ValueError("Owner not found")
+        amenities, missing = self._get_many(self.amenity_repo, [
+            amenity_id
+            for data in places_data
+            for amenity_id in data.get('amenities') or ()
+        ])
+        if missing:
+            raise ValueError(f"Amenity with ID {missing[0]} not found")
+        amenities = {amenity.id: amenity for amenity in amenities}
+
+        places = []
+        for data in places_data:
+            place = Place(
+                title=data['title'],
+                description=data.get('description', ''),
+                price=data['price'],
+                latitude=data['latitude'],
+                longitude=data['longitude'],
+                owner_id=data['owner_id']
+            )
+            # Without attribute events: the backref would queue the
+            # unattached place on the amenities' places collections
+            set_committed_value(place, 'amenities', [
+                amenities[amenity_id]
+                for amenity_id in dict.fromkeys(data.get('amenities') or ())
+            ])
+            places.append(place)
+        self.add_many(places)
+        places, _ = self.get_places([place.id for place in places],
+                                    profile='list')
+        return places
+
+    def get_place(self, place_id, profile='list', fields=None):
+        """
+        Get a place by ID.
+
+        profile selects the eager-loading profile (see
+        PlaceRepository.load_profiles()); pass None for a bare row when only
+        columns are needed. fields, if given, lists the attributes to load
+        instead (see SQLAlchemyRepository.projection()).
+        """
+        return self._get(self.place_repo, place_id, profile=profile,
+                         fields=fields)
+
+    def get_places(self, place_ids, profile=None):
+        """
+        Get several places by ID in one query.
+
+        Returns a tuple (places, missing_ids).
+        """
+        return self._get_many(self.place_repo, place_ids, profile)
+
+    def get_all_places(self, profile='list'):
         """Get all places"""
-        return self.place_repo.get_all()
-
+        return self.place_repo.get_all(profile=profile)
+
+    def get_places_page(self, limit=None, cursor=None, profile='list',
+                        fields=None, filters=None):
+        """
+        Get one page of places and the cursor of the next page.
+
+        filters narrows the places in SQL; its keys are the arguments of
+        PlaceRepository.filter_criteria() (min_price, max_price,
+        amenity_ids, min_rating, owner_id, bbox).
+        """
+        criteria = self.place_repo.filter_criteria(**(filters or {}))
+        return self.place_repo.get_page(limit, cursor, profile=profile,
+                                        fields=fields, criteria=criteria)
+
+    def get_places_near(self, lat, lon, radius_km, limit=None, cursor=None,
+                        profile='list', fields=None, filters=None):
+        """
+        Get one page of the places within radius_km of (lat, lon), nearest
+        first, and the cursor of the next page.
+
+        Returns [(place, distance_km)]; filters as in get_places_page().
+        """
+        criteria = self.place_repo.filter_criteria(**(filters or {}))
+        return self.place_repo.get_nearby(lat, lon, radius_km, limit, cursor,
+                                          profile=profile, fields=fields,
+                                          criteria=criteria)
+
+    def get_nearest_places(self, lat, lon, k=None, profile='list',
+                           fields=None):
+        """Get the k places closest to (lat, lon): [(place, distance_km)]"""
+        return self.place_repo.nearest(lat, lon, k, profile=profile,
+                                       fields=fields)
+
+    def search_places(self, query, limit=None, cursor=None, profile='list',
+                      fields=None):
+        """
+        Get one page of the places matching a full-text query, best first,
+        and the cursor of the next page (see PlaceRepository.search()).
+        """
+        return self.place_repo.search(query, limit, cursor, profile=profile,
+                                      fields=fields)
+
+    def autocomplete(self, prefix, limit=None):
+        """
+        Get the place titles and amenity names having a word that starts
+        with prefix, alphabetically: [(kind, id, label)] (see
+        PrefixIndex.lookup())
+        """
+        return current_prefix_index().lookup(prefix, limit)
+
+    def get_top_rated_places(self, limit=None, cursor=None, profile='list',
+                             fields=None, filters=None):
+        """
+        Get one page of the reviewed places by average rating, best first,
+        and the cursor of the next page (filters: see get_places_page()).
+        """
+        criteria = self.place_repo.filter_criteria(**(filters or {}))
+        return self.place_repo.get_rated_page(
+            limit, cursor, profile=profile, fields=fields, criteria=criteria)
+
+    @transactional
     def update_place(self, place_id, place_data):
         """Update a place's information"""
-        place = self.place_repo.get(place_id)
+        place = self._get(self.place_repo, place_id)
         if not place:
             return None
 
@@ -138,50 +368,60 @@ class HBnBFacade:
 
         # Update owner if provided
         if 'owner_id' in place_data:
-            owner = self.user_repo.get(place_data['owner_id'])
+            owner = self._get(self.user_repo, place_data['owner_id'])
             if not owner:
                 raise ValueError("Owner not found")
             place.owner_id = place_data['owner_id']
 
         # Update amenities if provided
         if 'amenities' in place_data:
-            place.amenities = []
-            for amenity_id in place_data['amenities']:
-                amenity = self.amenity_repo.get(amenity_id)
-                if amenity:
-                    place.amenities.append(amenity)
+            amenities, _ = self._get_many(
+                self.amenity_repo, place_data['amenities'])
+            place.amenities = amenities
 
         # Validate and save
         place.validate()
         place.save()
-
-        # Update in repository
-        self.place_repo.update(place_id, place_data)
         return place
 
     # ===== Amenity Management Methods =====
 
+    @transactional
     def create_amenity(self, amenity_data):
         """Create a new amenity"""
         amenity = Amenity(**amenity_data)
         self.amenity_repo.add(amenity)
+        self._remember(amenity)
         return amenity
 
-    def get_amenity(self, amenity_id):
+    def get_amenity(self, amenity_id, fields=None):
         """Get an amenity by ID"""
-        return self.amenity_repo.get(amenity_id)
+        return self._get(self.amenity_repo, amenity_id, fields=fields)
+
+    def get_amenities(self, amenity_ids):
+        """
+        Get several amenities by ID in one query.
+
+        Returns a tuple (amenities, missing_ids).
+        """
+        return self._get_many(self.amenity_repo, amenity_ids)
 
     def get_all_amenities(self):
         """Get all amenities"""
         return self.amenity_repo.get_all()
 
+    def get_amenities_page(self, limit=None, cursor=None, fields=None):
+        """Get one page of amenities and the cursor of the next page"""
+        return self.amenity_repo.get_page(limit, cursor, fields=fields)
+
     def get_amenity_by_name(self, name):
         """Get an amenity by name"""
         return self.amenity_repo.get_by_attribute('name', name)
 
+    @transactional
     def update_amenity(self, amenity_id, amenity_data):
         """Update an amenity's information"""
-        amenity = self.amenity_repo.get(amenity_id)
+        amenity = self._get(self.amenity_repo, amenity_id)
         if not amenity:
             return None
 
@@ -192,21 +432,19 @@ class HBnBFacade:
         # Validate the updated amenity
         amenity.validate()
         amenity.save()
-
-        # Update in repository
-        self.amenity_repo.update(amenity_id, amenity_data)
         return amenity
 
     # ===== Review Management Methods =====
 
+    @transactional
     def create_review(self, review_data):
         """Create a new review"""
         # Validate that user and place exist
-        user = self.user_repo.get(review_data['user_id'])
+        user = self._get(self.user_repo, review_data['user_id'])
         if not user:
             raise ValueError("User not found")
 
-        place = self.place_repo.get(review_data['place_id'])
+        place = self._get(self.place_repo, review_data['place_id'])
         if not place:
             raise ValueError("Place not found")
 
@@ -218,68 +456,158 @@ class HBnBFacade:
             place_id=review_data['place_id']
         )
 
-        self.review_repo.add(review)
+        with self._unique_reviews([(review.user_id, review.place_id)]):
+            self.review_repo.add(review)
+        self.place_repo.apply_rating(review.place_id, added=review.rating)
+        self._remember(review)
         return review
 
-    def get_review(self, review_id):
-        """Get a review by ID"""
-        return self.review_repo.get(review_id)
+    @transactional
+    def create_reviews(self, reviews_data):
+        """
+        Create several reviews with one bulk INSERT (see add_many()).
+
+        Users and places are looked up with one query each, and the rating
+        aggregates of the reviewed places are refreshed once at the end.
+        Returns the new reviews in input order, loaded with the 'list'
+        profile.
+        """
+        reviews_data = list(reviews_data)
+        if not reviews_data:
+            return []
+        _, missing = self._get_many(
+            self.user_repo, [data['user_id'] for data in reviews_data])
+        if missing:
+            raise ValueError("User not found")
+        _, missing = self._get_many(
+            self.place_repo, [data['place_id'] for data in reviews_data])
+        if missing:
+            raise ValueError("Place not found")
 
-    def get_all_reviews(self):
+        reviews = [
+            Review(
+                text=data['text'],
+                rating=data['rating'],
+                user_id=data['user_id'],
+                place_id=data['place_id']
+            )
+            for data in reviews_data
+        ]
+        with self._unique_reviews(
+                [(review.user_id, review.place_id) for review in reviews]):
+            self.add_many(reviews)
+        reviews, _ = self.review_repo.get_many(
+            [review.id for review in reviews], profile='list')
+        return reviews
+
+    def has_reviewed(self, user_id, place_id):
+        """Check whether a user has already reviewed a place"""
+        return self.review_repo.exists_for(user_id, place_id)
+
+    def get_reviewed_place_ids(self, user_id, place_ids):
+        """Ids among place_ids of the places a user has already reviewed"""
+        return self.review_repo.get_reviewed_place_ids(user_id, place_ids)
+
+    @contextmanager
+    def _unique_reviews(self, pairs):
+        """
+        Run the review writes of the block with the unique (user_id,
+        place_id) index as the final guard: a duplicate of one of the
+        pairs that slipped past has_reviewed() (two concurrent
+        submissions) only rolls back the block's savepoint and raises
+        DuplicateReviewError. The block must flush its changes.
+        """
+        try:
+            with savepoint():
+                yield
+        except IntegrityError:
+            if any(self.has_reviewed(user_id, place_id)
+                   for user_id, place_id in pairs):
+                raise DuplicateReviewError(
+                    "You have already reviewed this place") from None
+            raise
+
+    def get_review(self, review_id, profile='list', fields=None):
+        """Get a review by ID (profile: see ReviewRepository.load_profiles())"""
+        return self._get(self.review_repo, review_id, profile=profile,
+                         fields=fields)
+
+    def get_all_reviews(self, profile='list'):
         """Get all reviews"""
-        return self.review_repo.get_all()
+        return self.review_repo.get_all(profile=profile)
+
+    def get_reviews_page(self, limit=None, cursor=None, profile='list',
+                         fields=None):
+        """Get one page of reviews and the cursor of the next page"""
+        return self.review_repo.get_page(limit, cursor, profile=profile,
+                                         fields=fields)
 
     def get_reviews_by_place(self, place_id):
         """Get all reviews for a specific place"""
-        place = self.place_repo.get(place_id)
+        place = self._get(self.place_repo, place_id)
         if not place:
             return []
         return place.reviews  # Now works with relationships!
 
-    def update_review(self, review_id, review_data):
-        """Update a review's information"""
-        review = self.review_repo.get(review_id)
-        if not review:
-            return None
+    def get_reviews_by_place_page(self, place_id, limit=None, cursor=None,
+                                  profile='list', fields=None):
+        """Get one page of a place's reviews and the cursor of the next page"""
+        return self.review_repo.get_page(limit, cursor, profile=profile,
+                                         fields=fields, place_id=place_id)
 
+    @transactional
     def update_review(self, review_id, review_data):
         """Update a review's information"""
-        review = self.review_repo.get(review_id)
+        review = self._get(self.review_repo, review_id)
         if not review:
             return None
-
-        # Update basic attributes
-        if 'text' in review_data:
-            review.text = review_data['text']
-        if 'rating' in review_data:
-            review.rating = review_data['rating']
-
-        # Validate and update user_id if provided
-        if 'user_id' in review_data:
-            user = self.user_repo.get(review_data['user_id'])
-            if not user:
-                raise ValueError("User not found")
-            review.user_id = review_data['user_id']
-
-        # Validate and update place_id if provided
-        if 'place_id' in review_data:
-            place = self.place_repo.get(review_data['place_id'])
-            if not place:
-                raise ValueError("Place not found")
-            review.place_id = review_data['place_id']
-
-        # Validate and save
-        review.validate()
-        review.save()
-
-        # Update in repository
-        self.review_repo.update(review_id, review_data)
+        old_rating, old_place_id = review.rating, review.place_id
+
+        user_id = review_data.get('user_id', review.user_id)
+        place_id = review_data.get('place_id', review.place_id)
+        with self._unique_reviews([(user_id, place_id)]):
+            # Update basic attributes
+            if 'text' in review_data:
+                review.text = review_data['text']
+            if 'rating' in review_data:
+                review.rating = review_data['rating']
+
+            # Validate and update user_id if provided
+            if 'user_id' in review_data:
+                user = self._get(self.user_repo, review_data['user_id'])
+                if not user:
+                    raise ValueError("User not found")
+                review.user_id = review_data['user_id']
+
+            # Validate and update place_id if provided
+            if 'place_id' in review_data:
+                place = self._get(self.place_repo, review_data['place_id'])
+                if not place:
+                    raise ValueError("Place not found")
+                review.place_id = review_data['place_id']
+
+            # Validate and save
+            review.validate()
+            review.save()
+
+        # Move the rating between places' aggregates, or replace it
+        if review.place_id != old_place_id:
+            self.place_repo.apply_rating(old_place_id, removed=old_rating)
+            self.place_repo.apply_rating(review.place_id, added=review.rating)
+        else:
+            self.place_repo.apply_rating(
+                review.place_id, added=review.rating, removed=old_rating)
         return review
 
+    @transactional
     def delete_review(self, review_id):
         """Delete a review"""
-        review = self.review_repo.get(review_id)
+        review = self._get(self.review_repo, review_id)
         if review:
+            self.place_repo.apply_rating(review.place_id, removed=review.rating)
             self.review_repo.delete(review_id)
+            cache = current_identity_cache()
+            if cache is not None:
+                cache.forget(Review, review_id)
             return True
         return False
@@ -0,0 +1,116 @@
+from flask import current_app, g, has_request_context
+from sqlalchemy import inspect as sa_inspect
+
+from hbnb.app.persistence.replica import read_session
+
+
+class IdentityCache:
+    """
+    Objects already loaded while handling the current request.
+
+    Keyed by (model, id), so the route and the facade can look up the same
+    owner/place/amenities without going back to the database. An entry is
+    only served while the object still belongs to the session reads go to
+    (see read_session()) and has not been deleted; a row read from the
+    replica before a transaction started is therefore loaded again from
+    the primary.
+
+    saved counts the database lookups answered from memory, loaded the
+    ones that went to the database.
+    """
+
+    def __init__(self):
+        self._objects = {}
+        self.saved = 0
+        self.loaded = 0
+
+    def get(self, repo, obj_id, profile=None, fields=None):
+        obj = self._lookup(repo.model, obj_id)
+        if obj is not None:
+            self.saved += 1
+            return obj
+        self.loaded += 1
+        obj = repo.get(obj_id, profile=profile, fields=fields)
+        self.remember(obj)
+        return obj
+
+    def get_many(self, repo, obj_ids, profile=None):
+        """Like repo.get_many(), querying only the ids not cached yet."""
+        obj_ids = list(dict.fromkeys(obj_ids))
+        found = {}
+        for obj_id in obj_ids:
+            obj = self._lookup(repo.model, obj_id)
+            if obj is not None:
+                found[obj_id] = obj
+        uncached = [obj_id for obj_id in obj_ids if obj_id not in found]
+        if uncached:
+            self.loaded += 1
+            objs, _ = repo.get_many(uncached, profile=profile)
+            for obj in objs:
+                self.remember(obj)
+                found[obj.id] = obj
+        elif obj_ids:
+            self.saved += 1
+        objs = [found[obj_id] for obj_id in obj_ids if obj_id in found]
+        missing = [obj_id for obj_id in obj_ids if obj_id not in found]
+        return objs, missing
+
+    def remember(self, obj):
+        if obj is not None:
+            self._objects[(type(obj), obj.id)] = obj
+
+    def forget(self, model, obj_id):
+        self._objects.pop((model, obj_id), None)
+
+    def _lookup(self, model, obj_id):
+        obj = self._objects.get((model, obj_id))
+        if obj is None:
+            return None
+        state = sa_inspect(obj)
+        # read_session() is a scoped_session; calling it gives the Session
+        if (state.session is not read_session()()
+                or state.deleted or state.was_deleted):
+            self.forget(model, obj_id)
+            return None
+        return obj
+
+
+def current_identity_cache():
+    """
+    Return the IdentityCache of the current request.
+
+    None outside a request or when IDENTITY_CACHE is disabled, in which
+    case callers go straight to the repositories.
+    """
+    if not has_request_context():
+        return None
+    if not current_app.config.get('IDENTITY_CACHE', True):
+        return None
+    cache = g.get('identity_cache')
+    if cache is None:
+        cache = g.identity_cache = IdentityCache()
+    return cache
+
+
+def register_identity_cache(app):
+    """
+    Drop each request's IdentityCache at teardown.
+
+    The number of lookups it saved is sent in the X-Identity-Cache-Saved
+    response header and logged at debug level.
+    """
+
+    @app.after_request
+    def report_identity_cache(response):
+        cache = g.get('identity_cache')
+        if cache is not None:
+            response.headers['X-Identity-Cache-Saved'] = str(cache.saved)
+        return response
+
+    @app.teardown_request
+    def clear_identity_cache(exc):
+        cache = g.pop('identity_cache', None)
+        if cache is not None:
+            app.logger.debug(
+                'Identity cache: %d lookups saved, %d loaded',
+                cache.saved, cache.loaded)
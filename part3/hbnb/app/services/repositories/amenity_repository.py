@@ -1,5 +1,6 @@
 """Amenity Repository"""
 from hbnb.app.models.amenity import Amenity
+from hbnb.app.persistence.prefix_index import record_label_write
 from hbnb.app.persistence.repository import SQLAlchemyRepository
 
 
@@ -12,3 +13,9 @@ class AmenityRepository(SQLAlchemyRepository):
     def get_by_name(self, name: str):
         """Get amenity by name"""
         return self.get_by_attribute('name', name)
+
+    def _bulk_written(self, objs):
+        from hbnb.app import db
+        session = db.session()
+        for amenity in objs:
+            record_label_write(session, 'amenity', amenity.id, amenity.name)
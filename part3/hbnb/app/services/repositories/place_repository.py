@@ -1,10 +1,477 @@
 """Place Repository"""
-from hbnb.app.models.place import Place
-from hbnb.app.persistence.repository import SQLAlchemyRepository
+from sqlalchemy import (
+    and_, case, func, literal, literal_column, or_, select, update)
+from sqlalchemy.orm import joinedload, selectinload
+
+from hbnb.app.models import place_amenity
+from hbnb.app.models.place import RATINGS, Place
+from hbnb.app.models.review import Review
+from hbnb.app.persistence.place_index import (
+    current_place_index, record_place_write)
+from hbnb.app.persistence.prefix_index import record_label_write
+from hbnb.app.persistence.repository import (
+    SQLAlchemyRepository, _chunks, decode_cursor, encode_cursor)
+from hbnb.app.persistence.search import (
+    bm25_score, match_expression, places_fts, search_terms)
+from hbnb.app.persistence.spatial import (
+    haversine_km, nearest_rows, places_rtree, radius_boxes, split_box)
+
+RATING_COLUMNS = ('review_count', 'rating_sum', 'rating_avg') + tuple(
+    f'rating_{stars}' for stars in RATINGS)
 
 
 class PlaceRepository(SQLAlchemyRepository):
     """Repository for Place entity with SQLAlchemy"""
 
+    bulk_associations = ('amenities',)
+    # Places returned by nearest() when no k is given
+    DEFAULT_NEAREST = 10
+    # Review aggregates are maintained from the reviews, not by upserts
+    upsert_preserved = ('created_at',) + RATING_COLUMNS
+
     def __init__(self):
         super().__init__(Place)
+
+    def load_profiles(self):
+        """
+        Loader options per endpoint, so a page of places costs a fixed
+        number of queries instead of several per place:
+        - list: owner (joined), amenities and reviews (IN queries), all a
+          list or detail response shows
+        """
+        return {
+            'list': (
+                joinedload(Place.owner),
+                selectinload(Place.amenities),
+                selectinload(Place.reviews),
+            ),
+        }
+
+    def apply_rating(self, place_id, added=None, removed=None):
+        """
+        Count a new rating and/or uncount an old one in a place's aggregates.
+
+        One UPDATE derives the new values from the stored ones, so
+        concurrent reviews of the same place never overwrite each other's
+        counts; loaded copies of the place are refreshed. Runs in the
+        caller's transaction.
+
+        Args:
+            place_id: Place whose aggregates change
+            added: Rating (1..5) of a review created or moved to the place
+            removed: Rating of a review deleted or moved away from it
+        """
+        from hbnb.app import db
+        if added == removed:
+            return
+        count_delta = (added is not None) - (removed is not None)
+        sum_delta = (added or 0) - (removed or 0)
+        count = Place.review_count + count_delta
+        total = Place.rating_sum + sum_delta
+        values = {
+            Place.review_count: count,
+            Place.rating_sum: total,
+            Place.rating_avg: case(
+                (count > 0, total * 1.0 / count), else_=None),
+            # Not a change of the place itself: keep its updated_at
+            Place.updated_at: Place.updated_at,
+        }
+        for stars, delta in ((added, 1), (removed, -1)):
+            if stars is not None:
+                column = getattr(Place, f'rating_{stars}')
+                values[column] = values.get(column, column) + delta
+        db.session.execute(
+            update(Place).where(Place.id == place_id).values(values),
+            execution_options={'synchronize_session': 'fetch'},
+        )
+
+    def refresh_ratings(self, place_ids=None):
+        """
+        Recompute review aggregates from the reviews table.
+
+        For rows written around the facade (bulk loads, SQL scripts, schema
+        upgrades). Refreshes the given places, or every place if None.
+        """
+        from hbnb.app import db
+
+        def per_place(expr, *criteria):
+            return (select(expr)
+                    .where(Review.place_id == Place.id, *criteria)
+                    .scalar_subquery())
+
+        values = {
+            Place.review_count: per_place(func.count()),
+            Place.rating_sum: per_place(
+                func.coalesce(func.sum(Review.rating), 0)),
+            Place.rating_avg: per_place(func.avg(Review.rating)),
+            Place.updated_at: Place.updated_at,
+        }
+        for stars in RATINGS:
+            values[getattr(Place, f'rating_{stars}')] = per_place(
+                func.count(), Review.rating == stars)
+
+        stmt = update(Place).values(values)
+        options = {'synchronize_session': 'fetch'}
+        if place_ids is None:
+            db.session.execute(stmt, execution_options=options)
+            return
+        for chunk in _chunks(list(dict.fromkeys(place_ids)),
+                             self.IN_CHUNK_SIZE):
+            db.session.execute(stmt.where(Place.id.in_(chunk)),
+                               execution_options=options)
+
+    def filter_criteria(self, min_price=None, max_price=None,
+                        amenity_ids=None, min_rating=None, owner_id=None,
+                        bbox=None, dialect=None):
+        """
+        SQL criteria selecting the places that match every given filter.
+
+        Each filter is answered by an index: ix_places_price,
+        ix_places_rating_avg, idx_places_owner_id, for the amenities
+        ix_place_amenity_amenity_place and for the bounding box the
+        places_rtree R*Tree. Pass the result to get_page().
+
+        Args:
+            min_price, max_price: Optional price range (inclusive)
+            amenity_ids: Optional amenity ids the places must all have
+            min_rating: Optional lowest average rating (unreviewed places
+                are excluded)
+            owner_id: Optional owner of the places
+            bbox: Optional (min_lon, min_lat, max_lon, max_lat) box; a box
+                with min_lon > max_lon crosses the antimeridian
+            dialect: Database dialect name (default: the read session's)
+        """
+        criteria = []
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            if min_lon > max_lon:
+                max_lon += 360
+            criteria.append(self.box_criteria(
+                split_box(min_lat, max_lat, min_lon, max_lon), dialect))
+        if min_price is not None:
+            criteria.append(Place.price >= min_price)
+        if max_price is not None:
+            criteria.append(Place.price <= max_price)
+        if min_rating is not None:
+            criteria.append(Place.rating_avg >= min_rating)
+        if owner_id is not None:
+            criteria.append(Place.owner_id == owner_id)
+        amenity_ids = list(dict.fromkeys(amenity_ids or ()))
+        if amenity_ids:
+            # Places linked to all of them: one index range per amenity
+            criteria.append(Place.id.in_(
+                select(place_amenity.c.place_id)
+                .where(place_amenity.c.amenity_id.in_(amenity_ids))
+                .group_by(place_amenity.c.place_id)
+                .having(func.count() == len(amenity_ids))))
+        return criteria
+
+    def box_criteria(self, boxes, dialect=None):
+        """
+        SQL criterion selecting the places inside any of the boxes.
+
+        On SQLite the candidates come from the places_rtree R*Tree (see
+        persistence/spatial.py) and are then checked against the exact
+        coordinates; other databases only get the coordinate ranges.
+
+        Args:
+            boxes: (min_lat, max_lat, min_lon, max_lon) tuples, e.g. from
+                radius_boxes()
+            dialect: Database dialect name (default: the read session's)
+        """
+        exact = or_(*(
+            and_(Place.latitude.between(min_lat, max_lat),
+                 Place.longitude.between(min_lon, max_lon))
+            for min_lat, max_lat, min_lon, max_lon in boxes
+        ))
+        if dialect is None:
+            dialect = self._read_session().get_bind().dialect.name
+        if dialect != 'sqlite':
+            return exact
+        rtree = places_rtree.c
+        candidates = select(rtree.id).where(or_(*(
+            and_(rtree.max_lat >= min_lat, rtree.min_lat <= max_lat,
+                 rtree.max_lon >= min_lon, rtree.min_lon <= max_lon)
+            for min_lat, max_lat, min_lon, max_lon in boxes
+        )))
+        return and_(literal_column('places.rowid').in_(candidates), exact)
+
+    def nearby_statement(self, lat, lon, radius_km, criteria=(),
+                         dialect=None):
+        """
+        SELECT of (id, latitude, longitude) of the places that may lie
+        within radius_km of (lat, lon) and match criteria.
+
+        The rows come from the boxes around the circle; rank_nearby()
+        keeps the ones really inside it.
+
+        Raises:
+            ValueError: If radius_km is not positive
+        """
+        if not radius_km > 0:
+            raise ValueError("radius_km must be a positive number")
+        boxes = radius_boxes(lat, lon, radius_km)
+        return (select(Place.id, Place.latitude, Place.longitude)
+                .where(self.box_criteria(boxes, dialect), *criteria))
+
+    def rank_nearby(self, rows, lat, lon, radius_km, limit=None,
+                    cursor=None):
+        """
+        Distance-ordered page of the rows of nearby_statement().
+
+        Rows are ordered by (distance, id); the cursor carries the last
+        pair of the previous page.
+
+        Returns:
+            Tuple ([(place_id, distance_km)], next_cursor)
+
+        Raises:
+            ValueError: If limit is not positive or cursor is malformed
+        """
+        limit = self.page_limit(limit)
+        ranked = []
+        for place_id, place_lat, place_lon in rows:
+            distance = haversine_km(lat, lon, place_lat, place_lon)
+            if distance <= radius_km:
+                ranked.append((distance, place_id))
+        if cursor:
+            after = decode_score_cursor(cursor)
+            ranked = [key for key in ranked if key > after]
+        ranked.sort()
+        next_cursor = None
+        if len(ranked) > limit:
+            ranked = ranked[:limit]
+            next_cursor = encode_score_cursor(*ranked[-1])
+        page = [(place_id, distance) for distance, place_id in ranked]
+        return page, next_cursor
+
+    def get_nearby(self, lat, lon, radius_km, limit=None, cursor=None,
+                   profile=None, fields=None, criteria=()):
+        """
+        Places within radius_km of (lat, lon), nearest first, one page at
+        a time.
+
+        Candidates are read from the spatial index as narrow (id,
+        latitude, longitude) rows, filtered and sorted by haversine
+        distance; only the places of the page are then loaded.
+
+        Args:
+            lat, lon: Centre of the search, in degrees
+            radius_km: Search radius in km
+            limit: Page size, clamped to MAX_PAGE_SIZE
+            cursor: Token returned with the previous page, or None
+            profile: Optional load profile name (see load_profiles())
+            fields: Optional attribute names to load (see projection())
+            criteria: Optional SQL expressions the places must all match
+
+        Returns:
+            Tuple ([(place, distance_km)], next_cursor)
+        """
+        rows = self._read_session().execute(
+            self.nearby_statement(lat, lon, radius_km, criteria))
+        ranked, next_cursor = self.rank_nearby(
+            rows, lat, lon, radius_km, limit, cursor)
+        places, _ = self.get_many([place_id for place_id, _ in ranked],
+                                  profile=profile, fields=fields)
+        return pair_ranked(places, ranked), next_cursor
+
+    def nearest_limit(self, k):
+        """Validate a requested k and apply the default and MAX_PAGE_SIZE."""
+        if k is None:
+            k = self.DEFAULT_NEAREST
+        if k < 1:
+            raise ValueError("k must be a positive integer")
+        return min(k, self.MAX_PAGE_SIZE)
+
+    def nearest(self, lat, lon, k=None, profile=None, fields=None):
+        """
+        The k places closest to (lat, lon), nearest first.
+
+        Answered by the app's PlaceIndex (see persistence/place_index.py);
+        without one, the distance to every place is computed.
+
+        Args:
+            lat, lon: Point to search around, in degrees
+            k: Number of places (default DEFAULT_NEAREST, capped at
+                MAX_PAGE_SIZE)
+            profile: Optional load profile name (see load_profiles())
+            fields: Optional attribute names to load (see projection())
+
+        Returns:
+            List of (place, distance_km)
+
+        Raises:
+            ValueError: If k is not positive
+        """
+        k = self.nearest_limit(k)
+        index = current_place_index()
+        if index is not None:
+            ranked = index.nearest(lat, lon, k)
+        else:
+            rows = self._read_session().execute(
+                select(Place.id, Place.latitude, Place.longitude))
+            ranked = nearest_rows(rows, lat, lon, k)
+        places, _ = self.get_many([place_id for place_id, _ in ranked],
+                                  profile=profile, fields=fields)
+        return pair_ranked(places, ranked)
+
+    def search_statement(self, query, limit, cursor=None, dialect=None):
+        """
+        SELECT of (id, score) of one page of the places matching a search
+        query, best first (see persistence/search.py for the syntax).
+
+        On SQLite the places_fts index answers the query and scores it with
+        BM25 (lower is better); elsewhere every word must be a substring
+        of the title or description and the score is 0. limit + 1 rows are
+        selected, for page_of_ranked() to tell whether a page follows.
+
+        Raises:
+            ValueError: If the query holds no word or cursor is malformed
+        """
+        terms = search_terms(query)
+        if dialect is None:
+            dialect = self._read_session().get_bind().dialect.name
+        if dialect == 'sqlite':
+            score = bm25_score()
+            stmt = (select(Place.id, score.label('score'))
+                    .select_from(places_fts.join(
+                        Place, literal_column('places.rowid')
+                        == places_fts.c.rowid))
+                    .where(literal_column('places_fts').op('MATCH')(
+                        match_expression(terms))))
+        else:
+            score = literal(0.0)
+            stmt = select(Place.id, score.label('score')).where(*(
+                or_(func.lower(Place.title).contains(pattern,
+                                                     autoescape=True),
+                    func.lower(Place.description).contains(pattern,
+                                                           autoescape=True))
+                for pattern in (' '.join(words).lower()
+                                for words, _ in terms)
+            ))
+        if cursor:
+            after_score, after_id = decode_score_cursor(cursor)
+            stmt = stmt.where(or_(
+                score > after_score,
+                and_(score == after_score, Place.id > after_id)))
+        return stmt.order_by(score, Place.id).limit(limit + 1)
+
+    def search(self, query, limit=None, cursor=None, profile=None,
+               fields=None):
+        """
+        One page of the places matching a full-text query, best first.
+
+        Args:
+            query: Search words; "phrases" and prefix* terms are supported
+            limit: Page size, clamped to MAX_PAGE_SIZE
+            cursor: Token returned with the previous page, or None
+            profile: Optional load profile name (see load_profiles())
+            fields: Optional attribute names to load (see projection())
+
+        Returns:
+            Tuple (places, next_cursor)
+        """
+        limit = self.page_limit(limit)
+        rows = self._read_session().execute(
+            self.search_statement(query, limit, cursor))
+        ranked, next_cursor = page_of_ranked(rows, limit)
+        places, _ = self.get_many([place_id for place_id, _ in ranked],
+                                  profile=profile, fields=fields)
+        places = [place for place, _ in pair_ranked(places, ranked)]
+        return places, next_cursor
+
+    def _bulk_written(self, objs):
+        from hbnb.app import db
+        session = db.session()
+        for place in objs:
+            record_place_write(session, place.id,
+                               (place.latitude, place.longitude))
+            record_label_write(session, 'place', place.id, place.title)
+
+    def rated_statement(self, limit, cursor=None, criteria=()):
+        """
+        SELECT of (id, rating_avg) of one page of the reviewed places, best
+        rated first, then by id.
+
+        Walks the index on rating_avg instead of aggregating reviews.
+        limit + 1 rows are selected, for page_of_ranked() to tell whether a
+        page follows.
+
+        Raises:
+            ValueError: If cursor is malformed
+        """
+        stmt = select(Place.id, Place.rating_avg).where(
+            Place.rating_avg.isnot(None), *criteria)
+        if cursor:
+            after_rating, after_id = decode_score_cursor(cursor)
+            stmt = stmt.where(or_(
+                Place.rating_avg < after_rating,
+                and_(Place.rating_avg == after_rating, Place.id > after_id)))
+        return stmt.order_by(Place.rating_avg.desc(), Place.id).limit(
+            limit + 1)
+
+    def get_rated_page(self, limit=None, cursor=None, profile=None,
+                       fields=None, criteria=()):
+        """
+        One page of the reviewed places by average rating, best first
+        (unreviewed places are left out).
+
+        Args:
+            limit: Page size, clamped to MAX_PAGE_SIZE
+            cursor: Token returned with the previous page, or None
+            profile: Optional load profile name (see load_profiles())
+            fields: Optional attribute names to load (see projection())
+            criteria: Optional filter_criteria()
+
+        Returns:
+            Tuple (places, next_cursor)
+        """
+        limit = self.page_limit(limit)
+        rows = self._read_session().execute(
+            self.rated_statement(limit, cursor, criteria))
+        ranked, next_cursor = page_of_ranked(rows, limit)
+        places, _ = self.get_many([place_id for place_id, _ in ranked],
+                                  profile=profile, fields=fields)
+        return [place for place, _ in pair_ranked(places, ranked)], next_cursor
+
+
+
+def pair_ranked(places, ranked):
+    """[(place, value)] in the order of ranked's (place_id, value) pairs."""
+    by_id = {place.id: place for place in places}
+    return [
+        (by_id[place_id], value)
+        for place_id, value in ranked
+        if place_id in by_id
+    ]
+
+
+def page_of_ranked(rows, limit):
+    """
+    Split (place_id, score) rows selected with limit + 1 into the page and
+    the cursor of the next one.
+    """
+    ranked = [(place_id, score) for place_id, score in rows]
+    next_cursor = None
+    if len(ranked) > limit:
+        ranked = ranked[:limit]
+        place_id, score = ranked[-1]
+        next_cursor = encode_score_cursor(score, place_id)
+    return ranked, next_cursor
+
+
+def encode_score_cursor(score, place_id):
+    """Cursor of results ordered by (score, id), e.g. distance or rank."""
+    return encode_cursor(f'{score!r}|{place_id}')
+
+
+def decode_score_cursor(cursor):
+    """(score, place_id) of encode_score_cursor(), or raise ValueError."""
+    score, sep, place_id = decode_cursor(cursor).partition('|')
+    try:
+        score = float(score)
+    except ValueError:
+        raise ValueError("invalid cursor")
+    if not sep:
+        raise ValueError("invalid cursor")
+    return score, place_id
@@ -1,6 +1,8 @@
 """Review Repository"""
+from sqlalchemy.orm import joinedload
+
 from hbnb.app.models.review import Review
-from hbnb.app.persistence.repository import SQLAlchemyRepository
+from hbnb.app.persistence.repository import SQLAlchemyRepository, _chunks
 
 
 class ReviewRepository(SQLAlchemyRepository):
@@ -8,3 +10,40 @@ class ReviewRepository(SQLAlchemyRepository):
 
     def __init__(self):
         super().__init__(Review)
+
+    def load_profiles(self):
+        """
+        Loader options per endpoint:
+        - list: author (joined), the fields every review response shows
+        """
+        return {
+            'list': (joinedload(Review.user),),
+        }
+
+    def get_place_ids(self, review_ids):
+        """Ids of the places the existing reviews among review_ids belong to"""
+        from hbnb.app import db
+        place_ids = set()
+        for chunk in _chunks(list(dict.fromkeys(review_ids)),
+                             self.IN_CHUNK_SIZE):
+            place_ids.update(db.session.scalars(
+                db.select(Review.place_id).where(Review.id.in_(chunk))))
+        return place_ids
+
+    def exists_for(self, user_id, place_id):
+        """True if user_id has reviewed place_id (ix_reviews_user_place)"""
+        query = self._query().filter_by(user_id=user_id, place_id=place_id)
+        return self._read_session().query(query.exists()).scalar()
+
+    def get_reviewed_place_ids(self, user_id, place_ids):
+        """Ids among place_ids that user_id has reviewed"""
+        from hbnb.app import db
+        session = self._read_session()
+        reviewed = set()
+        for chunk in _chunks(list(dict.fromkeys(place_ids)),
+                             self.IN_CHUNK_SIZE):
+            reviewed.update(session.scalars(
+                db.select(Review.place_id)
+                .where(Review.user_id == user_id,
+                       Review.place_id.in_(chunk))))
+        return reviewed
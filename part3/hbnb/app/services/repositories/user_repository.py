@@ -22,4 +22,4 @@ class UserRepository(SQLAlchemyRepository):
         Returns:
             User object if found, None otherwise
         """
-        return self.model.query.filter_by(email=email).first()
+        return self._query().filter_by(email=email).first()
@@ -3,13 +3,16 @@
 Run script for the HBnB application.
 """
 import os
+from config import config
 from hbnb.app import create_app
 
-# Get configuration from environment variable or use default
+# Get configuration from environment variable (development/production)
 config_name = os.getenv('FLASK_ENV', 'development')
-config_class = f'config.{config_name.capitalize()}Config' if config_name != 'development' else 'config.DevelopmentConfig'
+if config_name not in config:
+    raise SystemExit(f"Unknown FLASK_ENV '{config_name}', expected one of: "
+                     + ', '.join(sorted(config)))
 
-app = create_app(config_class)
+app = create_app(config[config_name])
 
 if __name__ == '__main__':
     app.run(
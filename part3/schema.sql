@@ -27,6 +27,15 @@ CREATE TABLE IF NOT EXISTS places (
     latitude FLOAT NOT NULL,
     longitude FLOAT NOT NULL,
     owner_id CHAR(36) NOT NULL,
+    -- Review aggregates, maintained on every review write
+    review_count INTEGER NOT NULL DEFAULT 0,
+    rating_sum INTEGER NOT NULL DEFAULT 0,
+    rating_avg FLOAT,
+    rating_1 INTEGER NOT NULL DEFAULT 0,
+    rating_2 INTEGER NOT NULL DEFAULT 0,
+    rating_3 INTEGER NOT NULL DEFAULT 0,
+    rating_4 INTEGER NOT NULL DEFAULT 0,
+    rating_5 INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (owner_id) REFERENCES users(id) ON DELETE CASCADE
@@ -69,6 +78,36 @@ CREATE TABLE IF NOT EXISTS place_amenity (
 
 -- Create indexes for better query performance
 CREATE INDEX IF NOT EXISTS idx_places_owner_id ON places(owner_id);
+CREATE INDEX IF NOT EXISTS ix_places_rating_avg ON places(rating_avg);
+CREATE INDEX IF NOT EXISTS ix_places_price ON places(price);
+CREATE INDEX IF NOT EXISTS ix_place_amenity_amenity_place ON place_amenity(amenity_id, place_id);
 CREATE INDEX IF NOT EXISTS idx_reviews_user_id ON reviews(user_id);
 CREATE INDEX IF NOT EXISTS idx_reviews_place_id ON reviews(place_id);
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
+
+-- Spatial index of the places' coordinates, kept in sync by triggers
+-- (see hbnb/app/persistence/spatial.py)
+CREATE VIRTUAL TABLE IF NOT EXISTS places_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon);
+CREATE TRIGGER IF NOT EXISTS places_rtree_insert AFTER INSERT ON places BEGIN
+    INSERT INTO places_rtree VALUES (new.rowid, new.latitude, new.latitude, new.longitude, new.longitude);
+END;
+CREATE TRIGGER IF NOT EXISTS places_rtree_update AFTER UPDATE OF latitude, longitude ON places BEGIN
+    UPDATE places_rtree SET min_lat = new.latitude, max_lat = new.latitude, min_lon = new.longitude, max_lon = new.longitude WHERE id = new.rowid;
+END;
+CREATE TRIGGER IF NOT EXISTS places_rtree_delete AFTER DELETE ON places BEGIN
+    DELETE FROM places_rtree WHERE id = old.rowid;
+END;
+
+-- Full-text index of the places' titles and descriptions, kept in sync by
+-- triggers (see hbnb/app/persistence/search.py)
+CREATE VIRTUAL TABLE IF NOT EXISTS places_fts USING fts5(title, description, content='places', tokenize='unicode61 remove_diacritics 2', prefix='2 3');
+CREATE TRIGGER IF NOT EXISTS places_fts_insert AFTER INSERT ON places BEGIN
+    INSERT INTO places_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS places_fts_update AFTER UPDATE OF title, description ON places BEGIN
+    INSERT INTO places_fts(places_fts, rowid, title, description) VALUES ('delete', old.rowid, old.title, old.description);
+    INSERT INTO places_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS places_fts_delete AFTER DELETE ON places BEGIN
+    INSERT INTO places_fts(places_fts, rowid, title, description) VALUES ('delete', old.rowid, old.title, old.description);
+END;
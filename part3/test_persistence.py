@@ -0,0 +1,1645 @@
+"""
+Unit Tests for the HBnB persistence layer (SQLAlchemy repositories)
+Uses an in-memory SQLite database, so the development database is untouched.
+Run with: pytest test_persistence.py -v
+"""
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from hbnb.app import create_app, db
+from hbnb.app.models import Amenity, Place, Review, User, place_amenity
+from hbnb.app.services.facade import DuplicateReviewError, HBnBFacade
+from hbnb.app.services.identity_cache import current_identity_cache
+
+
+class PersistenceTestConfig:
+    TESTING = True
+    SECRET_KEY = 'test_secret_key'
+    JWT_SECRET_KEY = 'test_jwt_secret_key_that_is_long_enough'
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    UNIT_OF_WORK_PER_REQUEST = True
+
+
+@pytest.fixture
+def app():
+    """Create an application bound to a fresh in-memory database."""
+    app = create_app(PersistenceTestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """Create a test client for the app."""
+    return app.test_client()
+
+
+@pytest.fixture
+def facade(app):
+    """Return the shared facade instance."""
+    return HBnBFacade()
+
+
+@pytest.fixture
+def commits():
+    """Count the COMMITs issued by any session while the test runs."""
+    counter = {'count': 0}
+
+    def on_commit(session):
+        counter['count'] += 1
+
+    event.listen(Session, 'after_commit', on_commit)
+    yield counter
+    event.remove(Session, 'after_commit', on_commit)
+
+
+@pytest.fixture
+def queries(app):
+    """Count the SQL statements executed on the engine while the test runs."""
+    counter = {'count': 0}
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        counter['count'] += 1
+
+    event.listen(db.engine, 'before_cursor_execute', on_execute)
+    yield counter
+    event.remove(db.engine, 'before_cursor_execute', on_execute)
+
+
+@pytest.fixture
+def owner(facade):
+    return facade.create_user({
+        'first_name': 'Place',
+        'last_name': 'Owner',
+        'email': 'owner@example.com',
+        'password': 'secret',
+    })
+
+
+def auth_header(user):
+    token = create_access_token(identity=str(user.id),
+                                additional_claims={'is_admin': user.is_admin})
+    return {'Authorization': f'Bearer {token}'}
+
+
+# ==================== UNIT OF WORK TESTS ====================
+
+class TestUnitOfWork:
+    """Test suite for grouping writes into a single transaction"""
+
+    def test_update_commits_once(self, facade, owner, commits):
+        """update_user no longer commits in save() and again in the repo"""
+        facade.update_user(owner.id, {'first_name': 'Renamed'})
+        assert commits['count'] == 1
+        assert facade.get_user(owner.id).first_name == 'Renamed'
+
+    def test_update_does_not_store_plain_password(self, facade, owner):
+        """The hashed password must not be overwritten by the raw payload"""
+        facade.update_user(owner.id, {'password': 'new-secret'})
+        user = facade.get_user(owner.id)
+        assert user.password != 'new-secret'
+        assert user.verify_password('new-secret')
+
+    def test_batch_commits_once(self, facade, commits):
+        """Several facade writes inside one unit of work commit once"""
+        with facade.unit_of_work():
+            for name in ('WiFi', 'Pool', 'Parking'):
+                facade.create_amenity({'name': name})
+            assert commits['count'] == 0
+        assert commits['count'] == 1
+        assert len(facade.get_all_amenities()) == 3
+
+    def test_batch_rolls_back_on_error(self, facade):
+        """An exception inside the unit of work discards every write"""
+        with pytest.raises(ValueError):
+            with facade.unit_of_work():
+                facade.create_amenity({'name': 'WiFi'})
+                facade.create_amenity({'name': ''})
+        assert facade.get_all_amenities() == []
+
+    def test_request_commits_once(self, client, owner, commits):
+        """A write request issues exactly one COMMIT"""
+        response = client.put(f'/api/v1/users/{owner.id}', json={
+            'first_name': 'Via',
+            'last_name': 'Request',
+            'email': 'owner@example.com',
+            'password': 'secret',
+        }, headers=auth_header(owner))
+        assert response.status_code == 200
+        assert commits['count'] == 1
+
+    def test_failed_request_rolls_back(self, client, facade, owner):
+        """Changes made before a 400 response are not committed"""
+        response = client.put(f'/api/v1/users/{owner.id}', json={
+            'first_name': 'Changed',
+            'last_name': 'Owner',
+            'email': 'not-an-email',
+            'password': 'secret',
+        }, headers=auth_header(owner))
+        assert response.status_code == 400
+        db.session.expire_all()
+        assert facade.get_user(owner.id).first_name == 'Place'
+
+
+# ==================== BULK LOADING TESTS ====================
+
+class TestBulkLoading:
+    """Test suite for add_many/upsert_many"""
+
+    def make_places(self, owner, amenities, count):
+        places = []
+        for i in range(count):
+            place = Place(title=f'Place {i}', price=10.0 + i, latitude=1.0,
+                          longitude=2.0, owner_id=owner.id)
+            place.amenities = list(amenities)
+            places.append(place)
+        return places
+
+    def test_add_many_single_transaction(self, facade, owner, commits):
+        """Chunked inserts, including place_amenity rows, commit once"""
+        amenities = [Amenity(name='WiFi'), Amenity(name='Pool')]
+        places = self.make_places(owner, amenities, 25)
+        assert facade.add_many(amenities + places, chunk_size=10) == 27
+        assert commits['count'] == 1
+
+        assert Place.query.count() == 25
+        links = db.session.execute(place_amenity.select()).fetchall()
+        assert len(links) == 50
+        assert all(place.id for place in places)
+        assert len(facade.get_place(places[0].id).amenities) == 2
+
+    def test_add_many_fills_defaults(self, facade):
+        """Ids and timestamps are generated for the inserted rows"""
+        user = User(first_name='Bulk', last_name='User', email='bulk@example.com')
+        user.hash_password('pw')
+        facade.add_many([user])
+        stored = facade.get_user_by_email('bulk@example.com')
+        assert stored.id == user.id
+        assert stored.created_at is not None
+        assert stored.is_admin is False
+
+    def test_upsert_many_updates_existing(self, facade, owner):
+        """Existing rows are updated, new rows inserted"""
+        wifi = facade.create_amenity({'name': 'WiFi'})
+        renamed = Amenity(name='Fast WiFi', id=wifi.id)
+        facade.upsert_many([renamed, Amenity(name='Pool')])
+        db.session.expire_all()
+        names = sorted(a.name for a in facade.get_all_amenities())
+        assert names == ['Fast WiFi', 'Pool']
+
+    def test_add_many_rolls_back_on_conflict(self, facade):
+        """A constraint violation discards the whole batch"""
+        facade.create_amenity({'name': 'WiFi'})
+        with pytest.raises(IntegrityError):
+            facade.add_many([Amenity(name='Pool'), Amenity(name='WiFi')])
+        assert len(facade.get_all_amenities()) == 1
+
+    def test_add_many_rejects_unknown_objects(self, facade):
+        with pytest.raises(ValueError):
+            facade.add_many([object()])
+
+
+# ==================== PAGINATION TESTS ====================
+
+class TestPagination:
+    """Test suite for keyset pagination of collection endpoints"""
+
+    @pytest.fixture
+    def amenities(self, facade):
+        facade.add_many([Amenity(name=f'Amenity {i:02d}') for i in range(12)])
+        return sorted(a.id for a in facade.get_all_amenities())
+
+    def test_get_page_walks_every_row_once(self, facade, amenities):
+        seen, cursor = [], None
+        while True:
+            page, cursor = facade.get_amenities_page(limit=5, cursor=cursor)
+            seen.extend(a.id for a in page)
+            if cursor is None:
+                break
+        assert seen == amenities
+
+    def test_limit_is_capped(self, facade, amenities, monkeypatch):
+        monkeypatch.setattr(facade.amenity_repo, 'MAX_PAGE_SIZE', 4)
+        page, cursor = facade.get_amenities_page(limit=1000)
+        assert len(page) == 4
+        assert cursor is not None
+
+    def test_invalid_cursor(self, facade, amenities):
+        with pytest.raises(ValueError):
+            facade.get_amenities_page(cursor='not-a-cursor')
+
+    def test_endpoint_next_cursor_header(self, client, amenities):
+        response = client.get('/api/v1/amenities/?limit=10')
+        assert response.status_code == 200
+        assert [a['id'] for a in response.get_json()] == amenities[:10]
+        cursor = response.headers['X-Next-Cursor']
+        assert 'rel="next"' in response.headers['Link']
+
+        response = client.get(f'/api/v1/amenities/?limit=10&cursor={cursor}')
+        assert [a['id'] for a in response.get_json()] == amenities[10:]
+        assert 'X-Next-Cursor' not in response.headers
+
+    def test_endpoint_rejects_bad_cursor(self, client, amenities):
+        response = client.get('/api/v1/places/?cursor=garbage')
+        assert response.status_code == 400
+        response = client.get('/api/v1/users/?limit=0')
+        assert response.status_code == 400
+
+
+# ==================== EAGER LOADING TESTS ====================
+
+class TestLoadProfiles:
+    """Test suite for per-endpoint eager-loading profiles"""
+
+    def seed(self, facade, owner_id, prefix, count):
+        """Create count places with 3 amenities and 1 review each"""
+        amenities = [Amenity(name=f'{prefix} amenity {i}') for i in range(3)]
+        places, reviewers = [], []
+        for i in range(count):
+            place = Place(title=f'{prefix} place {i}', price=10.0,
+                          latitude=1.0, longitude=2.0, owner_id=owner_id)
+            place.amenities = list(amenities)
+            places.append(place)
+            reviewer = User(first_name='R', last_name=str(i),
+                            email=f'{prefix}.reviewer{i}@example.com')
+            reviewer.password = 'x'
+            reviewers.append(reviewer)
+        facade.add_many(amenities + places + reviewers)
+        facade.add_many([
+            Review(text='Nice', rating=4, user_id=user.id, place_id=place.id)
+            for user, place in zip(reviewers, places)
+        ])
+
+    def list_query_count(self, client, queries):
+        db.session.expunge_all()
+        queries['count'] = 0
+        response = client.get('/api/v1/places/?limit=100')
+        assert response.status_code == 200
+        return queries['count'], response.get_json()
+
+    def test_place_list_constant_queries(self, client, facade, owner, queries):
+        owner_id = owner.id
+        self.seed(facade, owner_id, 'a', 3)
+        small, body = self.list_query_count(client, queries)
+        assert len(body) == 3
+        assert len(body[0]['amenities']) == 3
+        assert len(body[0]['reviews']) == 1
+
+        self.seed(facade, owner_id, 'b', 12)
+        large, body = self.list_query_count(client, queries)
+        assert len(body) == 15
+        assert large == small
+
+    def test_review_list_constant_queries(self, client, facade, owner, queries):
+        owner_id = owner.id
+        self.seed(facade, owner_id, 'a', 3)
+        db.session.expunge_all()
+        queries['count'] = 0
+        response = client.get('/api/v1/reviews/')
+        assert len(response.get_json()) == 3
+        small = queries['count']
+
+        self.seed(facade, owner_id, 'b', 10)
+        db.session.expunge_all()
+        queries['count'] = 0
+        response = client.get('/api/v1/reviews/')
+        assert response.get_json()[0]['user']['first_name'] == 'R'
+        assert queries['count'] == small
+
+    def test_unknown_profile(self, facade):
+        with pytest.raises(ValueError):
+            facade.get_place('missing', profile='nope')
+
+
+# ==================== SPARSE FIELDSET TESTS ====================
+
+class TestSparseFieldsets:
+    """Test suite for ?fields= and its projection into the SELECT"""
+
+    @pytest.fixture
+    def statements(self, app):
+        """SQL statements executed on the engine while the test runs"""
+        executed = []
+
+        def on_execute(conn, cursor, statement, parameters, context,
+                       executemany):
+            executed.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', on_execute)
+        yield executed
+        event.remove(db.engine, 'before_cursor_execute', on_execute)
+
+    @pytest.fixture
+    def place(self, facade, owner):
+        wifi = facade.create_amenity({'name': 'WiFi'})
+        place = facade.create_place({
+            'title': 'Loft', 'description': 'Sea view', 'price': 80.0,
+            'latitude': 1.0, 'longitude': 2.0, 'owner_id': owner.id,
+            'amenities': [wifi.id]})
+        guest = facade.create_user({'first_name': 'Guest', 'last_name': 'U',
+                                    'email': 'guest@example.com',
+                                    'password': 'pw'})
+        facade.create_review({'text': 'Nice', 'rating': 4,
+                              'user_id': guest.id, 'place_id': place.id})
+        return place.id
+
+    def get(self, client, statements, url):
+        db.session.expunge_all()
+        statements.clear()
+        response = client.get(url)
+        return response, list(statements)
+
+    def test_place_list_selects_only_requested_columns(self, client, place,
+                                                       statements):
+        response, sql = self.get(client, statements,
+                                 '/api/v1/places/?fields=id,title,price')
+        assert response.status_code == 200
+        assert response.get_json() == [
+            {'id': place, 'title': 'Loft', 'price': 80.0}]
+        # One SELECT of three columns: no owner join, no amenity/review
+        # queries
+        assert len(sql) == 1
+        assert 'description' not in sql[0] and 'JOIN' not in sql[0]
+
+    def test_nested_field_loads_only_its_relationship(self, client, place,
+                                                      statements):
+        response, sql = self.get(client, statements,
+                                 f'/api/v1/places/{place}?fields=owner,title')
+        assert response.status_code == 200
+        body = response.get_json()
+        assert list(body) == ['title', 'owner']
+        assert body['owner']['email'] == 'owner@example.com'
+        assert len(sql) == 1 and 'JOIN users' in sql[0]
+
+        full, _ = self.get(client, statements, f'/api/v1/places/{place}')
+        assert len(statements) > 1
+        assert {k: full.get_json()[k] for k in body} == body
+
+    def test_other_endpoints(self, client, owner, place):
+        assert client.get(
+            f'/api/v1/users/{owner.id}?fields=email').get_json() == {
+                'email': 'owner@example.com'}
+        assert client.get('/api/v1/amenities/?fields=name').get_json() == [
+            {'name': 'WiFi'}]
+        reviews = client.get(
+            f'/api/v1/reviews/places/{place}/reviews?fields=rating,place_id,user')
+        assert reviews.get_json() == [{
+            'rating': 4,
+            'user': {'id': reviews.get_json()[0]['user']['id'],
+                     'first_name': 'Guest', 'last_name': 'U'}}]
+
+    def test_unknown_field(self, client, place):
+        response = client.get('/api/v1/places/?fields=id,password')
+        assert response.status_code == 400
+        message = response.get_json()['message']
+        assert "'password'" in message and 'title' in message
+        assert client.get('/api/v1/reviews/?fields=,').status_code == 400
+
+
+# ==================== PLACE FILTER TESTS ====================
+
+class TestPlaceFilters:
+    """Test suite for the GET /places/ filters"""
+
+    @pytest.fixture
+    def seeded(self, facade, owner):
+        host = facade.create_user({'first_name': 'Other', 'last_name': 'Host',
+                                   'email': 'host@example.com',
+                                   'password': 'pw'})
+        guest = facade.create_user({'first_name': 'Guest', 'last_name': 'U',
+                                    'email': 'guest@example.com',
+                                    'password': 'pw'})
+        wifi = facade.create_amenity({'name': 'WiFi'})
+        pool = facade.create_amenity({'name': 'Pool'})
+        specs = [
+            ('Hut', 30.0, owner, [], None),
+            ('Loft', 80.0, owner, [wifi], 5),
+            ('Villa', 300.0, host, [wifi, pool], 4),
+            ('Cabin', 120.0, host, [pool], 2),
+        ]
+        ids = {}
+        for title, price, user, amenities, rating in specs:
+            place = facade.create_place({
+                'title': title, 'price': price, 'latitude': 1.0,
+                'longitude': 2.0, 'owner_id': user.id,
+                'amenities': [amenity.id for amenity in amenities]})
+            if rating:
+                facade.create_review({'text': 'Ok', 'rating': rating,
+                                      'user_id': guest.id,
+                                      'place_id': place.id})
+            ids[title] = place.id
+        return {'owner': owner.id, 'host': host.id, 'wifi': wifi.id,
+                'pool': pool.id}
+
+    def titles(self, client, query):
+        response = client.get(f'/api/v1/places/?fields=title&{query}')
+        assert response.status_code == 200, response.get_json()
+        return sorted(place['title'] for place in response.get_json())
+
+    def test_each_filter(self, client, seeded):
+        assert self.titles(client, 'min_price=80') == ['Cabin', 'Loft',
+                                                       'Villa']
+        assert self.titles(client, 'max_price=80') == ['Hut', 'Loft']
+        assert self.titles(client, 'min_price=50&max_price=150') == [
+            'Cabin', 'Loft']
+        assert self.titles(client, 'min_rating=4') == ['Loft', 'Villa']
+        assert self.titles(client, f"owner_id={seeded['host']}") == [
+            'Cabin', 'Villa']
+
+    def test_amenities_must_all_match(self, client, seeded):
+        wifi, pool = seeded['wifi'], seeded['pool']
+        assert self.titles(client, f'amenities={wifi}') == ['Loft', 'Villa']
+        assert self.titles(client, f'amenities={wifi},{pool}') == ['Villa']
+        assert self.titles(client, f'amenities={pool},{pool}') == ['Cabin',
+                                                                   'Villa']
+        assert self.titles(client, f'amenities={wifi},missing') == []
+
+    def test_filters_combine_and_paginate(self, client, seeded):
+        query = f"min_price=50&owner_id={seeded['host']}&limit=1"
+        first = client.get(f'/api/v1/places/?{query}')
+        assert len(first.get_json()) == 1
+        second = client.get(first.headers['Link'].split('>')[0][1:])
+        assert second.status_code == 200
+        assert 'X-Next-Cursor' not in second.headers
+        assert sorted(p['title'] for p in
+                      first.get_json() + second.get_json()) == ['Cabin',
+                                                                'Villa']
+
+    def test_invalid_filter(self, client, seeded):
+        response = client.get('/api/v1/places/?min_price=cheap')
+        assert response.status_code == 400
+        assert 'min_price' in response.get_json()['errors']
+
+    def test_amenity_filter_uses_index(self, facade, seeded):
+        repo = facade.place_repo
+        query = repo._query().filter(*repo.filter_criteria(
+            amenity_ids=[seeded['wifi'], seeded['pool']]))
+        sql = str(query.statement.compile(
+            db.engine, compile_kwargs={'literal_binds': True}))
+        plan = ' '.join(row[-1] for row in db.session.execute(
+            db.text(f'EXPLAIN QUERY PLAN {sql}')))
+        assert 'COVERING INDEX ix_place_amenity_amenity_place' in plan
+
+
+class TestGeoSearch:
+    """Test suite for the bbox/near place search and its R*Tree index"""
+
+    # Paris, Versailles (~17 km), Orleans (~111 km), Fiji (east of the
+    # antimeridian) and Samoa (west of it)
+    SPOTS = {
+        'Paris': (48.8566, 2.3522),
+        'Versailles': (48.8049, 2.1204),
+        'Orleans': (47.9030, 1.9093),
+        'Fiji': (-17.7134, 178.0650),
+        'Samoa': (-13.7590, -172.1046),
+    }
+
+    @pytest.fixture
+    def spots(self, facade, owner):
+        places = facade.create_places([
+            {'title': title, 'price': 50.0, 'latitude': lat,
+             'longitude': lon, 'owner_id': owner.id}
+            for title, (lat, lon) in self.SPOTS.items()
+        ])
+        return {place.title: place.id for place in places}
+
+    def search(self, client, query):
+        response = client.get(f'/api/v1/places/?fields=title&{query}')
+        assert response.status_code == 200, response.get_json()
+        return response
+
+    def titles(self, client, query):
+        return sorted(place['title']
+                      for place in self.search(client, query).get_json())
+
+    def test_bbox(self, client, spots):
+        assert self.titles(client, 'bbox=2,48,3,49') == ['Paris',
+                                                         'Versailles']
+        # min_lon > max_lon: the box crosses the antimeridian
+        assert self.titles(client, 'bbox=170,-20,-170,-10') == ['Fiji',
+                                                                'Samoa']
+        assert self.titles(client, 'bbox=-10,40,10,50&max_price=10') == []
+
+    def test_near_sorted_by_distance(self, client, spots):
+        places = self.search(
+            client, 'near=48.8566,2.3522&radius_km=150').get_json()
+        assert [p['title'] for p in places] == ['Paris', 'Versailles',
+                                                'Orleans']
+        assert places[0]['distance_km'] == 0
+        assert 15 < places[1]['distance_km'] < 20
+        # Default radius: 10 km
+        assert self.titles(client, 'near=48.85,2.35') == ['Paris']
+        # Around the antimeridian
+        assert self.titles(client, 'near=-16,179.9&radius_km=1500') == [
+            'Fiji', 'Samoa']
+
+    def test_near_paginates(self, client, spots):
+        first = self.search(client, 'near=48,2&radius_km=200&limit=2')
+        assert len(first.get_json()) == 2
+        second = client.get(first.headers['Link'].split('>')[0][1:])
+        assert 'X-Next-Cursor' not in second.headers
+        distances = [p['distance_km']
+                     for p in first.get_json() + second.get_json()]
+        assert len(distances) == 3 and distances == sorted(distances)
+
+    def test_invalid_coordinates(self, client, spots):
+        for query in ('near=91,0', 'near=1', 'bbox=1,2,3',
+                      'bbox=0,10,1,5', 'near=1,2&radius_km=0'):
+            response = client.get(f'/api/v1/places/?{query}')
+            assert response.status_code == 400, query
+
+    def test_index_follows_writes(self, facade, client, spots):
+        facade.update_place(spots['Orleans'], {'latitude': 48.86,
+                                               'longitude': 2.35})
+        facade.place_repo.delete(spots['Paris'])
+        assert self.titles(client, 'bbox=2,48,3,49') == ['Orleans',
+                                                         'Versailles']
+        count = db.session.execute(
+            db.text('SELECT count(*) FROM places_rtree')).scalar()
+        assert count == len(self.SPOTS) - 1
+
+    def test_rebuild_command(self, app, client, spots):
+        db.session.execute(db.text('DELETE FROM places_rtree'))
+        db.session.commit()
+        assert self.titles(client, 'bbox=2,48,3,49') == []
+        result = app.test_cli_runner().invoke(args=['rebuild-spatial-index'])
+        assert 'Spatial index rebuilt: 5 places' in result.output
+        assert self.titles(client, 'bbox=2,48,3,49') == ['Paris',
+                                                         'Versailles']
+
+    def test_bbox_uses_rtree(self, facade, spots):
+        repo = facade.place_repo
+        query = repo._query().filter(*repo.filter_criteria(
+            bbox=(2, 48, 3, 49)))
+        sql = str(query.statement.compile(
+            db.engine, compile_kwargs={'literal_binds': True}))
+        plan = ' '.join(row[-1] for row in db.session.execute(
+            db.text(f'EXPLAIN QUERY PLAN {sql}')))
+        assert 'VIRTUAL TABLE INDEX' in plan
+
+
+class TestNearestPlaces:
+    """Test suite for the k-nearest-neighbour lookup and its PlaceIndex"""
+
+    POINTS = [(0.0, 0.0), (0.0, 1.0), (0.0, 3.0), (10.0, 10.0),
+              (-5.0, 179.5), (-5.0, -179.5)]
+
+    @pytest.fixture
+    def places(self, facade, owner):
+        created = facade.create_places([
+            {'title': f'Spot {i}', 'price': 10.0, 'latitude': lat,
+             'longitude': lon, 'owner_id': owner.id}
+            for i, (lat, lon) in enumerate(self.POINTS)
+        ])
+        return [place.id for place in created]
+
+    def nearest_titles(self, client, query):
+        response = client.get(f'/api/v1/places/nearest?fields=title&{query}')
+        assert response.status_code == 200, response.get_json()
+        return [place['title'] for place in response.get_json()]
+
+    def test_nearest_ordered_by_distance(self, client, places):
+        response = client.get('/api/v1/places/nearest?lat=0&lon=0.9&k=3')
+        body = response.get_json()
+        assert [p['title'] for p in body] == ['Spot 1', 'Spot 0', 'Spot 2']
+        assert body[0]['owner']['first_name'] == 'Place'
+        assert 11 < body[0]['distance_km'] < 11.2
+        # Across the antimeridian
+        assert self.nearest_titles(client, 'lat=-5&lon=-179.9&k=2') == [
+            'Spot 5', 'Spot 4']
+
+    def test_matches_full_scan(self, app, facade, places):
+        from hbnb.app.persistence.spatial import haversine_km
+        for lat, lon in ((3.0, 4.0), (-60.0, 120.0), (89.0, 0.0)):
+            expected = sorted(
+                (haversine_km(lat, lon, *point), place_id)
+                for place_id, point in zip(places, self.POINTS))[:4]
+            found = facade.get_nearest_places(lat, lon, 4)
+            assert [p.id for p, _ in found] == [i for _, i in expected]
+            for (_, distance), (exact, _) in zip(found, expected):
+                assert distance == pytest.approx(exact)
+
+    def test_index_follows_committed_writes(self, facade, owner, places):
+        from hbnb.app.persistence.repository import UnitOfWork, savepoint
+        moved = facade.create_place({'title': 'New', 'price': 5.0,
+                                     'latitude': 0.0, 'longitude': 0.4,
+                                     'owner_id': owner.id})
+        assert facade.get_nearest_places(0, 0.5, 1)[0][0].id == moved.id
+        facade.update_place(moved.id, {'latitude': 40.0})
+        facade.place_repo.delete(places[0])
+        assert [p.id for p, _ in facade.get_nearest_places(0, 0.5, 2)] == [
+            places[1], places[2]]
+
+        # Writes rolled back, with the transaction or a savepoint, never
+        # reach the index
+        with pytest.raises(RuntimeError):
+            with UnitOfWork():
+                facade.update_place(places[1], {'longitude': 50.0})
+                raise RuntimeError
+        with UnitOfWork():
+            with pytest.raises(RuntimeError):
+                with savepoint():
+                    facade.update_place(places[2], {'longitude': 50.0})
+                    raise RuntimeError
+        db.session.expire_all()
+        assert [p.id for p, _ in facade.get_nearest_places(0, 0.5, 2)] == [
+            places[1], places[2]]
+
+    def test_built_at_startup(self, tmp_path):
+        from hbnb.app.persistence.place_index import app_place_index
+
+        class FileConfig(PersistenceTestConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'knn.db'}"
+
+        app = create_app(FileConfig)
+        with app.app_context():
+            db.create_all(bind_key=None)
+            user = HBnBFacade().create_user({
+                'first_name': 'A', 'last_name': 'B',
+                'email': 'a@example.com', 'password': 'pw'})
+            db.session.execute(Place.__table__.insert(), [
+                {'id': str(i), 'title': 'Raw', 'price': 1.0, 'latitude': i,
+                 'longitude': i, 'owner_id': user.id} for i in range(5)])
+            db.session.commit()
+            assert len(app_place_index(app)) == 0
+            db.session.remove()
+            db.engine.dispose()
+        restarted = create_app(FileConfig)
+        with restarted.app_context():
+            assert len(app_place_index(restarted)) == 5
+            db.engine.dispose()
+
+    def test_full_scan_without_index(self, facade, places):
+        from flask import current_app
+        with_index = facade.get_nearest_places(1, 1, 3)
+        index = current_app.extensions.pop('place_index')
+        try:
+            scanned = facade.get_nearest_places(1, 1, 3)
+            assert [p for p, _ in scanned] == [p for p, _ in with_index]
+            assert [d for _, d in scanned] == pytest.approx(
+                [d for _, d in with_index])
+        finally:
+            current_app.extensions['place_index'] = index
+
+    def test_invalid_parameters(self, client, places):
+        for query in ('lat=0', 'lat=91&lon=0', 'lat=0&lon=181',
+                      'lat=0&lon=0&k=0', 'lat=north&lon=0'):
+            response = client.get(f'/api/v1/places/nearest?{query}')
+            assert response.status_code == 400, query
+
+
+class TestPlaceSearch:
+    """Test suite for the full-text place search (FTS5)"""
+
+    @pytest.fixture
+    def listings(self, facade, owner):
+        specs = {
+            'Sea view loft': 'Bright loft with a sea view',
+            'Mountain cabin': 'Quiet cabin, no view of the sea',
+            'Seaside villa': 'Pool and garden',
+            'Café studio': 'Above a small café downtown',
+        }
+        places = facade.create_places([
+            {'title': title, 'description': description, 'price': 10.0,
+             'latitude': 0.0, 'longitude': 0.0, 'owner_id': owner.id}
+            for title, description in specs.items()
+        ])
+        return {place.title: place.id for place in places}
+
+    def search(self, client, q, extra=''):
+        response = client.get('/api/v1/places/search',
+                              query_string=f'fields=title&q={q}{extra}')
+        assert response.status_code == 200, response.get_json()
+        return [place['title'] for place in response.get_json()]
+
+    def test_ranked_by_bm25(self, client, listings):
+        # Title matches outrank description-only ones
+        assert self.search(client, 'sea') == ['Sea view loft',
+                                              'Mountain cabin']
+        assert self.search(client, 'view sea')[0] == 'Sea view loft'
+        assert self.search(client, 'pool') == ['Seaside villa']
+        assert self.search(client, 'submarine') == []
+
+    def test_prefix_phrase_and_diacritics(self, client, listings):
+        assert sorted(self.search(client, 'sea*')) == [
+            'Mountain cabin', 'Sea view loft', 'Seaside villa']
+        assert self.search(client, '"sea view"') == ['Sea view loft']
+        assert self.search(client, 'cafe') == ['Café studio']
+        # FTS5 operators and stray quotes are taken as plain words
+        assert self.search(client, 'sea OR "NEAR(') == []
+        assert self.search(client, 'pool AND garden') == ['Seaside villa']
+
+    def test_paginates(self, client, listings):
+        titles = []
+        url = '/api/v1/places/search?q=sea*&limit=1&fields=title'
+        while url:
+            response = client.get(url)
+            titles += [place['title'] for place in response.get_json()]
+            link = response.headers.get('Link')
+            url = link.split('>')[0][1:] if link else None
+        assert titles == self.search(client, 'sea*')
+        assert len(titles) == 3
+
+    def test_index_follows_writes(self, facade, client, listings):
+        facade.update_place(listings['Mountain cabin'],
+                            {'title': 'Lakeside cabin',
+                             'description': 'By the lake'})
+        facade.place_repo.delete(listings['Sea view loft'])
+        assert self.search(client, 'sea') == []
+        assert self.search(client, 'lake*') == ['Lakeside cabin']
+
+    def test_invalid_queries(self, client, listings):
+        for query in ('', '?q=', '?q=***', '?q=sea&cursor=bogus'):
+            response = client.get(f'/api/v1/places/search{query}')
+            assert response.status_code == 400, query
+
+    def test_rebuild_command(self, app, client, listings):
+        db.session.execute(db.text(
+            "INSERT INTO places_fts(places_fts) VALUES ('delete-all')"))
+        db.session.commit()
+        assert self.search(client, 'sea') == []
+        result = app.test_cli_runner().invoke(args=['rebuild-search-index'])
+        assert 'Search index rebuilt: 4 places' in result.output
+        assert self.search(client, 'sea') == ['Sea view loft',
+                                              'Mountain cabin']
+
+
+
+# ==================== AUTOCOMPLETE TESTS ====================
+
+class TestAutocomplete:
+    """Test suite for the typeahead prefix index"""
+
+    @pytest.fixture
+    def labels(self, facade, owner):
+        places = facade.create_places([
+            {'title': title, 'price': 10.0, 'latitude': 0.0,
+             'longitude': 0.0, 'owner_id': owner.id}
+            for title in ('Seaside villa', 'Sea view loft', 'Café studio',
+                          'Mountain cabin')
+        ])
+        amenity = facade.create_amenity({'name': 'Sauna'})
+        labels = {place.title: place.id for place in places}
+        labels['Sauna'] = amenity.id
+        return labels
+
+    def complete(self, client, prefix, extra=''):
+        response = client.get('/api/v1/autocomplete',
+                              query_string=f'prefix={prefix}{extra}')
+        assert response.status_code == 200, response.get_json()
+        return [match['text'] for match in response.get_json()]
+
+    def test_matches_word_starts(self, client, labels):
+        response = client.get('/api/v1/autocomplete?prefix=sa')
+        assert response.get_json() == [
+            {'type': 'amenity', 'id': labels['Sauna'], 'text': 'Sauna'}]
+        assert self.complete(client, 'sea') == ['Sea view loft',
+                                                'Seaside villa']
+        assert self.complete(client, 'VIL') == ['Seaside villa']
+        assert self.complete(client, 'sea  v') == ['Sea view loft']
+        assert self.complete(client, 'cafe') == ['Café studio']
+        assert self.complete(client, 'studi') == ['Café studio']
+        assert self.complete(client, 'ea') == []
+
+    def test_limit(self, client, labels):
+        assert self.complete(client, 's', '&limit=2') == [
+            'Sauna', 'Sea view loft']
+        assert len(self.complete(client, 's', '&limit=500')) == 4
+
+    def test_index_follows_committed_writes(self, facade, client, labels):
+        from hbnb.app.persistence.repository import UnitOfWork
+        assert self.complete(client, 'lake') == []     # builds the index
+        facade.update_place(labels['Mountain cabin'],
+                            {'title': 'Lakeside cabin'})
+        facade.place_repo.delete(labels['Sea view loft'])
+        facade.add_many([Amenity(name='Lake access')])
+        assert self.complete(client, 'lake') == ['Lake access',
+                                                 'Lakeside cabin']
+        assert self.complete(client, 'sea') == ['Seaside villa']
+        assert self.complete(client, 'mountain') == []
+
+        with pytest.raises(RuntimeError):
+            with UnitOfWork():
+                facade.update_amenity(labels['Sauna'], {'name': 'Lakeview'})
+                raise RuntimeError
+        assert self.complete(client, 'sauna') == ['Sauna']
+
+    def test_invalid_parameters(self, client, labels):
+        for query in ('', '?prefix=', '?prefix=%20-', '?prefix=a&limit=0'):
+            response = client.get(f'/api/v1/autocomplete{query}')
+            assert response.status_code == 400, query
+
+# ==================== BATCHED LOOKUP TESTS ====================
+
+class TestGetMany:
+    """Test suite for resolving several ids with one IN query"""
+
+    @pytest.fixture
+    def amenity_ids(self, facade):
+        amenities = [Amenity(name=f'Amenity {i:02d}') for i in range(30)]
+        facade.add_many(amenities)
+        return [a.id for a in amenities]
+
+    def test_get_many_order_and_missing(self, facade, amenity_ids, queries):
+        wanted = [amenity_ids[3], 'missing-1', amenity_ids[0], amenity_ids[3]]
+        db.session.expunge_all()
+        queries['count'] = 0
+        amenities, missing = facade.get_amenities(wanted)
+        assert queries['count'] == 1
+        assert [a.id for a in amenities] == [amenity_ids[3], amenity_ids[0]]
+        assert missing == ['missing-1']
+
+    def test_get_many_chunks_large_lists(self, facade, amenity_ids, monkeypatch):
+        monkeypatch.setattr(facade.amenity_repo, 'IN_CHUNK_SIZE', 7)
+        amenities, missing = facade.get_amenities(amenity_ids)
+        assert [a.id for a in amenities] == amenity_ids
+        assert missing == []
+
+    def test_create_place_lookups_do_not_scale(self, client, owner, amenity_ids,
+                                               queries):
+        def create(ids):
+            db.session.expunge_all()
+            queries['count'] = 0
+            response = client.post('/api/v1/places/', json={
+                'title': 'Loft', 'price': 80.0, 'latitude': 1.0,
+                'longitude': 2.0, 'owner_id': owner_id, 'amenities': ids,
+            }, headers=headers)
+            assert response.status_code == 201
+            assert len(response.get_json()['amenities']) == len(ids)
+            return queries['count']
+
+        owner_id, headers = owner.id, auth_header(owner)
+        assert create(amenity_ids) == create(amenity_ids[:2])
+
+    def test_create_place_reports_missing_amenity(self, client, owner, amenity_ids):
+        response = client.post('/api/v1/places/', json={
+            'title': 'Loft', 'price': 80.0, 'latitude': 1.0, 'longitude': 2.0,
+            'owner_id': owner.id, 'amenities': [amenity_ids[0], 'nope'],
+        }, headers=auth_header(owner))
+        assert response.status_code == 404
+        assert 'nope' in response.get_json()['message']
+
+
+# ==================== IDENTITY CACHE TESTS ====================
+
+class TestIdentityCache:
+    """Test suite for the request-scoped (model, id) cache"""
+
+    @pytest.fixture
+    def place_payload(self, facade, owner):
+        amenity_ids = [facade.create_amenity({'name': name}).id
+                       for name in ('WiFi', 'Pool')]
+        payload = {'title': 'Loft', 'price': 80, 'latitude': 1,
+                   'longitude': 2, 'owner_id': owner.id,
+                   'amenities': amenity_ids}
+        # Start the request with an empty session, as in production
+        headers = auth_header(owner)
+        db.session.remove()
+        return payload, headers
+
+    def post_place(self, client, queries, payload, headers):
+        queries['count'] = 0
+        response = client.post('/api/v1/places/', json=payload,
+                               headers=headers)
+        assert response.status_code == 201
+        db.session.remove()
+        return response, queries['count']
+
+    def test_create_place_reuses_route_lookups(self, app, client, queries,
+                                               place_payload):
+        payload, headers = place_payload
+        response, cached = self.post_place(client, queries, payload, headers)
+        # owner and amenities looked up by the route are not fetched again
+        assert response.headers['X-Identity-Cache-Saved'] == '2'
+
+        app.config['IDENTITY_CACHE'] = False
+        payload['title'] = 'Loft 2'
+        response, uncached = self.post_place(client, queries, payload,
+                                             headers)
+        assert 'X-Identity-Cache-Saved' not in response.headers
+        assert cached == uncached - 1
+
+    def test_cache_is_per_request(self, app, owner):
+        with app.test_request_context():
+            cache = current_identity_cache()
+            HBnBFacade().get_user(owner.id)
+            HBnBFacade().get_user(owner.id)
+            assert (cache.loaded, cache.saved) == (1, 1)
+        with app.test_request_context():
+            assert current_identity_cache() is not cache
+        assert current_identity_cache() is None
+
+    def test_deleted_rows_not_served(self, app, facade, owner):
+        place = facade.create_place({'title': 'Loft', 'price': 80,
+                                     'latitude': 1, 'longitude': 2,
+                                     'owner_id': owner.id})
+        guest = facade.create_user({'first_name': 'G', 'last_name': 'H',
+                                    'email': 'guest@example.com',
+                                    'password': 'pw'})
+        with app.test_request_context():
+            review = facade.create_review({'text': 'Nice', 'rating': 4,
+                                           'user_id': guest.id,
+                                           'place_id': place.id})
+            assert facade.get_review(review.id) is review
+            assert facade.delete_review(review.id)
+            assert facade.get_review(review.id) is None
+
+    def test_other_session_not_served(self, app, facade, owner):
+        with app.test_request_context():
+            cache = current_identity_cache()
+            user = facade.get_user(owner.id)
+            db.session.expunge(user)
+            assert facade.get_user(owner.id) is not user
+            assert cache.saved == 0
+
+
+# ==================== RATING AGGREGATE TESTS ====================
+
+class TestRatingAggregates:
+    """Test suite for the review aggregates stored on places"""
+
+    @pytest.fixture
+    def places(self, facade, owner):
+        return [facade.create_place({'title': title, 'price': 80,
+                                     'latitude': 1, 'longitude': 2,
+                                     'owner_id': owner.id})
+                for title in ('Loft', 'Cabin')]
+
+    @pytest.fixture
+    def guests(self, facade):
+        return [facade.create_user({'first_name': 'Guest', 'last_name': str(i),
+                                    'email': f'guest{i}@example.com',
+                                    'password': 'pw'})
+                for i in range(3)]
+
+    def review(self, facade, guest, place, rating):
+        return facade.create_review({'text': 'Stay', 'rating': rating,
+                                     'user_id': guest.id,
+                                     'place_id': place.id})
+
+    def stats(self, place):
+        db.session.refresh(place)
+        return (place.review_count, place.rating_sum, place.rating_avg,
+                place.rating_histogram)
+
+    def test_create_update_delete(self, facade, places, guests):
+        loft, cabin = places
+        assert self.stats(loft) == (0, 0, None, dict.fromkeys(range(1, 6), 0))
+
+        first = self.review(facade, guests[0], loft, 5)
+        self.review(facade, guests[1], loft, 2)
+        assert self.stats(loft) == (2, 7, 3.5,
+                                    {1: 0, 2: 1, 3: 0, 4: 0, 5: 1})
+
+        facade.update_review(first.id, {'rating': 4})
+        assert self.stats(loft) == (2, 6, 3.0,
+                                    {1: 0, 2: 1, 3: 0, 4: 1, 5: 0})
+
+        facade.update_review(first.id, {'place_id': cabin.id})
+        assert self.stats(loft)[:3] == (1, 2, 2.0)
+        assert self.stats(cabin) == (1, 4, 4.0,
+                                     {1: 0, 2: 0, 3: 0, 4: 1, 5: 0})
+
+        facade.delete_review(first.id)
+        assert self.stats(cabin) == (0, 0, None,
+                                     dict.fromkeys(range(1, 6), 0))
+
+    def test_review_does_not_touch_place_updated_at(self, facade, places,
+                                                    guests):
+        loft = places[0]
+        updated_at = loft.updated_at
+        self.review(facade, guests[0], loft, 3)
+        db.session.refresh(loft)
+        assert loft.updated_at == updated_at
+
+    def test_bulk_loads_refresh_aggregates(self, facade, places, guests):
+        loft, cabin = places
+        reviews = [Review(text='Bulk', rating=rating, user_id=guest.id,
+                          place_id=loft.id)
+                   for guest, rating in zip(guests, (1, 3, 5))]
+        facade.add_many(reviews)
+        assert self.stats(loft)[:3] == (3, 9, 3.0)
+
+        moved = Review(text='Moved', rating=1, user_id=guests[0].id,
+                       place_id=cabin.id, id=reviews[0].id)
+        facade.upsert_many([moved])
+        assert self.stats(loft)[:3] == (2, 8, 4.0)
+        assert self.stats(cabin)[:3] == (1, 1, 1.0)
+
+        # Upserting a place keeps its aggregates
+        loft.title = 'Renamed loft'
+        facade.upsert_many([Place(title='Renamed loft', price=80, latitude=1,
+                                  longitude=2, owner_id=loft.owner_id,
+                                  id=loft.id)])
+        assert self.stats(loft)[:3] == (2, 8, 4.0)
+
+    def test_top_rated(self, client, facade, owner, places, guests):
+        loft, cabin = places
+        villa = facade.create_place({'title': 'Villa', 'price': 300,
+                                     'latitude': 1, 'longitude': 2,
+                                     'owner_id': owner.id})
+        self.review(facade, guests[0], loft, 3)
+        self.review(facade, guests[0], cabin, 5)
+        self.review(facade, guests[0], villa, 3)
+        facade.create_place({'title': 'Unreviewed', 'price': 80,
+                             'latitude': 1, 'longitude': 2,
+                             'owner_id': owner.id})
+        tied = sorted([loft, villa], key=lambda place: place.id)
+
+        # Followed page by page: best rated first, ties by id
+        titles = []
+        url = '/api/v1/places/?sort=rating&limit=1&fields=title'
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200, response.get_json()
+            titles += [place['title'] for place in response.get_json()]
+            link = response.headers.get('Link')
+            url = link.split('>')[0][1:] if link else None
+        assert titles == ['Cabin'] + [place.title for place in tied]
+
+        response = client.get('/api/v1/places/?sort=rating&max_price=100'
+                              '&fields=title,rating')
+        assert [(p['title'], p['rating']['average'])
+                for p in response.get_json()] == [('Cabin', 5.0),
+                                                  ('Loft', 3.0)]
+        top, next_cursor = facade.get_top_rated_places(
+            filters={'min_rating': 4})
+        assert (top, next_cursor) == ([cabin], None)
+        for query in ('sort=stars', 'sort=rating&near=1,2',
+                      'sort=rating&cursor=bogus'):
+            response = client.get(f'/api/v1/places/?{query}')
+            assert response.status_code == 400, query
+
+        plan = ' '.join(str(row) for row in db.session.execute(db.text(
+            'EXPLAIN QUERY PLAN SELECT id FROM places '
+            'WHERE rating_avg >= 4 ORDER BY rating_avg DESC')))
+        assert 'ix_places_rating_avg' in plan
+
+    def test_place_responses_include_rating(self, client, facade, places,
+                                            guests):
+        loft = places[0]
+        self.review(facade, guests[0], loft, 4)
+        self.review(facade, guests[1], loft, 5)
+        detail = client.get(f'/api/v1/places/{loft.id}').get_json()
+        assert detail['rating'] == {
+            'count': 2, 'average': 4.5,
+            'histogram': {'1': 0, '2': 0, '3': 0, '4': 1, '5': 1},
+        }
+        listed = {place['id']: place['rating']
+                  for place in client.get('/api/v1/places/').get_json()}
+        assert listed[loft.id] == detail['rating']
+        assert listed[places[1].id]['count'] == 0
+
+    def test_upgrade_schema_backfills_old_tables(self, facade, places,
+                                                 guests):
+        from hbnb.app.persistence.schema import upgrade_schema
+        loft = places[0]
+        loft_id = loft.id
+        self.review(facade, guests[0], loft, 2)
+        self.review(facade, guests[1], loft, 4)
+        db.session.commit()
+        # Rebuild the places table as created before the aggregates existed
+        db.session.execute(db.text('DROP INDEX ix_places_rating_avg'))
+        for column in ('review_count', 'rating_sum', 'rating_avg',
+                       'rating_1', 'rating_2', 'rating_3', 'rating_4',
+                       'rating_5'):
+            db.session.execute(db.text(
+                f'ALTER TABLE places DROP COLUMN {column}'))
+        db.session.commit()
+        db.session.remove()
+
+        added = upgrade_schema(db)
+        assert added == {'places': ['review_count', 'rating_sum',
+                                    'rating_avg', 'rating_1', 'rating_2',
+                                    'rating_3', 'rating_4', 'rating_5']}
+        loft = db.session.get(Place, loft_id)
+        assert self.stats(loft) == (2, 6, 3.0,
+                                    {1: 0, 2: 1, 3: 0, 4: 1, 5: 0})
+        assert upgrade_schema(db) == {}
+
+
+# ==================== DUPLICATE REVIEW TESTS ====================
+
+class TestDuplicateReviews:
+    """Test suite for the one-review-per-user-and-place guard"""
+
+    @pytest.fixture
+    def place(self, facade, owner):
+        return facade.create_place({'title': 'Loft', 'price': 80,
+                                    'latitude': 1, 'longitude': 2,
+                                    'owner_id': owner.id})
+
+    @pytest.fixture
+    def guest(self, facade):
+        return facade.create_user({'first_name': 'Guest', 'last_name': 'User',
+                                   'email': 'guest@example.com',
+                                   'password': 'pw'})
+
+    def review_data(self, user, place, rating=4):
+        return {'text': 'Nice', 'rating': rating, 'user_id': user.id,
+                'place_id': place.id}
+
+    def test_has_reviewed(self, facade, place, guest, owner):
+        assert not facade.has_reviewed(guest.id, place.id)
+        facade.create_review(self.review_data(guest, place))
+        assert facade.has_reviewed(guest.id, place.id)
+        assert not facade.has_reviewed(owner.id, place.id)
+
+    def test_duplicate_post_does_not_scale(self, client, facade, place,
+                                           guest, queries):
+        data = self.review_data(guest, place)
+        headers = auth_header(guest)
+
+        def post_duplicate():
+            db.session.remove()
+            queries['count'] = 0
+            response = client.post('/api/v1/reviews/', json=data,
+                                   headers=headers)
+            assert response.status_code == 403
+            return queries['count']
+
+        facade.create_review(data)
+        few = post_duplicate()
+        for i in range(20):
+            user = facade.create_user({'first_name': 'U', 'last_name': str(i),
+                                       'email': f'u{i}@example.com',
+                                       'password': 'pw'})
+            facade.create_review(dict(data, user_id=user.id))
+        assert post_duplicate() == few
+
+    def test_unique_index_is_final_guard(self, facade, place, guest,
+                                         monkeypatch):
+        """A duplicate that passes the check is rejected by the index"""
+        first = facade.create_review(self.review_data(guest, place))
+        with facade.unit_of_work():
+            with pytest.raises(DuplicateReviewError):
+                facade.create_review(self.review_data(guest, place, 1))
+            # Only the savepoint was rolled back
+            other = facade.create_user({'first_name': 'O', 'last_name': 'U',
+                                        'email': 'other@example.com',
+                                        'password': 'pw'})
+        assert facade.get_user(other.id) is not None
+        assert [r.id for r in Review.query.all()] == [first.id]
+        db.session.refresh(place)
+        assert (place.review_count, place.rating_sum) == (1, 4)
+
+    def test_update_to_duplicate(self, facade, owner, place, guest):
+        cabin = facade.create_place({'title': 'Cabin', 'price': 50,
+                                     'latitude': 1, 'longitude': 2,
+                                     'owner_id': owner.id})
+        facade.create_review(self.review_data(guest, place))
+        moved = facade.create_review(self.review_data(guest, cabin))
+        with pytest.raises(DuplicateReviewError):
+            facade.update_review(moved.id, {'place_id': place.id})
+
+    def test_upgrade_skips_violated_unique_index(self, app, facade, place,
+                                                 guest, caplog):
+        from hbnb.app.persistence.schema import upgrade_schema
+        facade.create_review(self.review_data(guest, place))
+        db.session.execute(db.text('DROP INDEX ix_reviews_user_place'))
+        db.session.execute(db.text(
+            "INSERT INTO reviews (id, text, rating, user_id, place_id) "
+            "SELECT 'dup', text, rating, user_id, place_id FROM reviews"))
+        db.session.commit()
+        upgrade_schema(db)
+        assert 'ix_reviews_user_place' in caplog.text
+
+
+# ==================== BATCH ENDPOINT TESTS ====================
+
+class TestBatchCreate:
+    """Test suite for POST /places/batch and /reviews/batch"""
+
+    @pytest.fixture
+    def wifi(self, facade):
+        return facade.create_amenity({'name': 'WiFi'})
+
+    @pytest.fixture
+    def guest(self, facade):
+        return facade.create_user({'first_name': 'Guest', 'last_name': 'User',
+                                   'email': 'guest@example.com',
+                                   'password': 'pw'})
+
+    def place_data(self, owner_id, i=0, **extra):
+        data = {'title': f'Place {i}', 'price': 50.0 + i, 'latitude': 1.0,
+                'longitude': 2.0, 'owner_id': owner_id}
+        data.update(extra)
+        return data
+
+    def test_places_per_item_results(self, client, owner, guest, wifi,
+                                     commits):
+        payload = [
+            self.place_data(owner.id, 0, amenities=[wifi.id]),
+            self.place_data(owner.id, 1, price=-5),
+            self.place_data(owner.id, 2, amenities=[wifi.id, 'nope']),
+            self.place_data(guest.id, 3),
+            self.place_data(owner.id, 4),
+        ]
+        headers = auth_header(owner)
+        commits['count'] = 0
+        response = client.post('/api/v1/places/batch', json=payload,
+                               headers=headers)
+        assert response.status_code == 207
+        body = response.get_json()
+        assert (body['created'], body['failed']) == (2, 3)
+        assert [r['status'] for r in body['results']] == [201, 400, 404, 401,
+                                                          201]
+        assert 'price' in body['results'][1]['errors']
+        assert 'nope' in body['results'][2]['message']
+        assert commits['count'] == 1
+
+        first = body['results'][0]['place']
+        assert first['title'] == 'Place 0'
+        assert first['amenities'] == [{'id': wifi.id, 'name': 'WiFi'}]
+        assert first['owner']['email'] == 'owner@example.com'
+        assert sorted(p.title for p in Place.query) == ['Place 0', 'Place 4']
+
+    def test_places_lookups_do_not_scale(self, client, owner, wifi, queries):
+        def create(count):
+            db.session.expunge_all()
+            queries['count'] = 0
+            response = client.post('/api/v1/places/batch', json=[
+                self.place_data(owner_id, i, amenities=[wifi_id])
+                for i in range(count)
+            ], headers=headers)
+            assert response.status_code == 201
+            assert response.get_json()['created'] == count
+            return queries['count']
+
+        owner_id, wifi_id = owner.id, wifi.id
+        headers = auth_header(owner)
+        assert create(40) == create(2)
+
+    def test_reviews_per_item_results(self, client, facade, owner, guest):
+        places = [facade.create_place(self.place_data(owner.id, i))
+                  for i in range(3)]
+        facade.create_review({'text': 'Old', 'rating': 2,
+                              'user_id': guest.id, 'place_id': places[2].id})
+        place_ids = [place.id for place in places]
+        own_place = facade.create_place(self.place_data(guest.id, 9)).id
+
+        def review(place_id, rating=5, **extra):
+            data = {'text': 'Nice', 'rating': rating, 'user_id': guest_id,
+                    'place_id': place_id}
+            data.update(extra)
+            return data
+
+        guest_id = guest.id
+        response = client.post('/api/v1/reviews/batch', json=[
+            review(place_ids[0], 5),
+            review(place_ids[1], 3),
+            review(place_ids[0], 1),           # twice in the batch
+            review(place_ids[2]),              # reviewed before
+            review(own_place),
+            review('missing'),
+            review(place_ids[1], 9),           # rating out of range
+            review(place_ids[1], user_id=owner.id),
+        ], headers=auth_header(guest))
+        assert response.status_code == 207
+        results = response.get_json()['results']
+        assert [r['status'] for r in results] == [201, 201, 403, 403, 403,
+                                                  404, 400, 401]
+        assert results[0]['review']['user']['first_name'] == 'Guest'
+
+        db.session.expire_all()
+        ratings = {place.id: (place.review_count, place.rating_avg)
+                   for place in Place.query}
+        assert ratings[place_ids[0]] == (1, 5)
+        assert ratings[place_ids[1]] == (1, 3)
+        assert ratings[place_ids[2]] == (1, 2)
+
+    def test_rejects_non_array_and_oversized(self, app, client, owner):
+        headers = auth_header(owner)
+        response = client.post('/api/v1/places/batch',
+                               json=self.place_data(owner.id), headers=headers)
+        assert response.status_code == 400
+
+        app.config['BATCH_MAX_ITEMS'] = 2
+        response = client.post('/api/v1/reviews/batch', json=[{}] * 3,
+                               headers=headers)
+        assert response.status_code == 400
+        assert 'at most 2' in response.get_json()['message']
+
+
+# ==================== SQLITE PROFILE TESTS ====================
+
+class TestSQLitePragmas:
+    """Test suite for the per-connection SQLite performance profile"""
+
+    def test_pragmas_applied_to_connections(self, tmp_path):
+        from config import SQLITE_PERFORMANCE_PRAGMAS
+
+        class FileConfig(PersistenceTestConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'perf.db'}"
+            SQLITE_PRAGMAS = SQLITE_PERFORMANCE_PRAGMAS
+
+        app = create_app(FileConfig)
+        with app.app_context():
+            with db.engine.connect() as conn:
+                pragma = lambda name: conn.exec_driver_sql(
+                    f'PRAGMA {name}').scalar()
+                assert pragma('journal_mode') == 'wal'
+                assert pragma('synchronous') == 1  # NORMAL
+                assert pragma('busy_timeout') == 5000
+                assert pragma('temp_store') == 2  # MEMORY
+            db.engine.dispose()
+
+    def test_invalid_pragma_rejected(self):
+        class BadConfig(PersistenceTestConfig):
+            SQLITE_PRAGMAS = {'journal_mode': 'WAL; DROP TABLE users'}
+
+        with pytest.raises(ValueError):
+            create_app(BadConfig)
+
+
+# ==================== READ REPLICA TESTS ====================
+
+class TestReadReplica:
+    """Test suite for routing read-only queries to a replica bind"""
+
+    @pytest.fixture
+    def replica_app(self, tmp_path):
+        path = tmp_path / 'primary.db'
+
+        class ReplicaConfig(PersistenceTestConfig):
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+            # Same file opened read-only: any write routed here would fail
+            SQLALCHEMY_REPLICA_URI = f'sqlite:///file:{path}?mode=ro&uri=true'
+
+        app = create_app(ReplicaConfig)
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+            db.drop_all()
+            for engine in db.engines.values():
+                engine.dispose()
+
+    @pytest.fixture
+    def replica_queries(self, replica_app):
+        counter = {'count': 0}
+
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            counter['count'] += 1
+
+        engine = db.engines['replica']
+        event.listen(engine, 'before_cursor_execute', on_execute)
+        yield counter
+        event.remove(engine, 'before_cursor_execute', on_execute)
+
+    def test_reads_use_replica(self, replica_app, replica_queries):
+        facade = HBnBFacade()
+        amenity = facade.create_amenity({'name': 'WiFi'})
+        assert replica_queries['count'] == 0
+
+        client = replica_app.test_client()
+        response = client.get('/api/v1/amenities/')
+        assert [a['name'] for a in response.get_json()] == ['WiFi']
+        assert replica_queries['count'] > 0
+
+        replica_queries['count'] = 0
+        assert facade.get_amenity(amenity.id).name == 'WiFi'
+        assert replica_queries['count'] == 1
+
+    def test_writes_and_transactional_reads_use_primary(
+            self, replica_app, replica_queries):
+        facade = HBnBFacade()
+        amenity_id = facade.create_amenity({'name': 'WiFi'}).id
+        facade.update_amenity(amenity_id, {'name': 'Fast WiFi'})
+        with facade.unit_of_work():
+            facade.create_amenity({'name': 'Pool'})
+            assert facade.get_amenity_by_name('Pool') is not None
+        assert replica_queries['count'] == 0
+        db.session.remove()
+        assert facade.get_amenity(amenity_id).name == 'Fast WiFi'
+
+    def test_write_request_reads_primary(self, replica_app, replica_queries):
+        owner = HBnBFacade().create_user({
+            'first_name': 'A', 'last_name': 'B', 'email': 'a@example.com',
+            'password': 'pw', 'is_admin': True,
+        })
+        client = replica_app.test_client()
+        response = client.post('/api/v1/amenities/', json={'name': 'Pool'},
+                               headers=auth_header(owner))
+        assert response.status_code == 201
+        assert replica_queries['count'] == 0
+
+
+# ==================== ASGI SERVING MODE TESTS ====================
+
+class TestAsgi:
+    """Test suite for the async facade and the ASGI application"""
+
+    @pytest.fixture
+    def asgi_app(self, tmp_path):
+        pytest.importorskip('aiosqlite')
+        pytest.importorskip('asgiref')
+        from hbnb.app.asgi import create_asgi_app
+
+        class FileConfig(PersistenceTestConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'asgi.db'}"
+
+        app = create_app(FileConfig)
+        with app.app_context():
+            # Only the primary: db keeps the replica metadata of other tests
+            db.create_all(bind_key=None)
+            yield create_asgi_app(app)
+            db.session.remove()
+            db.engine.dispose()
+
+    @pytest.fixture
+    def seeded(self, asgi_app):
+        facade = HBnBFacade()
+        owner = facade.create_user({'first_name': 'Place', 'last_name': 'Owner',
+                                    'email': 'owner@example.com',
+                                    'password': 'secret', 'is_admin': True})
+        guest = facade.create_user({'first_name': 'Guest', 'last_name': 'User',
+                                    'email': 'guest@example.com',
+                                    'password': 'pw'})
+        wifi = facade.create_amenity({'name': 'WiFi'})
+        places = [facade.create_place({'title': f'Place {i}', 'price': 80,
+                                       'latitude': 1, 'longitude': 2,
+                                       'owner_id': owner.id,
+                                       'amenities': [wifi.id]})
+                  for i in range(3)]
+        review = facade.create_review({'text': 'Nice', 'rating': 4,
+                                       'user_id': guest.id,
+                                       'place_id': places[0].id})
+        ids = {'owner': owner.id, 'amenity': wifi.id, 'place': places[0].id,
+               'review': review.id}
+        db.session.remove()
+        return ids
+
+    async def request(self, app, method, path, query='', payload=None,
+                      headers=None):
+        """Send one request through the ASGI app: (status, headers, json)"""
+        body = b'' if payload is None else json.dumps(payload).encode()
+        raw_headers = [(b'host', b'localhost')]
+        if payload is not None:
+            raw_headers += [(b'content-type', b'application/json'),
+                            (b'content-length', str(len(body)).encode())]
+        raw_headers += [(name.lower().encode(), value.encode())
+                        for name, value in (headers or {}).items()]
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'},
+            'http_version': '1.1', 'method': method, 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'root_path': '',
+            'query_string': query.encode(), 'headers': raw_headers,
+            'server': ('localhost', 80), 'client': ('127.0.0.1', 5000),
+        }
+        messages = [{'type': 'http.request', 'body': body,
+                     'more_body': False}]
+
+        async def receive():
+            return messages.pop(0) if messages else {
+                'type': 'http.disconnect'}
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await app(scope, receive, send)
+        response_body = b''.join(m.get('body', b'') for m in sent[1:])
+        return (sent[0]['status'],
+                {name.decode(): value.decode()
+                 for name, value in sent[0]['headers']},
+                json.loads(response_body) if response_body else None)
+
+    def run(self, asgi_app, scenario):
+        async def main():
+            try:
+                return await scenario()
+            finally:
+                await asgi_app.facade.session_factory.kw['bind'].dispose()
+        return asyncio.run(main())
+
+    def test_native_routes_match_flask(self, asgi_app, seeded):
+        urls = [
+            ('/api/v1/users/', ''),
+            (f"/api/v1/users/{seeded['owner']}", ''),
+            ('/api/v1/amenities/', ''),
+            (f"/api/v1/amenities/{seeded['amenity']}", ''),
+            ('/api/v1/places/', ''),
+            ('/api/v1/places/', 'limit=2'),
+            (f"/api/v1/places/{seeded['place']}", ''),
+            ('/api/v1/places/missing', ''),
+            ('/api/v1/places/', 'cursor=bogus'),
+            ('/api/v1/reviews/', ''),
+            (f"/api/v1/reviews/{seeded['review']}", ''),
+            (f"/api/v1/reviews/places/{seeded['place']}/reviews", ''),
+            ('/api/v1/places/', 'fields=id,title,owner'),
+            (f"/api/v1/users/{seeded['owner']}", 'fields=email'),
+            ('/api/v1/reviews/', 'fields=nope'),
+            ('/api/v1/places/', 'fields='),
+            ('/api/v1/places/', 'min_price=10&max_price=1000&min_rating=1'),
+            ('/api/v1/places/', f"amenities={seeded['amenity']}"),
+            ('/api/v1/places/', 'max_price=cheap'),
+            ('/api/v1/places/', 'bbox=1,0,3,2'),
+            ('/api/v1/places/', 'near=1,2&radius_km=5&fields=id,title'),
+            ('/api/v1/places/', 'near=1,2&limit=1'),
+            ('/api/v1/places/', 'near=north'),
+            ('/api/v1/places/', 'sort=rating&fields=id,title,rating'),
+            ('/api/v1/places/', 'sort=rating&limit=1'),
+            ('/api/v1/places/', 'sort=rating&near=1,2'),
+            ('/api/v1/places/nearest', 'lat=1&lon=2&k=2&fields=id,title'),
+            ('/api/v1/places/nearest', 'lat=1'),
+            ('/api/v1/places/search', 'q=place&limit=2&fields=id,title'),
+            ('/api/v1/places/search', 'q=pla*'),
+            ('/api/v1/places/search', 'q=***'),
+            ('/api/v1/places/search', 'q='),
+        ]
+        client = asgi_app.flask_app.test_client()
+
+        async def scenario():
+            for path, query in urls:
+                assert asgi_app.match({'type': 'http', 'method': 'GET',
+                                       'path': path})[0] is not None
+                status, headers, body = await self.request(
+                    asgi_app, 'GET', path, query)
+                expected = client.get(f'{path}?{query}')
+                assert (status, body) == (expected.status_code,
+                                          expected.get_json()), path
+                for name in ('X-Next-Cursor', 'Link'):
+                    assert headers.get(name.lower()) == \
+                        expected.headers.get(name)
+
+        self.run(asgi_app, scenario)
+
+    def test_login_offloads_bcrypt(self, asgi_app, seeded, monkeypatch):
+        import threading
+        from flask_jwt_extended import decode_token
+        verify = User.verify_password
+        threads = []
+
+        def recording_verify(user, password):
+            threads.append(threading.current_thread().name)
+            return verify(user, password)
+
+        monkeypatch.setattr(User, 'verify_password', recording_verify)
+        path = '/api/v1/users/login'
+
+        async def scenario():
+            ok = await self.request(asgi_app, 'POST', path, payload={
+                'email': 'owner@example.com', 'password': 'secret'})
+            wrong = await self.request(asgi_app, 'POST', path, payload={
+                'email': 'owner@example.com', 'password': 'nope'})
+            invalid = await self.request(asgi_app, 'POST', path,
+                                         payload={'email': 'x'})
+            return ok, wrong, invalid
+
+        ok, wrong, invalid = self.run(asgi_app, scenario)
+        assert ok[0] == 200 and ok[2]['user']['id'] == seeded['owner']
+        with asgi_app.flask_app.app_context():
+            claims = decode_token(ok[2]['access_token'])
+        assert claims['sub'] == seeded['owner'] and claims['is_admin']
+        assert wrong[0] == 401
+        assert invalid[0] == 400 and 'password' in invalid[2]['errors']
+        assert threads and all(name.startswith('bcrypt') for name in threads)
+
+    def test_other_routes_forwarded_to_flask(self, asgi_app, seeded):
+        owner = db.session.get(User, seeded['owner'])
+        headers = auth_header(owner)
+        headers['Origin'] = 'http://localhost:8000'
+
+        async def scenario():
+            created = await self.request(
+                asgi_app, 'POST', '/api/v1/amenities/',
+                payload={'name': 'Pool'}, headers=headers)
+            listed = await self.request(asgi_app, 'GET', '/api/v1/amenities/',
+                                        headers=headers)
+            return created, listed
+
+        created, listed = self.run(asgi_app, scenario)
+        assert created[0] == 201
+        assert sorted(a['name'] for a in listed[2]) == ['Pool', 'WiFi']
+        # Same CORS headers on both paths
+        for _, response_headers, _ in (created, listed):
+            assert response_headers['access-control-allow-origin'] == \
+                'http://localhost:8000'
+
+    def test_concurrent_requests(self, asgi_app, seeded):
+        async def scenario():
+            return await asyncio.gather(*(
+                self.request(asgi_app, 'GET',
+                             f"/api/v1/places/{seeded['place']}")
+                for _ in range(50)))
+
+        responses = self.run(asgi_app, scenario)
+        assert {status for status, _, _ in responses} == {200}
+        assert all(body['rating']['count'] == 1 for _, _, body in responses)
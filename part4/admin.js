@@ -204,14 +204,13 @@ async function loadUsers() {
     listElement.innerHTML = '<div class="spinner"></div>';
 
     try {
-        const response = await fetch(`${API_BASE_URL}/users/`, {
+        const { response, items: users } = await fetchAllPages(`${API_BASE_URL}/users/`, {
             headers: {
                 'Authorization': `Bearer ${adminToken}`
             }
         });
 
         if (response.ok) {
-            const users = await response.json();
             displayUsers(users);
         } else {
             listElement.innerHTML = '<p>Failed to load users</p>';
@@ -314,10 +313,9 @@ async function loadAmenities() {
     listElement.innerHTML = '<div class="spinner"></div>';
 
     try {
-        const response = await fetch(`${API_BASE_URL}/amenities/`);
+        const { response, items: amenities } = await fetchAllPages(`${API_BASE_URL}/amenities/`);
 
         if (response.ok) {
-            const amenities = await response.json();
             displayAmenities(amenities);
         } else {
             listElement.innerHTML = '<p>Failed to load amenities</p>';
@@ -417,10 +415,9 @@ async function updateAmenity(amenityId, newName) {
 // Load amenities for select dropdown
 async function loadAmenitiesForSelect() {
     try {
-        const response = await fetch(`${API_BASE_URL}/amenities/`);
+        const { response, items: amenities } = await fetchAllPages(`${API_BASE_URL}/amenities/`);
 
         if (response.ok) {
-            const amenities = await response.json();
             const select = document.getElementById('place-amenities');
             select.innerHTML = '';
             
@@ -444,10 +441,9 @@ async function loadPlaces() {
     listElement.innerHTML = '<div class="spinner"></div>';
 
     try {
-        const response = await fetch(`${API_BASE_URL}/places/`);
+        const { response, items: places } = await fetchAllPages(`${API_BASE_URL}/places/`);
 
         if (response.ok) {
-            const places = await response.json();
             displayPlaces(places);
         } else {
             listElement.innerHTML = '<p>Failed to load places</p>';
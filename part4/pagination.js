@@ -0,0 +1,42 @@
+// Paginated collections: the API returns one page per request and names the
+// next one in the X-Next-Cursor header. Loaded before scripts.js and admin.js
+
+// Largest page the API serves (?limit=), to keep the round trips few
+const PAGE_SIZE = 200;
+
+// Fetch one page of a collection, from its start or from a cursor.
+// Resolves to { response, items, nextCursor }: items is null if the request
+// failed, nextCursor null on the last page
+async function fetchPage(url, cursor = null, options = {}, limit = PAGE_SIZE) {
+    const separator = url.includes('?') ? '&' : '?';
+    let pageUrl = `${url}${separator}limit=${limit}`;
+    if (cursor) {
+        pageUrl += `&cursor=${encodeURIComponent(cursor)}`;
+    }
+    const response = await fetch(pageUrl, options);
+    if (!response.ok) {
+        return { response, items: null, nextCursor: null };
+    }
+    const items = await response.json();
+    return { response, items, nextCursor: response.headers.get('X-Next-Cursor') };
+}
+
+// Fetch every page of a collection, for lists that need all of it (e.g. the
+// admin selects); pages meant to be browsed should use fetchPage().
+// Resolves to { response, items }: the last response, and the items of all
+// pages if every request succeeded (null otherwise)
+async function fetchAllPages(url, options = {}) {
+    const items = [];
+    let cursor = null;
+    while (true) {
+        const page = await fetchPage(url, cursor, options);
+        if (!page.items) {
+            return { response: page.response, items: null };
+        }
+        items.push(...page.items);
+        cursor = page.nextCursor;
+        if (!cursor) {
+            return { response: page.response, items };
+        }
+    }
+}
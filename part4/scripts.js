@@ -1,6 +1,13 @@
 // API Base URL - Update this with your API URL
 const API_BASE_URL = 'http://127.0.0.1:5001/api/v1';
 
+// Places per page on the index page; "Load more" fetches the next one
+// (fetchPage() is in pagination.js)
+const PLACES_PAGE_SIZE = 50;
+
+// Request of the places list shown and the cursor of its next page
+let placesQuery = null;
+
 // Utility function to get cookie value by name
 function getCookie(name) {
     const value = `; ${document.cookie}`;
@@ -91,9 +98,14 @@ document.addEventListener('DOMContentLoaded', () => {
             }
         }
 
-        // Fetch and display places
+        // Fetch and display the first page of places
         fetchPlaces(token);
 
+        const loadMoreButton = document.getElementById('load-more');
+        if (loadMoreButton) {
+            loadMoreButton.addEventListener('click', loadMorePlaces);
+        }
+
         // Price filter event listener
         if (priceFilter) {
             priceFilter.addEventListener('change', (event) => {
@@ -184,8 +196,8 @@ document.addEventListener('DOMContentLoaded', () => {
 
 // ==================== FETCH FUNCTIONS ====================
 
-// Fetch all places
-async function fetchPlaces(token) {
+// Fetch the first page of places
+async function fetchPlaces(token, maxPrice = 'all') {
     try {
         const headers = {
             'Content-Type': 'application/json'
@@ -195,14 +207,25 @@ async function fetchPlaces(token) {
             headers['Authorization'] = `Bearer ${token}`;
         }
 
-        const response = await fetch(`${API_BASE_URL}/places/`, {
-            method: 'GET',
-            headers: headers
-        });
+        // Let the API filter by price
+        let url = `${API_BASE_URL}/places/`;
+        if (maxPrice !== 'all') {
+            url += `?max_price=${encodeURIComponent(maxPrice)}`;
+        }
+
+        const query = { url, options: { method: 'GET', headers: headers }, cursor: null };
+        placesQuery = query;
+        setNextPlacesCursor(query, null);
+
+        const { response, items: places, nextCursor } = await fetchPage(
+            url, null, query.options, PLACES_PAGE_SIZE);
+        if (placesQuery !== query) {
+            return; // the filter changed meanwhile
+        }
 
         if (response.ok) {
-            const places = await response.json();
             displayPlaces(places);
+            setNextPlacesCursor(query, nextCursor);
         } else {
             console.error('Failed to fetch places:', response.statusText);
             document.getElementById('places-list').innerHTML = '<p>Failed to load places.</p>';
@@ -213,6 +236,44 @@ async function fetchPlaces(token) {
     }
 }
 
+// Append the next page of places to the list
+async function loadMorePlaces() {
+    const query = placesQuery;
+    if (!query || !query.cursor) {
+        return;
+    }
+    const loadMoreButton = document.getElementById('load-more');
+    loadMoreButton.disabled = true;
+
+    try {
+        const { response, items: places, nextCursor } = await fetchPage(
+            query.url, query.cursor, query.options, PLACES_PAGE_SIZE);
+        if (placesQuery !== query) {
+            return; // the filter changed meanwhile
+        }
+
+        if (response.ok) {
+            appendPlaces(places);
+            setNextPlacesCursor(query, nextCursor);
+        } else {
+            console.error('Failed to fetch more places:', response.statusText);
+        }
+    } catch (error) {
+        console.error('Error fetching more places:', error);
+    } finally {
+        loadMoreButton.disabled = false;
+    }
+}
+
+// Remember where the next page starts; "Load more" is shown only if there is one
+function setNextPlacesCursor(query, cursor) {
+    query.cursor = cursor;
+    const loadMoreButton = document.getElementById('load-more');
+    if (loadMoreButton) {
+        loadMoreButton.hidden = !cursor;
+    }
+}
+
 // Display places
 function displayPlaces(places) {
     const placesList = document.getElementById('places-list');
@@ -223,6 +284,13 @@ function displayPlaces(places) {
         return;
     }
 
+    appendPlaces(places);
+}
+
+// Add place cards after those already listed
+function appendPlaces(places) {
+    const placesList = document.getElementById('places-list');
+
     places.forEach(place => {
         const placeCard = document.createElement('div');
         placeCard.className = 'place-card';
@@ -240,24 +308,9 @@ function displayPlaces(places) {
     });
 }
 
-// Filter places by price
+// Filter places by price (server-side, see fetchPlaces)
 function filterPlacesByPrice(maxPrice) {
-    const placeCards = document.querySelectorAll('.place-card');
-    
-    placeCards.forEach(card => {
-        const price = parseFloat(card.dataset.price);
-        
-        if (maxPrice === 'all') {
-            card.style.display = 'block';
-        } else {
-            const maxPriceNum = parseFloat(maxPrice);
-            if (price <= maxPriceNum) {
-                card.style.display = 'block';
-            } else {
-                card.style.display = 'none';
-            }
-        }
-    });
+    fetchPlaces(checkAuthentication(), maxPrice);
 }
 
 // View place details
@@ -18,11 +18,19 @@
 // ===================================================================
 
 const API_BASE_URL = 'http://localhost:5001/api/v1';
-const PLACES_ENDPOINT = `${API_BASE_URL}/places/`;
+// Only the fields the place cards show (see the API's ?fields=)
+const PLACES_ENDPOINT = `${API_BASE_URL}/places/?fields=id,title,price,description`;
 
-// Global variable to store all places for filtering
+// Places per page; "Load more" fetches the next one (fetchPage() is in
+// scripts/pagination.js)
+const PLACES_PAGE_SIZE = 50;
+
+// Global variable to store the places loaded so far
 let allPlaces = [];
 
+// Request of the places listed and the cursor of their next page
+let placesQuery = null;
+
 // ===================================================================
 // Cookie Management Functions
 // ===================================================================
@@ -124,10 +132,11 @@ function logout() {
 // ===================================================================
 
 /**
- * Fetch places from API
+ * Fetch the first page of places from API
  * @param {string} token - Optional JWT token for authenticated requests
+ * @param {string} maxPrice - Optional maximum price ('all' for no limit)
  */
-async function fetchPlaces(token = null) {
+async function fetchPlaces(token = null, maxPrice = 'all') {
     const placesSection = document.getElementById('placesSection');
     const loadingSpinner = document.getElementById('loadingSpinner');
     const errorMessage = document.getElementById('errorMessage');
@@ -147,11 +156,22 @@ async function fetchPlaces(token = null) {
             headers['Authorization'] = `Bearer ${token}`;
         }
         
-        // Make API request
-        const response = await fetch(PLACES_ENDPOINT, {
-            method: 'GET',
-            headers: headers
-        });
+        // Let the API filter by price
+        let url = PLACES_ENDPOINT;
+        if (maxPrice !== 'all') {
+            url += `&max_price=${encodeURIComponent(maxPrice)}`;
+        }
+
+        // Make API request for the first page; later pages are fetched by
+        // loadMorePlaces()
+        const query = { url, options: { method: 'GET', headers: headers }, cursor: null };
+        placesQuery = query;
+        setNextPlacesCursor(query, null);
+        const { response, items: places, nextCursor } = await fetchPage(
+            url, null, query.options, PLACES_PAGE_SIZE);
+        if (placesQuery !== query) {
+            return; // the filter changed meanwhile
+        }
         
         // Handle response
         if (!response.ok) {
@@ -164,14 +184,14 @@ async function fetchPlaces(token = null) {
             throw new Error(`Failed to fetch places: ${response.status} ${response.statusText}`);
         }
         
-        // Parse response data
-        const places = await response.json();
-        
         // Store places globally for filtering
         allPlaces = places;
         
         // Display places
-        displayPlaces(places);
+        displayPlaces(places, maxPrice === 'all'
+            ? 'No places found. Check back later!'
+            : 'No places found matching your filter.');
+        setNextPlacesCursor(query, nextCursor);
         
     } catch (error) {
         console.error('Error fetching places:', error);
@@ -192,6 +212,57 @@ async function fetchPlaces(token = null) {
     }
 }
 
+/**
+ * Fetch the next page of places and append it to the grid
+ */
+async function loadMorePlaces() {
+    const query = placesQuery;
+    if (!query || !query.cursor) {
+        return;
+    }
+    const loadMoreBtn = document.getElementById('loadMoreBtn');
+    const errorMessage = document.getElementById('errorMessage');
+    loadMoreBtn.disabled = true;
+    
+    try {
+        const { response, items: places, nextCursor } = await fetchPage(
+            query.url, query.cursor, query.options, PLACES_PAGE_SIZE);
+        if (placesQuery !== query) {
+            return; // the filter changed meanwhile
+        }
+        if (!response.ok) {
+            throw new Error(`Failed to fetch places: ${response.status} ${response.statusText}`);
+        }
+        
+        allPlaces = allPlaces.concat(places);
+        appendPlaces(places);
+        setNextPlacesCursor(query, nextCursor);
+        
+    } catch (error) {
+        console.error('Error fetching more places:', error);
+        if (errorMessage) {
+            errorMessage.textContent = error.message || 'Failed to load more places. Please try again.';
+            errorMessage.classList.remove('hidden');
+        }
+    } finally {
+        loadMoreBtn.disabled = false;
+    }
+}
+
+/**
+ * Remember where the next page of places starts
+ * The "Load more" button is shown only if there is one.
+ * @param {Object} query - Request of the places listed
+ * @param {string|null} cursor - X-Next-Cursor of the last page loaded
+ */
+function setNextPlacesCursor(query, cursor) {
+    query.cursor = cursor;
+    const loadMoreBtn = document.getElementById('loadMoreBtn');
+    if (loadMoreBtn) {
+        loadMoreBtn.classList.toggle('hidden', !cursor);
+    }
+}
+
 // ===================================================================
 // Display Functions
 // ===================================================================
@@ -199,8 +270,9 @@ async function fetchPlaces(token = null) {
 /**
  * Display places in the grid
  * @param {Array} places - Array of place objects
+ * @param {string} emptyMessage - Message shown when there are no places
  */
-function displayPlaces(places) {
+function displayPlaces(places, emptyMessage = 'No places found. Check back later!') {
     const placesSection = document.getElementById('placesSection');
     
     if (!placesSection) {
@@ -213,10 +285,20 @@ function displayPlaces(places) {
     
     // Check if places array is empty
     if (!places || places.length === 0) {
-        placesSection.innerHTML = '<p class="no-results">No places found. Check back later!</p>';
+        placesSection.innerHTML = `<p class="no-results">${emptyMessage}</p>`;
         return;
     }
     
+    appendPlaces(places);
+}
+
+/**
+ * Append place cards after those already in the grid
+ * @param {Array} places - Array of place objects
+ */
+function appendPlaces(places) {
+    const placesSection = document.getElementById('placesSection');
+    
     // Create and append place cards
     places.forEach(place => {
         const placeCard = createPlaceCard(place);
@@ -283,50 +365,12 @@ function escapeHtml(text) {
 
 /**
  * Filter places by price
+ * The API returns only the matching places (max_price), so every place
+ * within budget is listed, not just those of the page already loaded.
  * @param {string} maxPrice - Maximum price ('all', '10', '50', '100')
  */
 function filterPlacesByPrice(maxPrice) {
-    const placesSection = document.getElementById('placesSection');
-    
-    if (!placesSection) return;
-    
-    // Get all place cards
-    const placeCards = placesSection.querySelectorAll('.place-card');
-    
-    if (maxPrice === 'all') {
-        // Show all places
-        placeCards.forEach(card => {
-            card.style.display = 'block';
-        });
-    } else {
-        // Filter by price
-        const maxPriceValue = parseFloat(maxPrice);
-        
-        placeCards.forEach(card => {
-            const cardPrice = parseFloat(card.getAttribute('data-price'));
-            
-            if (cardPrice <= maxPriceValue) {
-                card.style.display = 'block';
-            } else {
-                card.style.display = 'none';
-            }
-        });
-    }
-    
-    // Check if any places are visible
-    const visibleCards = Array.from(placeCards).filter(card => card.style.display !== 'none');
-    
-    // Remove existing "no results" messages first
-    const existingNoResults = placesSection.querySelectorAll('.no-results');
-    existingNoResults.forEach(msg => msg.remove());
-    
-    if (visibleCards.length === 0 && placeCards.length > 0) {
-        // Only show message if there are places but none match filter
-        const noResultsMsg = document.createElement('p');
-        noResultsMsg.className = 'no-results';
-        noResultsMsg.textContent = 'No places found matching your filter.';
-        placesSection.appendChild(noResultsMsg);
-    }
+    fetchPlaces(getCookie('token'), maxPrice);
 }
 
 /**
@@ -364,4 +408,10 @@ document.addEventListener('DOMContentLoaded', () => {
     if (logoutBtn) {
         logoutBtn.addEventListener('click', logout);
     }
+    
+    // Setup "Load more" button
+    const loadMoreBtn = document.getElementById('loadMoreBtn');
+    if (loadMoreBtn) {
+        loadMoreBtn.addEventListener('click', loadMorePlaces);
+    }
 });
@@ -0,0 +1,60 @@
+// ===================================================================
+// HBnB - Paginated Collections
+// ===================================================================
+
+/**
+ * The API returns one page of a collection per request and names the
+ * next one in the X-Next-Cursor header. Load this file before the page
+ * scripts that list collections.
+ */
+
+// Largest page the API serves (?limit=), to keep the round trips few
+const PAGE_SIZE = 200;
+
+/**
+ * Fetch one page of a collection, from its start or from a cursor.
+ * @param {string} url - Collection URL, with or without a query string
+ * @param {string|null} cursor - X-Next-Cursor of the previous page
+ * @param {Object} options - fetch() options
+ * @param {number} limit - Page size (?limit=)
+ * @returns {Promise<{response: Response, items: Array|null,
+ *     nextCursor: string|null}>} The response, its items if it succeeded,
+ *     and the cursor of the next page (null on the last one)
+ */
+async function fetchPage(url, cursor = null, options = {}, limit = PAGE_SIZE) {
+    const separator = url.includes('?') ? '&' : '?';
+    let pageUrl = `${url}${separator}limit=${limit}`;
+    if (cursor) {
+        pageUrl += `&cursor=${encodeURIComponent(cursor)}`;
+    }
+    const response = await fetch(pageUrl, options);
+    if (!response.ok) {
+        return { response, items: null, nextCursor: null };
+    }
+    const items = await response.json();
+    return { response, items, nextCursor: response.headers.get('X-Next-Cursor') };
+}
+
+/**
+ * Fetch every page of a collection, for lists that need all of it.
+ * Pages meant to be browsed should use fetchPage().
+ * @param {string} url - Collection URL, with or without a query string
+ * @param {Object} options - fetch() options
+ * @returns {Promise<{response: Response, items: Array|null}>} The last
+ *     response, and the items of all pages if every request succeeded
+ */
+async function fetchAllPages(url, options = {}) {
+    const items = [];
+    let cursor = null;
+    while (true) {
+        const page = await fetchPage(url, cursor, options);
+        if (!page.items) {
+            return { response: page.response, items: null };
+        }
+        items.push(...page.items);
+        cursor = page.nextCursor;
+        if (!cursor) {
+            return { response: page.response, items };
+        }
+    }
+}